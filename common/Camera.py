@@ -3,7 +3,9 @@
 import sys
 import os
 import time
+import threading
 from pathlib import Path
+from functools import partial
 from ctypes import *
 import numpy as np
 import cv2 as cv
@@ -22,104 +24,532 @@ else:
 
 try:
     from MvCameraControl_class import *
-except ImportError:
-    print("错误：无法导入 MvCameraControl_class，请检查 MvImport 文件夹位置。")
-    sys.exit()
+except Exception as e:  # ImportError，或非 Windows 下 WinDLL 不存在 (NameError)、DLL 加载失败 (OSError)
+    # 抛出异常而不是退出进程，由调用方 (CameraRegistry.create_camera) 决定如何处理
+    raise ImportError(f"无法加载海康 SDK (MvCameraControl_class)，请检查 MvImport / dll 文件夹: {e}") from e
 
-class Camera:
-    def __init__(self):
+from .CameraBase import (CameraBase, STREAM_MODE_THREAD, STREAM_MODE_CALLBACK,
+                         TRIGGER_OFF, TRIGGER_SOFTWARE, TRIGGER_LINE, trigger_mode_of)
+from .FrameBuffer import FrameInfo, FramePool, LatencyStats
+from .GigETransport import apply_transport, resolve_transport
+from .PixelConvert import BAYER8, BayerConverter, FrameConverter
+
+# SDK 回调函数类型 (Windows 下 SDK 使用 stdcall)
+if sys.platform == "win32":
+    winfun_ctype = WINFUNCTYPE
+else:
+    winfun_ctype = CFUNCTYPE
+FrameInfoCallBack = winfun_ctype(None, POINTER(c_ubyte), POINTER(MV_FRAME_OUT_INFO_EX), c_void_p)
+ExceptionCallBack = winfun_ctype(None, c_uint, c_void_p)
+
+# 连续取图失败多少次后主动检查设备是否仍然在线 (异常回调之外的兜底)
+RECONNECT_CHECK_FAILS = 3
+
+# SDK 取流策略 (config.yaml camera.buffering.grab_strategy)
+GRAB_STRATEGIES = {
+    "one_by_one": MV_GrabStrategy_OneByOne,               # 从旧到新逐帧取，不丢帧但积压时延迟增大
+    "latest_only": MV_GrabStrategy_LatestImagesOnly,      # 只取最新一帧，同时清空其余缓存，延迟最低
+    "latest": MV_GrabStrategy_LatestImages,               # 取最新的 output_queue 帧
+    "upcoming": MV_GrabStrategy_UpcomingImage,            # 忽略已缓存的帧，等待下一帧
+}
+
+
+def _align_step(value, stValue):
+    """按节点的步进向下对齐 (不小于 nMin)，不检查上限"""
+    nInc = max(1, stValue.nInc)
+    return int(max(stValue.nMin + (value - stValue.nMin) // nInc * nInc, stValue.nMin))
+
+
+def _align_down(value, stValue):
+    """按节点的步进向下对齐，并限制在 [nMin, nMax] 内"""
+    nInc = max(1, stValue.nInc)
+    nMax = stValue.nMax - (stValue.nMax - stValue.nMin) % nInc
+    return int(min(_align_step(value, stValue), nMax))
+
+
+def _align_up(value, stValue):
+    nInc = max(1, stValue.nInc)
+    return _align_down(value + nInc - 1, stValue)
+
+
+def enum_devices():
+    """枚举所有 GigE/USB 相机，返回设备信息列表 (结构体副本，可跨线程保存)"""
+    deviceList = MV_CC_DEVICE_INFO_LIST()
+    tlayerType = MV_GIGE_DEVICE | MV_USB_DEVICE
+    ret = MvCamera.MV_CC_EnumDevices(tlayerType, deviceList)
+    if ret != 0:
+        print(f"枚举设备失败! ret[0x{ret:x}]")
+        return []
+    devices = []
+    for i in range(deviceList.nDeviceNum):
+        stDevInfo = cast(deviceList.pDeviceInfo[i], POINTER(MV_CC_DEVICE_INFO)).contents
+        devices.append(MV_CC_DEVICE_INFO.from_buffer_copy(stDevInfo))
+    return devices
+
+
+def _ubyte_str(arr):
+    return bytes(arr).split(b"\x00", 1)[0].decode("ascii", errors="ignore")
+
+
+def device_serial(stDevInfo):
+    """设备序列号"""
+    if stDevInfo.nTLayerType == MV_GIGE_DEVICE:
+        return _ubyte_str(stDevInfo.SpecialInfo.stGigEInfo.chSerialNumber)
+    if stDevInfo.nTLayerType == MV_USB_DEVICE:
+        return _ubyte_str(stDevInfo.SpecialInfo.stUsb3VInfo.chSerialNumber)
+    return ""
+
+
+def device_user_id(stDevInfo):
+    """用户自定义名称 (DeviceUserID)"""
+    if stDevInfo.nTLayerType == MV_GIGE_DEVICE:
+        return _ubyte_str(stDevInfo.SpecialInfo.stGigEInfo.chUserDefinedName)
+    if stDevInfo.nTLayerType == MV_USB_DEVICE:
+        return _ubyte_str(stDevInfo.SpecialInfo.stUsb3VInfo.chUserDefinedName)
+    return ""
+
+
+def fill_frame_info(info, stFrameInfo, recv_time):
+    """把 MV_FRAME_OUT_INFO_EX 中常用的字段拷到 FrameInfo (只读取需要的字段，不复制整个结构体)"""
+    info.frame_num = stFrameInfo.nFrameNum
+    info.dev_timestamp = (stFrameInfo.nDevTimeStampHigh << 32) | stFrameInfo.nDevTimeStampLow
+    info.host_timestamp = stFrameInfo.nHostTimeStamp
+    info.recv_time = recv_time
+    info.lost_packet = stFrameInfo.nLostPacket
+    info.exposure = stFrameInfo.fExposureTime
+    info.gain = stFrameInfo.fGain
+    info.trigger_index = stFrameInfo.nTriggerIndex
+    info.width = stFrameInfo.nWidth
+    info.height = stFrameInfo.nHeight
+    info.pixel_type = stFrameInfo.enPixelType
+    info.frame_len = stFrameInfo.nFrameLen
+    return info
+
+
+class SdkFrame:
+    """
+    SDK 内部缓存中的一帧 (MV_CC_GetImageBuffer)，image 直接映射 SDK 内存，不做拷贝。
+    必须通过 release() 或 with 语句归还 (MV_CC_FreeImageBuffer)，归还后 image 失效。
+    """
+
+    def __init__(self, camera, stOutFrame):
+        self._camera = camera
+        self._stOutFrame = stOutFrame
+        stFrameInfo = stOutFrame.stFrameInfo
+        self.frame_id = stFrameInfo.nFrameNum
+        self.timestamp = time.time()
+        self.width = stFrameInfo.nWidth
+        self.height = stFrameInfo.nHeight
+        self.pixel_type = stFrameInfo.enPixelType
+        self.frame_len = stFrameInfo.nFrameLen
+        self.info = fill_frame_info(FrameInfo(), stFrameInfo, self.timestamp)
+        # 以 numpy 数组包装 SDK 指针，零拷贝
+        self.data = np.ctypeslib.as_array(stOutFrame.pBufAddr, shape=(self.frame_len,))
+        self.raw_buffer = stOutFrame.pBufAddr
+        self.image = camera._convert_into(self, stFrameInfo)
+        self.scale = camera._update_scale(self.image, self.width)
+        self.offset = camera.roi_offset
+
+    @property
+    def released(self):
+        return self._stOutFrame is None
+
+    def output(self, shape, dtype=np.uint8):
+        """非 Mono8/BGR8 格式需要转换时使用相机级复用缓冲 (下一次零拷贝取图前有效)"""
+        return self._camera._zero_copy_output(shape, dtype)
+
+    def release(self):
+        if self._stOutFrame is not None:
+            self.image = None
+            self.data = None
+            self._camera.cam.MV_CC_FreeImageBuffer(self._stOutFrame)
+            self._stOutFrame = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class Camera(CameraBase):
+    def __init__(self, cam_cfg=None, nPoolSize=4, mono_converter=None, stDevInfo=None):
         """
         初始化时自动连接第一台相机并开始取流
+        cam_cfg: config.yaml 中的 camera 段 (dict)，缺省时全部使用默认值
+        stDevInfo: 指定要打开的设备 (enum_devices() 的结果)，缺省时连接枚举到的第一台
+        nPoolSize: 取图缓冲池的槽位数 (至少 2，保证消费者持有一帧时仍可取下一帧)
+        mono_converter: Mono10/12 的转换方式 (PixelConvert.MonoConverter)，默认右移到 8bit
         """
         self.cam = MvCamera()
+        super().__init__(cam_cfg, nPoolSize)
+        self.stDevInfo = stDevInfo
+        self.serial = ""
         self.nPayloadSize = 0
-        self.buf_cache = None # 用于缓存数据 buffer
-        self.is_open = False  # 标记相机是否正常打开
+        # 像素格式分发表；binning: Bayer 数据每个 2x2 块合成一个 BGR 像素，输出半分辨率
+        self.converter = FrameConverter(
+            mono_converter=mono_converter,
+            bayer_converter=BayerConverter(self.cam_cfg.get('demosaic', 'bilinear'), counter=self.alloc_counter),
+            binning=bool(self.cam_cfg.get('binning', False)),
+            counter=self.alloc_counter)
+        self.stFrameInfo = MV_FRAME_OUT_INFO_EX()  # 复用的帧信息结构体
+        self._zc_out = None                # 零拷贝取图中格式转换的复用缓冲
+        self._frame_cb = None             # 回调函数对象，必须持有引用防止被回收
+        self._trigger_args = None         # 当前触发设置 (mode, source, activation)，重连时恢复
+        self._original_pixel_format = None  # 切换为 Bayer8 之前相机的 PixelFormat，关闭时恢复
+        self.buffering = {}               # 实际生效的 SDK 缓存配置
+        self.frame_age = LatencyStats()   # 帧到达主机到交给程序的时间 (SDK 缓存中的排队延迟)
+        self.nLostPackets = 0             # 各帧 nLostPacket 之和 (残帧)
+        self.nPacketSize = 0              # 探测到的 GigE 包大小，重连时直接复用
+        self.transport = {}               # 实际生效的 GigE 传输参数 (camera.transport)
+
+        # 掉线自动重连：SDK 异常回调 + 取图失败时检查 MV_CC_IsDeviceConnected
+        reconnect_cfg = self.cam_cfg.get('reconnect') or {}
+        self.auto_reconnect = bool(reconnect_cfg.get('enabled', True))
+        self.fReconnectInterval = float(reconnect_cfg.get('interval', 0.5))
+        self._exception_cb = None         # 异常回调对象，必须持有引用
+        self._reconnect_thread = None
+        self._reconnect_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._nConsecutiveFails = 0
+        self.nDisconnects = 0
+        self.nReconnects = 0
+        self.reconnect_time = LatencyStats()   # 掉线到恢复取流的耗时
 
         print("正在初始化相机...")
         self._connect_and_start()
 
     def _connect_and_start(self):
         """内部方法：执行连接、打开、配置、开始取流"""
-        deviceList = MV_CC_DEVICE_INFO_LIST()
-        tlayerType = MV_GIGE_DEVICE | MV_USB_DEVICE
-        
-        # 1. 枚举设备
-        ret = MvCamera.MV_CC_EnumDevices(tlayerType, deviceList)
-        if ret != 0:
-            print(f"枚举设备失败! ret[0x{ret:x}]")
-            return
+        # 1. 枚举设备 (已指定设备时跳过)
+        stDeviceList = self.stDevInfo
+        if stDeviceList is None:
+            devices = enum_devices()
+            if not devices:
+                print("未发现任何相机设备！")
+                return
+            print(f"发现 {len(devices)} 个设备，默认连接第 [0] 个...")
+            stDeviceList = devices[0]
+            self.stDevInfo = stDeviceList
+        self.serial = device_serial(stDeviceList)
 
-        if deviceList.nDeviceNum == 0:
-            print("未发现任何相机设备！")
+        if not self._open_device():
             return
 
-        print(f"发现 {deviceList.nDeviceNum} 个设备，默认连接第 [0] 个...")
+        self.is_open = True
+        print("相机初始化成功，正在连续取流中...")
 
-        # 2. 创建句柄 (自动选择索引 0)
-        stDeviceList = cast(deviceList.pDeviceInfo[0], POINTER(MV_CC_DEVICE_INFO)).contents
+    def _open_device(self):
+        """
+        创建句柄、打开设备、下发参数并开始取流。首次连接和掉线重连共用；
+        重连时复用已缓存的设备信息、包大小、触发设置和缓冲池，不重新枚举和探测。
+        """
+        stDeviceList = self.stDevInfo
+
+        # 2. 创建句柄
         ret = self.cam.MV_CC_CreateHandle(stDeviceList)
         if ret != 0:
             print(f"创建句柄失败! ret[0x{ret:x}]")
-            return
+            return False
 
         # 3. 打开设备
         ret = self.cam.MV_CC_OpenDevice(MV_ACCESS_Exclusive, 0)
         if ret != 0:
             print(f"打开设备失败! ret[0x{ret:x}]")
-            return
+            self.cam.MV_CC_DestroyHandle()
+            return False
         
-        # 4. (GigE相机) 网络包大小探测
+        # 4. (GigE相机) 网络包大小探测 (探测较慢，只在第一次连接时进行)，
+        #    再按 camera.transport 下发包间隔、丢包重传和 GVCP 超时/重试
         if stDeviceList.nTLayerType == MV_GIGE_DEVICE:
-            nPacketSize = self.cam.MV_CC_GetOptimalPacketSize()
-            if int(nPacketSize) > 0:
-                self.cam.MV_CC_SetIntValue("GevSCPSPacketSize", nPacketSize)
+            transport = resolve_transport(self.cam_cfg.get('transport'))
+            if self.nPacketSize <= 0 and transport.get('packet_size') in (None, 'auto'):
+                self.nPacketSize = int(self.cam.MV_CC_GetOptimalPacketSize())
+            self.transport = apply_transport(self.cam, transport, self.nPacketSize)
+
+        # 5. 触发模式：默认关闭 (连续采集)；配置为 software / line 时只在触发后曝光
+        #    重连时沿用运行中通过 set_trigger_mode() 设置的值
+        if self._trigger_args is None:
+            mode, trig = trigger_mode_of(self.cam_cfg)
+            self._trigger_args = (mode, trig.get('source'), trig.get('activation'))
+        self.set_trigger_mode(*self._trigger_args)
+
+        # 5.1 像素格式：keep (默认) 保持相机当前格式；auto / bayer 时设备支持则切换到 Bayer8 (GigE 带宽仅为 RGB8 的 1/3)，
+        #     颜色处理随之从相机 ISP (白平衡、色彩矩阵、gamma) 移到主机去马赛克，关闭时恢复原格式
+        pixel_format = self.cam_cfg.get('pixel_format', 'keep')
+        if pixel_format in ('auto', 'bayer'):
+            self._select_bayer_output(bForce=pixel_format == 'bayer')
+        elif pixel_format != 'keep':
+            print(f"未知的 pixel_format: {pixel_format} (可选 auto / bayer / keep)，保持相机当前格式")
 
-        # 5. 关闭触发模式 (设置为连续采集)
-        self.cam.MV_CC_SetEnumValue("TriggerMode", MV_TRIGGER_MODE_OFF)
+        # 5.2 传感器 ROI：只传输固定区域，带宽、缓冲和处理量一起减少
+        self._apply_roi()
 
-        # 6. 获取 PayloadSize
+        # 6. 获取 PayloadSize (与之前相同时继续使用原缓冲池)
         stParam = MVCC_INTVALUE()
         memset(byref(stParam), 0, sizeof(MVCC_INTVALUE))
         ret = self.cam.MV_CC_GetIntValue("PayloadSize", stParam)
         if ret != 0:
             print(f"获取 PayloadSize 失败! ret[0x{ret:x}]")
+            self._release_handle()
+            return False
+        if self.pool is None or stParam.nCurValue != self.nPayloadSize:
+            self.nPayloadSize = stParam.nCurValue
+            self.pool = FramePool(self.nPayloadSize, max(self.nPoolSize, self.pool.size if self.pool else 0),
+                                  self.alloc_counter)
+
+        # 6.1 SDK 缓存节点数与取流策略 (节点数必须在开始取流前设置)
+        self._configure_buffering()
+
+        # 6.2 掉线通知
+        if self.auto_reconnect:
+            self._exception_cb = ExceptionCallBack(self._on_exception)
+            ret = self.cam.MV_CC_RegisterExceptionCallBack(self._exception_cb, None)
+            if ret != 0:
+                print(f"注册异常回调失败! ret[0x{ret:x}]，仅靠取图失败检测掉线")
+
+        # 7. 开始取流 (回调取流模式下连同回调一起重新注册)
+        if self._stream_running and self._stream_mode == STREAM_MODE_CALLBACK:
+            if not self._register_frame_callback():
+                self._release_handle()
+                return False
+        else:
+            ret = self.cam.MV_CC_StartGrabbing()
+            if ret != 0:
+                print(f"开始取流失败! ret[0x{ret:x}]")
+                self._release_handle()
+                return False
+        self._nConsecutiveFails = 0
+        return True
+
+    def _release_handle(self):
+        """尽力释放句柄，设备已掉线时各步骤的错误可以忽略"""
+        self.cam.MV_CC_StopGrabbing()
+        self.cam.MV_CC_CloseDevice()
+        self.cam.MV_CC_DestroyHandle()
+
+    # --- 掉线重连 ---
+    def _on_exception(self, nMsgType, pUser):
+        """SDK 线程中执行：只发起后台重连，不在回调里做耗时操作"""
+        if nMsgType == MV_EXCEPTION_DEV_DISCONNECT:
+            self._start_reconnect("设备断开连接")
+
+    def _on_grab_failed(self, ret):
+        self._nConsecutiveFails += 1
+        if self._nConsecutiveFails >= RECONNECT_CHECK_FAILS and self.is_open:
+            self._nConsecutiveFails = 0
+            if not self.cam.MV_CC_IsDeviceConnected():
+                self._start_reconnect("取图失败且设备已离线")
+
+    def _start_reconnect(self, reason):
+        if not self.auto_reconnect or self._closing.is_set():
             return
-        self.nPayloadSize = stParam.nCurValue
+        with self._reconnect_lock:
+            if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+                return
+            self.is_open = False
+            self.nDisconnects += 1
+            print(f"相机掉线 ({reason})，开始后台重连...")
+            self._reconnect_thread = threading.Thread(
+                target=self._reconnect_loop, args=(time.perf_counter(),), daemon=True)
+            self._reconnect_thread.start()
+
+    def _reconnect_loop(self, t0):
+        with self._grab_lock:   # 等待进行中的取图调用返回
+            self._release_handle()
+        while not self._closing.is_set():
+            with self._grab_lock:
+                ok = self._open_device()
+            if ok:
+                self.is_open = True
+                self.nReconnects += 1
+                self.reconnect_time.add(time.perf_counter() - t0)
+                print(f"相机重连成功，耗时 {(time.perf_counter() - t0) * 1000:.0f} ms")
+                return
+            self._closing.wait(self.fReconnectInterval)
+
+    @property
+    def is_reconnecting(self):
+        return self._reconnect_thread is not None and self._reconnect_thread.is_alive()
 
-        # 7. 开始取流
-        ret = self.cam.MV_CC_StartGrabbing()
+    def _configure_buffering(self):
+        """
+        camera.buffering 配置项：
+            image_nodes: SDK 内部缓存节点数 (默认不设置，SDK 默认值)
+            grab_strategy: one_by_one / latest_only / latest / upcoming
+            output_queue: latest 策略下输出的帧数 (1 ~ image_nodes)
+        """
+        buf_cfg = self.cam_cfg.get('buffering') or {}
+        applied = {}
+
+        nNodes = buf_cfg.get('image_nodes')
+        if nNodes:
+            ret = self.cam.MV_CC_SetImageNodeNum(int(nNodes))
+            if ret != 0:
+                print(f"设置缓存节点数失败! ret[0x{ret:x}]")
+            else:
+                applied['image_nodes'] = int(nNodes)
+
+        strategy = buf_cfg.get('grab_strategy')
+        if strategy:
+            if strategy not in GRAB_STRATEGIES:
+                print(f"未知的取流策略: {strategy}，可选 {list(GRAB_STRATEGIES)}")
+            else:
+                ret = self.cam.MV_CC_SetGrabStrategy(GRAB_STRATEGIES[strategy])
+                if ret != 0:
+                    print(f"设置取流策略失败! ret[0x{ret:x}]")
+                else:
+                    applied['grab_strategy'] = strategy
+
+        nQueue = buf_cfg.get('output_queue')
+        if nQueue and applied.get('grab_strategy') == 'latest':
+            ret = self.cam.MV_CC_SetOutputQueueSize(int(nQueue))
+            if ret != 0:
+                print(f"设置输出缓存个数失败! ret[0x{ret:x}]")
+            else:
+                applied['output_queue'] = int(nQueue)
+        elif nQueue:
+            print("output_queue 仅在 grab_strategy 为 latest 时有效，已忽略")
+
+        self.buffering = applied
+
+    def _get_int(self, strKey):
+        """读取整型节点 (nCurValue / nMin / nMax / nInc)；MV_CC_GetIntValueEx 的 Python 封装未编码 strKey，不能使用"""
+        stValue = MVCC_INTVALUE()
+        memset(byref(stValue), 0, sizeof(MVCC_INTVALUE))
+        ret = self.cam.MV_CC_GetIntValue(strKey, stValue)
         if ret != 0:
-            print(f"开始取流失败! ret[0x{ret:x}]")
-            return
+            print(f"读取 {strKey} 失败! ret[0x{ret:x}]")
+            return None
+        return stValue
 
-        self.is_open = True
-        print("相机初始化成功，正在连续取流中...")
+    def _reset_roi(self):
+        """恢复整幅：先清零偏移，Width/Height 的上限才是整幅传感器，再把宽高设为上限"""
+        for strKey in ("OffsetX", "OffsetY"):
+            ret = self.cam.MV_CC_SetIntValueEx(strKey, 0)
+            if ret != 0:
+                print(f"设置 {strKey}=0 失败! ret[0x{ret:x}]")
+                return False
+        for strKey in ("Width", "Height"):
+            stSize = self._get_int(strKey)
+            if stSize is None:
+                return False
+            nMax = _align_down(stSize.nMax, stSize)
+            if stSize.nCurValue != nMax:
+                ret = self.cam.MV_CC_SetIntValueEx(strKey, nMax)
+                if ret != 0:
+                    print(f"设置 {strKey}={nMax} 失败! ret[0x{ret:x}]")
+                    return False
+        return True
 
-    # --- 图像转换辅助函数 (修复了参数 self 问题) ---
-    def Mono_numpy(self, data, nWidth, nHeight):
-        data_ = np.frombuffer(data, count=int(nWidth * nHeight), dtype=np.uint8, offset=0)
-        data_mono_arr = data_.reshape(nHeight, nWidth)
-        numArray = np.zeros([nHeight, nWidth, 1], "uint8")
-        numArray[:, :, 0] = data_mono_arr
-        return numArray
-
-    def Color_numpy(self, data, nWidth, nHeight):
-        data_ = np.frombuffer(data, count=int(nWidth * nHeight * 3), dtype=np.uint8, offset=0)
-        data_r = data_[0:nWidth * nHeight * 3:3]
-        data_g = data_[1:nWidth * nHeight * 3:3]
-        data_b = data_[2:nWidth * nHeight * 3:3]
-        
-        data_r_arr = data_r.reshape(nHeight, nWidth)
-        data_g_arr = data_g.reshape(nHeight, nWidth)
-        data_b_arr = data_b.reshape(nHeight, nWidth)
-        
-        numArray = np.zeros([nHeight, nWidth, 3], "uint8")
-        numArray[:, :, 2] = data_r_arr
-        numArray[:, :, 1] = data_g_arr
-        numArray[:, :, 0] = data_b_arr
-        return numArray
+    def _apply_roi(self):
+        """
+        camera.roi: {x, y, width, height}，整幅传感器坐标；省略 width/height 时延伸到传感器右/下边缘。
+        按设备的最小值/步进对齐：偏移向下对齐，宽高向上补齐，保证对齐后仍覆盖配置的区域。
+        不论是否配置 roi，都先把设备恢复为整幅，不沿用上次运行或 MVS 留在相机上的 ROI。
+        必须在开始取流前调用，之后重新读取 PayloadSize。
+        """
+        roi_cfg = self.cam_cfg.get('roi')
+        self.roi = None
+        self.roi_offset = (0, 0)
+        if not self._reset_roi() or not roi_cfg:
+            return False
+
+        applied = {}
+        for sizeKey, offsetKey, nOffset, nSize in (("Width", "OffsetX", roi_cfg.get('x', 0), roi_cfg.get('width')),
+                                                  ("Height", "OffsetY", roi_cfg.get('y', 0), roi_cfg.get('height'))):
+            stOffset = self._get_int(offsetKey)
+            stSize = self._get_int(sizeKey)
+            if stOffset is None or stSize is None:
+                return False
+            # 此时尺寸仍是整幅，偏移上限为 0，只按步进对齐
+            nOffsetAligned = _align_step(int(nOffset), stOffset) if nOffset else 0
+            if nSize:
+                # 偏移向下对齐多出的部分补到尺寸上
+                nSizeAligned = _align_up(int(nSize) + int(nOffset) - nOffsetAligned, stSize)
+            else:
+                # 未配置尺寸：从偏移处到传感器边缘
+                nSizeAligned = _align_down(stSize.nMax - nOffsetAligned, stSize)
+            ret = self.cam.MV_CC_SetIntValueEx(sizeKey, nSizeAligned)
+            if ret != 0:
+                print(f"设置 {sizeKey}={nSizeAligned} 失败! ret[0x{ret:x}]")
+                return False
+            # 尺寸确定后偏移的上限才确定，重新读取
+            stOffset = self._get_int(offsetKey)
+            if stOffset is None:
+                return False
+            nOffsetAligned = min(nOffsetAligned, _align_down(stOffset.nMax, stOffset))
+            ret = self.cam.MV_CC_SetIntValueEx(offsetKey, nOffsetAligned)
+            if ret != 0:
+                print(f"设置 {offsetKey}={nOffsetAligned} 失败! ret[0x{ret:x}]")
+                return False
+            applied[offsetKey] = nOffsetAligned
+            applied[sizeKey] = nSizeAligned
 
+        self.roi = applied
+        self.roi_offset = (applied["OffsetX"], applied["OffsetY"])
+        print(f"ROI: x={applied['OffsetX']} y={applied['OffsetY']} {applied['Width']}x{applied['Height']}")
+        return True
+
+    def set_trigger_mode(self, mode, source=None, activation=None):
+        """
+        mode: off 连续采集 / software 软触发 / line 硬触发
+        source: 硬触发的输入线，如 "Line0" (默认)；activation: RisingEdge / FallingEdge 等
+        """
+        if mode == TRIGGER_OFF:
+            ret = self.cam.MV_CC_SetEnumValue("TriggerMode", MV_TRIGGER_MODE_OFF)
+        else:
+            ret = self.cam.MV_CC_SetEnumValue("TriggerMode", MV_TRIGGER_MODE_ON)
+            if ret == 0 and mode == TRIGGER_SOFTWARE:
+                ret = self.cam.MV_CC_SetEnumValue("TriggerSource", MV_TRIGGER_SOURCE_SOFTWARE)
+            elif ret == 0:
+                ret = self.cam.MV_CC_SetEnumValueByString("TriggerSource", source or "Line0")
+                if ret == 0 and activation:
+                    ret = self.cam.MV_CC_SetEnumValueByString("TriggerActivation", activation)
+        if ret != 0:
+            print(f"设置触发模式 {mode} 失败! ret[0x{ret:x}]")
+            return False
+        self.trigger_mode = mode
+        self._trigger_args = (mode, source, activation)
+        return True
+
+    def _send_trigger(self):
+        return self.cam.MV_CC_SetCommandValue("TriggerSoftware")
+
+    def _flush_stale(self):
+        # 清掉 SDK 缓存中触发前的旧帧，保证拿到的是本次触发曝光的图像
+        self.cam.MV_CC_ClearImageBuffer()
+
+    def _select_bayer_output(self, bForce=True):
+        """
+        在设备支持的像素格式中选择 Bayer8，必须在开始取流前调用。
+        bForce=False (auto)：只在支持列表中有 Bayer8 时切换，黑白相机或读不到列表时静默保持当前格式。
+        """
+        stEnum = MVCC_ENUMVALUE()
+        memset(byref(stEnum), 0, sizeof(MVCC_ENUMVALUE))
+        ret = self.cam.MV_CC_GetEnumValue("PixelFormat", stEnum)
+        if ret == 0:
+            if stEnum.nCurValue in BAYER8:
+                return True
+            supported = [stEnum.nSupportValue[i] for i in range(stEnum.nSupportedNum)]
+            candidates = [pt for pt in BAYER8 if pt in supported]
+        elif bForce:
+            candidates = list(BAYER8)  # 读不到支持列表时逐个尝试
+        else:
+            return False
+        if not candidates and not bForce:
+            return False
+
+        for enPixelType in candidates:
+            if self.cam.MV_CC_SetEnumValue("PixelFormat", enPixelType) == 0:
+                if ret == 0 and self._original_pixel_format is None:
+                    self._original_pixel_format = stEnum.nCurValue
+                print(f"已切换为 Bayer 输出 (PixelFormat=0x{enPixelType:x})，去马赛克: {self.converter.bayer_converter.quality}")
+                return True
+        print("设备不支持 Bayer8 输出，保持当前像素格式")
+        return False
+
+    # --- 图像转换辅助函数 ---
     def Is_mono_data(self, enGvspPixelType):
         return enGvspPixelType in [
             PixelType_Gvsp_Mono8, PixelType_Gvsp_Mono10, PixelType_Gvsp_Mono10_Packed,
@@ -131,81 +561,247 @@ class Camera:
         return not self.Is_mono_data(enGvspPixelType)
 
     # --- 核心取图方法 ---
-    def getCameraData(self):
+    def _grab_once(self, nTimeout):
+        """取一帧到池中，返回 (lease, ret)；缓冲池耗尽时 ret 为 None"""
+        lease = self.pool.acquire()
+        if lease is None:
+            return None, None
+
+        with self._grab_lock:
+            if not self.is_open:
+                # 等锁期间相机掉线，句柄已被重连线程释放
+                lease.release()
+                return None, 0
+            stFrameInfo = self.stFrameInfo
+            ret = self.cam.MV_CC_GetOneFrameTimeout(byref(lease.raw_buffer), self.nPayloadSize, stFrameInfo, nTimeout)
+            if ret != 0:
+                lease.release()
+                return None, ret
+
+            self._fill_lease(lease, stFrameInfo)
+
+        if lease.image is None:
+            lease.release()
+            return None, 0
+        return lease, 0
+
+    def _fill_lease(self, lease, stFrameInfo):
+        self._fill_info(lease, stFrameInfo)
+        lease.image, lease.scale = self._convert_lease(stFrameInfo, lease)
+
+    def _fill_info(self, lease, stFrameInfo):
+        lease.frame_id = stFrameInfo.nFrameNum
+        lease.timestamp = time.time()
+        if stFrameInfo.nHostTimeStamp > 0:
+            # nHostTimeStamp 为帧到达主机的时间 (毫秒)，与当前时间之差即在 SDK 缓存中等待的时长
+            fAge = lease.timestamp - stFrameInfo.nHostTimeStamp / 1000.0
+            if 0 <= fAge < 60:
+                self.frame_age.add(fAge)
+        lease.width = stFrameInfo.nWidth
+        lease.height = stFrameInfo.nHeight
+        lease.pixel_type = stFrameInfo.enPixelType
+        lease.frame_len = stFrameInfo.nFrameLen
+        fill_frame_info(lease.info, stFrameInfo, lease.timestamp)
+        self._nConsecutiveFails = 0
+        self.nLostPackets += stFrameInfo.nLostPacket
+        lease.offset = self.roi_offset
+
+    def _convert_lease(self, stFrameInfo, lease):
+        image = self._convert_into(lease, stFrameInfo)
+        return image, self._update_scale(image, stFrameInfo.nWidth)
+
+    # --- 回调取流 ---
+    def _register_frame_callback(self):
+        """回调必须在停止取流的状态下注册"""
+        self.cam.MV_CC_StopGrabbing()
+        self._frame_cb = FrameInfoCallBack(self._on_frame_callback)
+        ret = self.cam.MV_CC_RegisterImageCallBackEx(self._frame_cb, None)
+        if ret != 0:
+            print(f"注册取图回调失败! ret[0x{ret:x}]")
+            self._frame_cb = None
+        ret_start = self.cam.MV_CC_StartGrabbing()
+        if ret_start != 0:
+            print(f"开始取流失败! ret[0x{ret_start:x}]")
+            self.is_open = False
+            return False
+        return self._frame_cb is not None
+
+    def _unregister_frame_callback(self):
+        """注销回调 (传入空回调) 后恢复为主动取图模式"""
+        self.cam.MV_CC_StopGrabbing()
+        self.cam.MV_CC_RegisterImageCallBackEx(FrameInfoCallBack(), None)
+        self._frame_cb = None
+        self.cam.MV_CC_StartGrabbing()
+
+    def _on_frame_callback(self, pData, pFrameInfo, pUser):
         """
-        获取一帧图像。
-        注意：现在这个函数非常快，因为它不需要重新连接相机。
+        SDK 取流线程中执行：只把原始数据和帧信息拷入池中 (一次 memmove，约 nFrameLen 字节) 就发布，
+        像素格式转换 (Bayer 去马赛克等) 推迟到消费者第一次访问 lease.image 时在消费者线程中进行，
+        不再占用 SDK 回调线程。不同的帧可能在不同线程中同时转换，转换器的中间缓冲按线程分开。
+        转换失败时 image 为 None，由消费者处理。
+        注意 add_sink() 注册的消费者在本线程中调用，若访问 image，转换仍发生在回调线程上。
+        """
+        if not self._stream_running:
+            return
+        lease = self.pool.acquire()
+        if lease is None:
+            self.nCallbackDropped += 1
+            return
+        stFrameInfo = pFrameInfo.contents
+        nLen = min(stFrameInfo.nFrameLen, self.nPayloadSize)
+        memmove(lease.raw_buffer, pData, nLen)
+        self._fill_info(lease, stFrameInfo)
+        # pFrameInfo 只在回调期间有效，转换要用的帧信息另存一份
+        lease.defer(partial(self._convert_lease, MV_FRAME_OUT_INFO_EX.from_buffer_copy(stFrameInfo)))
+        self._publish(lease)
+
+    # --- 零拷贝取图 ---
+    def grab_zero_copy(self, nTimeout=1000):
+        """
+        直接借用 SDK 内部缓存取一帧 (MV_CC_GetImageBuffer)，返回 SdkFrame。
+        Mono8/BGR8 格式下 image 就是 SDK 内存本身，全程零拷贝；用完须尽快释放：
+            with camera.grab_zero_copy() as frame:
+                run_detection_once(frame.image, cfg)
+        不能与 start_stream() 同时使用。失败返回 None。
         """
         if not self.is_open:
             print("错误：相机未连接，无法获取图像")
             return None
+        if self._stream_running:
+            print("错误：后台取流运行中，无法使用零拷贝取图")
+            return None
 
-        pData = (c_ubyte * self.nPayloadSize)()
-        stFrameInfo = MV_FRAME_OUT_INFO_EX()
-        memset(byref(stFrameInfo), 0, sizeof(stFrameInfo))
-        
-        # 超时时间设为 1000ms
-        ret = self.cam.MV_CC_GetOneFrameTimeout(byref(pData), self.nPayloadSize, stFrameInfo, 1000)
-        
-        if ret == 0:
-            # 取图成功，转换格式
-            #print(f"Get One Frame: Width[{stFrameInfo.nWidth}], Height[{stFrameInfo.nHeight}], Type[0x{stFrameInfo.enPixelType:x}]")
-            return self._convert_image(pData, stFrameInfo)
-        else:
+        stOutFrame = MV_FRAME_OUT()
+        memset(byref(stOutFrame), 0, sizeof(stOutFrame))
+        with self._grab_lock:
+            if not self.is_open:
+                # 等锁期间相机掉线，句柄已被重连线程释放
+                print("错误：相机未连接，无法获取图像")
+                return None
+            ret = self.cam.MV_CC_GetImageBuffer(stOutFrame, nTimeout)
+        if ret != 0 or not stOutFrame.pBufAddr:
+            if ret:
+                self._on_grab_failed(ret)
             print(f"获取图像超时或失败! ret[0x{ret:x}]")
             return None
+        self._nConsecutiveFails = 0
 
-    def _convert_image(self, pData, stFrameInfo):
-        """内部转换逻辑，修复了内存拷贝和 self 参数传递 BUG"""
-        
-        # 1. 如果是 Mono8，直接转换
-        if PixelType_Gvsp_Mono8 == stFrameInfo.enPixelType:
-            return self.Mono_numpy(pData, stFrameInfo.nWidth, stFrameInfo.nHeight)
-        
-        # 2. 如果是 RGB8 Packed，直接转换
-        elif PixelType_Gvsp_RGB8_Packed == stFrameInfo.enPixelType:
-            return self.Color_numpy(pData, stFrameInfo.nWidth, stFrameInfo.nHeight)
+        frame = SdkFrame(self, stOutFrame)
+        if frame.image is None:
+            frame.release()
+            return None
+        return frame
+
+    def _zero_copy_output(self, shape, dtype):
+        if self._zc_out is None or self._zc_out.shape != tuple(shape) or self._zc_out.dtype != dtype:
+            self._zc_out = np.empty(shape, dtype=dtype)
+            self.alloc_counter.add(self._zc_out.nbytes)
+        return self._zc_out
+
+    def _convert_into(self, lease, stFrameInfo):
+        """
+        把原始数据转换为图像，结果写入 lease.output() 提供的复用缓冲 (不新分配)。
+        lease 可以是缓冲池的 FrameLease，也可以是零拷贝的 SdkFrame。
+        """
+        nWidth = stFrameInfo.nWidth
+        nHeight = stFrameInfo.nHeight
 
-        # 3. 其他格式 (需要 SDK 内部 ConvertPixelType)
-        nConvertSize = stFrameInfo.nWidth * stFrameInfo.nHeight * 3
-        if self.buf_cache is None: # 避免每次都分配内存
-            self.buf_cache = (c_ubyte * nConvertSize)()
+        # 1. 分发表能处理的格式：视图或一次转换写入复用缓冲
+        if self.converter.supports(stFrameInfo.enPixelType):
+            return self.converter.convert(lease.data, nWidth, nHeight, stFrameInfo.enPixelType, lease.output)
 
+        # 2. 其他格式 (SDK 内部 ConvertPixelType)，直接输出到复用缓冲
         stConvertParam = MV_CC_PIXEL_CONVERT_PARAM()
         memset(byref(stConvertParam), 0, sizeof(stConvertParam))
-        stConvertParam.nWidth = stFrameInfo.nWidth
-        stConvertParam.nHeight = stFrameInfo.nHeight
-        stConvertParam.pSrcData = pData
+        stConvertParam.nWidth = nWidth
+        stConvertParam.nHeight = nHeight
+        stConvertParam.pSrcData = lease.raw_buffer
         stConvertParam.nSrcDataLen = stFrameInfo.nFrameLen
         stConvertParam.enSrcPixelType = stFrameInfo.enPixelType
-        
-        # 判断目标格式
+
         if self.Is_mono_data(stFrameInfo.enPixelType):
+            dst = lease.output((nHeight, nWidth, 1))
             stConvertParam.enDstPixelType = PixelType_Gvsp_Mono8
-            stConvertParam.pDstBuffer = self.buf_cache
-            stConvertParam.nDstBufferSize = nConvertSize # Mono 其实不需要这么大，但用这个安全
-            self.cam.MV_CC_ConvertPixelType(stConvertParam)
-            return self.Mono_numpy(self.buf_cache, stFrameInfo.nWidth, stFrameInfo.nHeight)
         else:
-            # 默认转为 RGB8
-            stConvertParam.enDstPixelType = PixelType_Gvsp_RGB8_Packed
-            stConvertParam.pDstBuffer = self.buf_cache
-            stConvertParam.nDstBufferSize = nConvertSize
-            ret = self.cam.MV_CC_ConvertPixelType(stConvertParam)
-            if ret != 0:
-                print("像素格式转换失败！")
-                return None
-            return self.Color_numpy(self.buf_cache, stFrameInfo.nWidth, stFrameInfo.nHeight)
+            # SDK 直接输出 BGR8，省去 RGB -> BGR 的再次拷贝
+            dst = lease.output((nHeight, nWidth, 3))
+            stConvertParam.enDstPixelType = PixelType_Gvsp_BGR8_Packed
+        stConvertParam.pDstBuffer = dst.ctypes.data_as(POINTER(c_ubyte))
+        stConvertParam.nDstBufferSize = dst.nbytes
+        ret = self.cam.MV_CC_ConvertPixelType(stConvertParam)
+        if ret != 0:
+            print("像素格式转换失败！")
+            return None
+        return dst
+
+    def get_net_trans_info(self):
+        """GigE 传输计数 (MV_GIGE_GetNetTransInfo，StartGrabbing 起累计)，非 GigE 或读取失败返回 None"""
+        if not self.is_open or self.stDevInfo is None or self.stDevInfo.nTLayerType != MV_GIGE_DEVICE:
+            return None
+        stInfo = MV_NETTRANS_INFO()
+        memset(byref(stInfo), 0, sizeof(MV_NETTRANS_INFO))
+        if self.cam.MV_GIGE_GetNetTransInfo(stInfo) != 0:
+            return None
+        return {
+            "receive_bytes": stInfo.nReceiveDataSize,
+            "throw_frames": stInfo.nThrowFrameCount,
+            "recv_frames": stInfo.nNetRecvFrameCount,
+            "resend_requested": stInfo.nRequestResendPacketCount,
+            "resend_packets": stInfo.nResendPacketCount,
+        }
+
+    def get_stats(self):
+        """在公共统计之外，附上 SDK 缓存配置、帧排队延迟和驱动层丢帧/丢包计数"""
+        stats = super().get_stats()
+        stats["buffering"] = dict(self.buffering)
+        stats["transport"] = dict(self.transport)
+        stats["roi"] = dict(self.roi) if self.roi else None
+        stats["frame_age_ms"] = self.frame_age.summary()
+        stats["frame_lost_packets"] = self.nLostPackets
+        stats["connected"] = self.is_open
+        stats["disconnects"] = self.nDisconnects
+        stats["reconnects"] = self.nReconnects
+        stats["reconnect_time_ms"] = self.reconnect_time.summary()
+        stats.update(self._net_detect())
+        return stats
+
+    def _net_detect(self):
+        """GigE 相机驱动层统计 (MV_CC_GetAllMatchInfo)，其他相机返回空"""
+        if not self.is_open or self.stDevInfo is None or self.stDevInfo.nTLayerType != MV_GIGE_DEVICE:
+            return {}
+        stNetInfo = MV_MATCH_INFO_NET_DETECT()
+        stInfo = MV_ALL_MATCH_INFO()
+        stInfo.nType = MV_MATCH_TYPE_NET_DETECT
+        stInfo.pInfo = cast(byref(stNetInfo), c_void_p)
+        stInfo.nInfoSize = sizeof(stNetInfo)
+        if self.cam.MV_CC_GetAllMatchInfo(stInfo) != 0:
+            return {}
+        return {
+            "sdk_lost_frames": stNetInfo.nLostFrameCount,
+            "sdk_lost_packets": stNetInfo.nLostPacketCount,
+            "sdk_resend_packets": stNetInfo.nResendPacketCount,
+            "sdk_recv_frames": stNetInfo.nNetRecvFrameCount,
+        }
 
     def CloseCamera(self):
-        """主动关闭相机资源"""
-        if self.is_open:
-            self.cam.MV_CC_StopGrabbing()
-            self.cam.MV_CC_CloseDevice()
-            self.cam.MV_CC_DestroyHandle()
-            self.is_open = False
-            print("相机已关闭")
+        # 先停止后台重连，避免关闭后又被重新打开
+        self._closing.set()
+        thread = self._reconnect_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+            self._reconnect_thread = None
+        super().CloseCamera()
+
+    def _close_device(self):
+        self._restore_pixel_format()
+        self._release_handle()
 
-    def __del__(self):
-        """对象销毁时确保关闭"""
-        self.CloseCamera()
\ No newline at end of file
+    def _restore_pixel_format(self):
+        """把 _select_bayer_output() 改过的 PixelFormat 恢复为打开前的值，MVS 等工具看到的仍是原设置"""
+        if self._original_pixel_format is None:
+            return
+        self.cam.MV_CC_StopGrabbing()   # 取流中不能修改 PixelFormat
+        ret = self.cam.MV_CC_SetEnumValue("PixelFormat", self._original_pixel_format)
+        if ret != 0:
+            print(f"恢复 PixelFormat=0x{self._original_pixel_format:x} 失败! ret[0x{ret:x}]")
+        self._original_pixel_format = None
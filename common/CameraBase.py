@@ -0,0 +1,364 @@
+# -- coding: utf-8 --
+
+import threading
+import time
+
+from .FrameBuffer import AllocCounter, FrameQueue, FramePool, LatencyStats, RateCounter, OVERFLOW_DROP_OLDEST
+
+# 取流模式
+STREAM_MODE_THREAD = "thread"       # 后台线程轮询取图
+STREAM_MODE_CALLBACK = "callback"   # 由驱动回调推送 (仅海康 SDK 后端支持)
+
+# 触发模式
+TRIGGER_OFF = "off"                 # 连续采集 (自由运行)
+TRIGGER_SOFTWARE = "software"       # 软触发：capture_triggered() 发出 TriggerSoftware 命令后才曝光
+TRIGGER_LINE = "line"               # 硬触发：由 I/O 线 (Line0 等) 上的外部信号触发曝光
+
+
+def trigger_mode_of(cam_cfg):
+    """从 camera 配置中读取触发模式；YAML 中裸写的 off 会被解析成 False，这里一并处理"""
+    trig = (cam_cfg or {}).get('trigger') or {}
+    if not isinstance(trig, dict):
+        trig = {'mode': trig}
+    mode = trig.get('mode') or TRIGGER_OFF
+    if mode not in (TRIGGER_OFF, TRIGGER_SOFTWARE, TRIGGER_LINE):
+        print(f"未知的触发模式: {mode}，使用连续采集")
+        mode = TRIGGER_OFF
+    return mode, trig
+
+
+class CameraBase:
+    """
+    相机后端的公共部分：缓冲池、后台取流、最新帧/帧队列、统计。
+    不依赖海康 SDK；子类实现 _grab_once() 和 _close_device()，
+    需要回调取流的后端再实现 _register_frame_callback() / _unregister_frame_callback()。
+    """
+
+    def __init__(self, cam_cfg=None, nPoolSize=4):
+        self.cam_cfg = cam_cfg or {}
+        self.is_open = False  # 标记相机是否正常打开
+        self.nPoolSize = max(2, nPoolSize)
+        self.pool = None      # 取图缓冲池，由子类在得知单帧大小后创建
+        self.alloc_counter = AllocCounter()
+        self.image_scale = 1.0  # 最近一帧图像相对传感器分辨率的缩放 (binning 时为 0.5)
+        self.roi = None         # 实际生效的 ROI {OffsetX, OffsetY, Width, Height}，未设置为 None
+        self.roi_offset = (0, 0)  # 图像左上角在整幅传感器上的坐标，检测结果据此换算回全幅坐标
+        self._grab_lock = threading.Lock()
+
+        # 后台连续取流 (start_stream)
+        self._stream_thread = None
+        self._stream_running = False
+        self._stream_mode = None
+        self.queue = None                 # 可选的有界帧队列 (pop_frame)
+        self.nCallbackDropped = 0         # 回调中因缓冲池耗尽丢弃的帧数
+        self._latest = None               # 最新一帧的租约，由取流线程维护
+        self._frame_cond = threading.Condition()
+        self.fps_counter = RateCounter()
+        self.nGrabFailed = 0
+        self.nLostFrames = 0              # 按帧号间隔推算的丢帧数
+        self._last_frame_id = None
+        self._sinks = []                  # 取流中每一帧都会交给的消费者 (录制等)，见 add_sink()
+
+        # 触发采集 (capture_triggered)
+        self.trigger_mode = TRIGGER_OFF
+        self.trigger_latency = LatencyStats()   # 发出触发到拿到图像的耗时
+        self.nTriggerTimeouts = 0
+
+    # --- 子类实现 ---
+    def _grab_once(self, nTimeout):
+        """取一帧到池中，返回 (lease, ret)；缓冲池耗尽时 ret 为 None"""
+        raise NotImplementedError
+
+    def _close_device(self):
+        pass
+
+    def _register_frame_callback(self):
+        print(f"错误：{type(self).__name__} 不支持回调取流")
+        return False
+
+    def _unregister_frame_callback(self):
+        pass
+
+    def set_trigger_mode(self, mode, source=None, activation=None):
+        """mode: off / software / line；source、activation 为硬触发的输入线和触发沿，没有 I/O 线的相机忽略"""
+        self.trigger_mode = mode
+        return True
+
+    def _send_trigger(self):
+        """发出一次软触发，返回 0 表示成功"""
+        return -1
+
+    def _flush_stale(self):
+        """丢弃触发前已缓存的旧帧"""
+        pass
+
+    def _on_grab_failed(self, ret):
+        """取图失败 (非缓冲池耗尽) 时调用，可用于掉线检测"""
+        pass
+
+    # --- 核心取图方法 ---
+    def grab_frame(self, nTimeout=1000):
+        """
+        从缓冲池取一帧，返回 FrameLease (image 为指向池内存的视图)。
+        热路径不分配内存；使用完毕必须 release()，或用 with 语句。
+        失败返回 None。
+        """
+        if not self.is_open:
+            print("错误：相机未连接，无法获取图像")
+            return None
+
+        lease, ret = self._grab_once(nTimeout)
+        if lease is None:
+            if ret:
+                self._on_grab_failed(ret)
+            if ret is None:
+                print("错误：取图缓冲池已全部被占用，请先释放已取得的帧")
+            elif ret != 0:
+                print(f"获取图像超时或失败! ret[0x{ret:x}]")
+        return lease
+
+    def _update_scale(self, image, nWidth):
+        if image is not None and nWidth > 0:
+            self.image_scale = image.shape[1] / nWidth
+        return self.image_scale
+
+    # --- 后台连续取流 ---
+    def start_stream(self, mode=STREAM_MODE_THREAD, nQueueSize=0, overflow=OVERFLOW_DROP_OLDEST):
+        """
+        启动连续取流，始终保留最新一帧。
+        之后用 get_latest() / wait_next() 取图，无需每次等待一个帧周期。
+        mode: "thread" 后台线程轮询；"callback" 由 SDK 回调推送，不占用轮询线程
+        nQueueSize: >0 时额外把每一帧放入有界队列，用 pop_frame() 按顺序消费
+        overflow: 队列满时的策略 drop_oldest / drop_newest / block
+        """
+        if not self.is_open or self._stream_running:
+            return
+        self._last_frame_id = None
+        if nQueueSize > 0:
+            self.queue = FrameQueue(nQueueSize, overflow)
+            # 队列、最新帧、正在写入的帧和消费者手里的帧都要占槽位
+            nNeed = nQueueSize + 3
+            if self.pool.size < nNeed:
+                self.pool = FramePool(self.pool.nBufSize, nNeed, self.alloc_counter)
+        else:
+            self.queue = None
+
+        self._stream_mode = mode
+        self._stream_running = True
+        if mode == STREAM_MODE_CALLBACK:
+            if not self._register_frame_callback():
+                self._stream_running = False
+                self._stream_mode = None
+        else:
+            self._stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
+            self._stream_thread.start()
+
+    def stop_stream(self):
+        if not self._stream_running:
+            return
+        self._stream_running = False
+        if self.queue is not None:
+            # 先清空队列，唤醒可能阻塞在 put() 中的生产者 (block 策略)
+            self.queue.clear()
+        if self._stream_mode == STREAM_MODE_CALLBACK:
+            self._unregister_frame_callback()
+        if self._stream_thread is not None:
+            self._stream_thread.join(timeout=2.0)
+            self._stream_thread = None
+        self._stream_mode = None
+        with self._frame_cond:
+            if self._latest is not None:
+                self._latest.release()
+                self._latest = None
+            self._frame_cond.notify_all()
+        if self.queue is not None:
+            self.queue.clear()
+
+    @property
+    def is_streaming(self):
+        return self._stream_running
+
+    def _stream_loop(self):
+        while self._stream_running:
+            if not self.is_open:
+                # 掉线重连中，等待设备恢复后继续取流
+                time.sleep(0.05)
+                continue
+            lease, ret = self._grab_once(1000)
+            if lease is None:
+                if ret is None:
+                    # 消费者占用了全部槽位，稍等其释放
+                    time.sleep(0.001)
+                    continue
+                # 触发模式下没有触发就没有帧，超时属正常，不计入失败
+                if self.trigger_mode == TRIGGER_OFF and ret != 0:
+                    self.nGrabFailed += 1
+                if ret != 0:
+                    self._on_grab_failed(ret)
+                continue
+            self._publish(lease)
+
+    def add_sink(self, sink):
+        """
+        sink(lease)：后台取流的每一帧在发布前调用一次 (取流线程或 SDK 回调线程中)。
+        必须尽快返回；需要在调用之后继续使用该帧时用 lease.share() 另持一份租约。
+        """
+        self._sinks = self._sinks + [sink]
+
+    def remove_sink(self, sink):
+        self._sinks = [s for s in self._sinks if s is not sink]
+
+    def _publish(self, lease):
+        """替换最新帧并唤醒等待者；旧帧若无人持有即回到池中"""
+        self.fps_counter.add()
+        if self._last_frame_id is not None and lease.frame_id > self._last_frame_id + 1:
+            self.nLostFrames += lease.frame_id - self._last_frame_id - 1
+        self._last_frame_id = lease.frame_id
+        for sink in self._sinks:
+            try:
+                sink(lease)
+            except Exception as e:
+                print(f"帧消费者异常: {e}")
+        if self.queue is not None:
+            self.queue.put(lease.share())
+        with self._frame_cond:
+            old = self._latest
+            self._latest = lease
+            self._frame_cond.notify_all()
+        if old is not None:
+            old.release()
+
+    def get_latest(self):
+        """非阻塞：返回最新一帧的租约 (需 release)，尚无帧时返回 None"""
+        with self._frame_cond:
+            if self._latest is None:
+                return None
+            return self._latest.share()
+
+    def pop_frame(self, timeout=1.0):
+        """按到达顺序取出队列中的一帧 (需 release)；需以 nQueueSize>0 启动取流"""
+        if self.queue is None:
+            print("错误：未启用帧队列，请以 nQueueSize>0 调用 start_stream()")
+            return None
+        return self.queue.get(timeout)
+
+    def wait_next(self, after_frame_id=-1, timeout=1.0):
+        """
+        阻塞等待帧号大于 after_frame_id 的新帧，返回租约 (需 release)。
+        未启动取流时退化为一次同步取图；超时返回 None。
+        """
+        if not self._stream_running:
+            return self.grab_frame(int(timeout * 1000))
+        deadline = time.perf_counter() + timeout
+        with self._frame_cond:
+            while self._latest is None or self._latest.frame_id <= after_frame_id:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._stream_running:
+                    return None
+                self._frame_cond.wait(remaining)
+            return self._latest.share()
+
+    # --- 触发采集 ---
+    def capture_triggered(self, nTimeout=1000):
+        """
+        触发一次并等待这次触发曝光出来的帧，返回租约 (需 release)，超时返回 None。
+        软触发模式下由本函数发出 TriggerSoftware；硬触发模式下等待外部信号。
+        触发到出图的耗时记入 trigger_latency (硬触发时为调用到出图的等待时间)。
+        后台取流运行中也可调用：只会返回触发之后到达的新帧。
+        """
+        if not self.is_open:
+            print("错误：相机未连接，无法获取图像")
+            return None
+        if self.trigger_mode == TRIGGER_OFF:
+            print("错误：相机处于连续采集模式，请先 set_trigger_mode('software' / 'line')")
+            return None
+
+        after_id = -1
+        if self._stream_running:
+            with self._frame_cond:
+                if self._latest is not None:
+                    after_id = self._latest.frame_id
+        else:
+            self._flush_stale()
+
+        t0 = time.perf_counter()
+        if self.trigger_mode == TRIGGER_SOFTWARE:
+            ret = self._send_trigger()
+            if ret != 0:
+                print(f"软触发失败! ret[0x{ret:x}]")
+                return None
+
+        if self._stream_running:
+            lease = self.wait_next(after_id, nTimeout / 1000.0)
+        else:
+            lease = self.grab_frame(nTimeout)
+        if lease is None:
+            self.nTriggerTimeouts += 1
+            return None
+        self.trigger_latency.add(time.perf_counter() - t0)
+        return lease
+
+    def getCameraData(self, with_info=False):
+        """
+        获取一帧图像。
+        with_info=True 时返回 (image, FrameInfo)，FrameInfo 为帧号、时间戳、丢包数、曝光、增益等元数据的副本。
+        注意：现在这个函数非常快，因为它不需要重新连接相机。
+        返回的数组归调用者所有 (从缓冲池拷贝一份)；追求零分配请使用 grab_frame()。
+        已启动后台取流时直接返回最新一帧，不再等待曝光和传输。
+        触发模式下每次调用触发一次，返回触发后曝光的新帧。
+        """
+        if self.trigger_mode != TRIGGER_OFF:
+            lease = self.capture_triggered()
+        elif self._stream_running:
+            lease = self.get_latest() or self.wait_next(timeout=1.0)
+            if lease is None:
+                print("获取图像超时：后台取流尚无新帧")
+        else:
+            lease = self.grab_frame()
+        if lease is None:
+            return (None, None) if with_info else None
+        with lease:
+            if lease.image is None:
+                # 回调取流的帧在首次访问时转换，转换失败
+                return (None, None) if with_info else None
+            image = lease.image.copy()
+            info = lease.info.copy() if with_info else None
+        self.alloc_counter.add(image.nbytes)
+        if with_info:
+            return image, info
+        return image
+
+    def get_stats(self):
+        """取图统计：allocs_per_sec 在只使用 grab_frame() 的稳定取流中应为 0"""
+        return {
+            "allocs_per_sec": self.alloc_counter.per_second(),
+            "allocs_total": self.alloc_counter.nTotal,
+            "alloc_bytes_total": self.alloc_counter.nTotalBytes,
+            "pool_size": self.pool.size if self.pool else 0,
+            "pool_free": self.pool.free_count() if self.pool else 0,
+            "pool_exhausted": self.pool.nExhausted if self.pool else 0,
+            "streaming": self._stream_running,
+            "fps": self.fps_counter.per_second(),
+            "frames_total": self.fps_counter.nTotal,
+            "grab_failed": self.nGrabFailed,
+            "lost_frames": self.nLostFrames,
+            "stream_mode": self._stream_mode,
+            "callback_dropped": self.nCallbackDropped,
+            "queue_len": len(self.queue) if self.queue is not None else 0,
+            "queue_dropped": self.queue.nDropped if self.queue is not None else 0,
+            "trigger_mode": self.trigger_mode,
+            "trigger_latency_ms": self.trigger_latency.summary(),
+            "trigger_timeouts": self.nTriggerTimeouts,
+        }
+
+    def CloseCamera(self):
+        """主动关闭相机资源"""
+        self.stop_stream()
+        if self.is_open:
+            self._close_device()
+            self.is_open = False
+            print("相机已关闭")
+
+    def __del__(self):
+        """对象销毁时确保关闭"""
+        self.CloseCamera()
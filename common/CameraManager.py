@@ -0,0 +1,151 @@
+# -- coding: utf-8 --
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .CameraRegistry import get_backend
+
+
+class CameraManager:
+    """
+    多相机管理：一次枚举全部设备，并行打开，每台相机一个取流线程。
+    cameras_cfg: config.yaml 中的 cameras 列表，每项形如
+        {name: top, serial: "DA1234567"}  或  {name: side, user_id: "side_cam"}
+    其余键 (pixel_format / demosaic / binning ...) 覆盖公共 camera 段的同名配置。
+    列表为空时打开所有枚举到的相机，依次命名为 cam0, cam1, ...
+    """
+
+    def __init__(self, cameras_cfg=None, cam_cfg=None, nPoolSize=4):
+        self.cam_cfg = cam_cfg or {}
+        self.nPoolSize = nPoolSize
+        self.cameras = {}   # name -> Camera，保持配置顺序
+        self.missing = []   # 配置了但没有找到的相机名
+
+        # 海康 SDK 在第一次创建管理器时才加载
+        from .Camera import enum_devices
+        devices = enum_devices()
+        print(f"发现 {len(devices)} 个设备")
+        plan = self._match(devices, cameras_cfg or [])
+        if not plan:
+            return
+
+        # GigE 相机打开一次需要数秒，并行打开
+        error = None
+        with ThreadPoolExecutor(max_workers=len(plan)) as pool:
+            futures = [(name, pool.submit(self._open_one, stDevInfo, cfg))
+                       for name, stDevInfo, cfg in plan]
+            for name, future in futures:
+                try:
+                    cam = future.result()
+                except Exception as e:
+                    # 先等其余相机打开完，再统一关闭，避免已打开的句柄泄漏
+                    print(f"相机 [{name}] 打开异常: {e}")
+                    if error is None:
+                        error = e
+                    continue
+                if cam.is_open:
+                    self.cameras[name] = cam
+                    print(f"相机 [{name}] 已打开 (SN: {cam.serial})")
+                else:
+                    cam.CloseCamera()
+                    self.missing.append(name)
+                    print(f"相机 [{name}] 打开失败")
+        if error is not None:
+            self.close_all()
+            raise error
+
+    def _match(self, devices, cameras_cfg):
+        """按序列号 / 用户自定义名称把配置项对应到设备，返回 [(name, stDevInfo, cfg), ...]"""
+        from .Camera import device_serial, device_user_id
+        if not cameras_cfg:
+            return [(f"cam{i}", dev, dict(self.cam_cfg)) for i, dev in enumerate(devices)]
+
+        plan = []
+        used = set()
+        for i, entry in enumerate(cameras_cfg):
+            name = entry.get('name', f"cam{i}")
+            serial = entry.get('serial')
+            user_id = entry.get('user_id')
+            found = None
+            for k, dev in enumerate(devices):
+                if k in used:
+                    continue
+                if serial and device_serial(dev) != str(serial):
+                    continue
+                if user_id and device_user_id(dev) != str(user_id):
+                    continue
+                found = k
+                break
+            if found is None:
+                print(f"未找到相机 [{name}] (serial={serial}, user_id={user_id})")
+                self.missing.append(name)
+                continue
+            used.add(found)
+            cfg = dict(self.cam_cfg)
+            cfg.update({key: val for key, val in entry.items() if key not in ('name', 'serial', 'user_id')})
+            plan.append((name, devices[found], cfg))
+        return plan
+
+    def _open_one(self, stDevInfo, cfg):
+        return get_backend("hik")(cfg, nPoolSize=self.nPoolSize, stDevInfo=stDevInfo)
+
+    @classmethod
+    def from_config(cls, config):
+        """由完整的 config.yaml 内容创建"""
+        return cls(config.get('cameras'), config.get('camera'))
+
+    @property
+    def names(self):
+        return list(self.cameras)
+
+    def get(self, name):
+        return self.cameras.get(name)
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def __iter__(self):
+        return iter(self.cameras.items())
+
+    def start_all(self, **kwargs):
+        """每台相机启动各自的取流线程，参数同 Camera.start_stream"""
+        for cam in self.cameras.values():
+            cam.start_stream(**kwargs)
+
+    def stop_all(self):
+        for cam in self.cameras.values():
+            cam.stop_stream()
+
+    def get_latest(self, name):
+        """取某台相机的最新一帧 (需 release)"""
+        cam = self.cameras.get(name)
+        return cam.get_latest() if cam is not None else None
+
+    def get_stats(self):
+        """每台相机的统计 + 汇总的帧率 / 丢帧数"""
+        per_cam = {name: cam.get_stats() for name, cam in self.cameras.items()}
+        total = {
+            "cameras": len(self.cameras),
+            "missing": list(self.missing),
+            "fps": sum(s["fps"] for s in per_cam.values()),
+            "frames_total": sum(s["frames_total"] for s in per_cam.values()),
+            "lost_frames": sum(s["lost_frames"] for s in per_cam.values()),
+            "sdk_lost_frames": sum(s.get("sdk_lost_frames", 0) for s in per_cam.values()),
+            "dropped": sum(s["callback_dropped"] + s["queue_dropped"] + s["pool_exhausted"]
+                           for s in per_cam.values()),
+            "grab_failed": sum(s["grab_failed"] for s in per_cam.values()),
+        }
+        return {"total": total, "cameras": per_cam}
+
+    def close_all(self):
+        # 关闭同样并行，避免逐台等待 StopGrabbing
+        cams = list(self.cameras.values())
+        if cams:
+            with ThreadPoolExecutor(max_workers=len(cams)) as pool:
+                list(pool.map(lambda c: c.CloseCamera(), cams))
+        self.cameras.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
@@ -0,0 +1,121 @@
+# -- coding: utf-8 --
+"""
+相机后端注册表：按名称创建相机，后端模块在第一次使用时才导入。
+海康后端 (common.Camera) 导入时会加载 MvCameraControl.dll 和 ctypes 头文件，
+只在真正创建 hik 相机时才付出这部分开销，不使用相机的工具脚本可以随意导入本模块。
+
+    from common.CameraRegistry import create_camera
+    camera = create_camera(config['camera'])     # 按 camera.backend 选择后端
+
+导入耗时测试：python -m common.CameraRegistry
+"""
+
+import importlib
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 后端名 -> "模块:类名" (相对 common 包)，也可以直接注册类
+_BACKENDS = {
+    "hik": ".Camera:Camera",
+    "sim": ".SimCamera:SimCamera",
+}
+_lock = threading.Lock()
+
+DEFAULT_BACKEND = "hik"
+
+
+def register_backend(name, target):
+    """注册后端：target 为相机类，或 "模块:类名" 字符串 (延迟导入)"""
+    with _lock:
+        _BACKENDS[name] = target
+
+
+def available_backends():
+    return list(_BACKENDS)
+
+
+def get_backend(name):
+    """返回后端的相机类，首次调用时导入对应模块"""
+    with _lock:
+        target = _BACKENDS.get(name)
+        if target is None:
+            raise ValueError(f"未知的相机后端: {name}，可选 {list(_BACKENDS)}")
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            package = __package__ or "common"
+            module = importlib.import_module(module_name, package if module_name.startswith(".") else None)
+            target = getattr(module, class_name)
+            _BACKENDS[name] = target   # 之后直接使用类，不再查找模块
+        return target
+
+
+def create_camera(cam_cfg=None, **kwargs):
+    """按 cam_cfg['backend'] 创建相机：hik (默认，海康 SDK) 或 sim (模拟相机)"""
+    cam_cfg = cam_cfg or {}
+    return get_backend(cam_cfg.get('backend', DEFAULT_BACKEND))(cam_cfg, **kwargs)
+
+
+# --- 导入耗时测试 ---
+BENCHMARK_MODULES = [
+    "numpy",
+    "cv2",
+    "yaml",
+    "common.FrameBuffer",
+    "common.PixelConvert",
+    "common.CameraBase",
+    "common.GigETransport",
+    "common.SimCamera",
+    "common.CameraRegistry",
+    "common.Camera",
+]
+
+
+def measure_import(module, nRepeat=3):
+    """
+    在全新的解释器中导入 module，返回 (累计导入耗时 ms, 进程总耗时 ms, 错误信息)。
+    累计耗时取自 python -X importtime，包含该模块导入的所有依赖；多次取最小值。
+    """
+    root = Path(__file__).resolve().parent.parent
+    best_import = best_wall = None
+    for _ in range(nRepeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=str(root), capture_output=True, text=True)
+        wall = (time.perf_counter() - t0) * 1000
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return None, wall, lines[-1] if lines else f"returncode {proc.returncode}"
+        cumulative = None
+        for line in proc.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                cumulative = int(parts[1]) / 1000.0
+        if cumulative is not None and (best_import is None or cumulative < best_import):
+            best_import = cumulative
+        if best_wall is None or wall < best_wall:
+            best_wall = wall
+    return best_import, best_wall, None
+
+
+def benchmark_imports(modules=None, nRepeat=3):
+    """逐个模块测量导入开销，对比工具脚本 (只用注册表) 和直接导入海康后端的启动成本"""
+    results = []
+    for module in modules or BENCHMARK_MODULES:
+        results.append((module,) + measure_import(module, nRepeat))
+
+    print(f"每个模块在新进程中导入，取 {nRepeat} 次最小值")
+    print(f"{'模块':<26}{'导入 ms':>10}{'进程 ms':>10}")
+    for module, import_ms, wall_ms, error in results:
+        if error:
+            print(f"{module:<26}{'不可用':>10}{wall_ms:>10.1f}  {error}")
+        else:
+            print(f"{module:<26}{import_ms:>10.1f}{wall_ms:>10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_imports()
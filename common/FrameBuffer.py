@@ -0,0 +1,385 @@
+# -- coding: utf-8 --
+
+import threading
+import time
+from collections import deque
+from ctypes import c_ubyte
+
+import numpy as np
+
+
+class RateCounter:
+    """滑动窗口计数器：per_second() 返回最近一个窗口内的事件速率"""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.nTotal = 0
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def add(self):
+        now = time.perf_counter()
+        with self._lock:
+            self.nTotal += 1
+            self._stamps.append(now)
+            self._trim(now)
+
+    def per_second(self):
+        now = time.perf_counter()
+        with self._lock:
+            self._trim(now)
+            return len(self._stamps) / self.window
+
+    def _trim(self, now):
+        while self._stamps and now - self._stamps[0] > self.window:
+            self._stamps.popleft()
+
+
+class AllocCounter(RateCounter):
+    """
+    分配计数器：记录取图路径上的缓冲区分配次数。
+    per_second() 返回最近一个统计窗口内的分配速率，连续取图时应为 0。
+    """
+
+    def __init__(self, window=1.0):
+        super().__init__(window)
+        self.nTotalBytes = 0   # 累计分配字节数
+
+    def add(self, nBytes=0):
+        with self._lock:
+            self.nTotalBytes += int(nBytes)
+        super().add()
+
+
+class LatencyStats:
+    """最近 nWindow 次耗时 (秒) 的统计，summary() 以毫秒输出"""
+
+    def __init__(self, nWindow=100):
+        self.nTotal = 0
+        self.fLast = 0.0
+        self._values = deque(maxlen=nWindow)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.nTotal += 1
+            self.fLast = seconds
+            self._values.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            values = list(self._values)
+        if not values:
+            return {"last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0, "count": self.nTotal}
+        return {
+            "last_ms": self.fLast * 1000.0,
+            "avg_ms": sum(values) / len(values) * 1000.0,
+            "max_ms": max(values) * 1000.0,
+            "count": self.nTotal,
+        }
+
+
+class FrameInfo:
+    """
+    单帧元数据 (取自 MV_FRAME_OUT_INFO_EX)，__slots__ 定义，每个缓冲槽一份、取图时原地覆盖。
+    需要在 release 之后保留时调用 copy()。
+    dev_timestamp: 相机时钟的时间戳 (tick)；host_timestamp: 帧到达主机的时间 (毫秒)；
+    recv_time: 程序拿到该帧的时间 (time.time() 秒)。
+    """
+
+    __slots__ = ("frame_num", "dev_timestamp", "host_timestamp", "recv_time", "lost_packet",
+                 "exposure", "gain", "trigger_index", "width", "height", "pixel_type", "frame_len")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.frame_num = 0
+        self.dev_timestamp = 0
+        self.host_timestamp = 0
+        self.recv_time = 0.0
+        self.lost_packet = 0
+        self.exposure = 0.0
+        self.gain = 0.0
+        self.trigger_index = 0
+        self.width = 0
+        self.height = 0
+        self.pixel_type = 0
+        self.frame_len = 0
+
+    def copy(self):
+        other = FrameInfo()
+        for name in FrameInfo.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def age_ms(self, now=None):
+        """从帧到达主机至 now (默认当前时间) 的毫秒数，可用于计算 传感器 -> 结果 的延迟"""
+        if now is None:
+            now = time.time()
+        base = self.host_timestamp / 1000.0 if self.host_timestamp > 0 else self.recv_time
+        return (now - base) * 1000.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FrameInfo.__slots__}
+
+    def __repr__(self):
+        return (f"FrameInfo(frame_num={self.frame_num}, host_timestamp={self.host_timestamp}, "
+                f"lost_packet={self.lost_packet}, exposure={self.exposure}, gain={self.gain})")
+
+
+class _FrameSlot:
+    """池中的一个缓冲槽：SDK 写入用的 ctypes 数组 + 同一块内存上的 numpy 视图"""
+
+    def __init__(self, index, nSize):
+        self.index = index
+        self.raw = (c_ubyte * nSize)()
+        self.data = np.frombuffer(self.raw, dtype=np.uint8)  # 不拷贝，直接映射 raw
+        self.out = None  # 格式转换的目标缓冲，首次需要时分配，之后复用
+        self.info = FrameInfo()
+        self.refs = 0
+        self.pending = None  # 延迟执行的格式转换 convert(lease) -> (image, scale)，见 FrameLease.defer()
+        self.image = None    # 延迟转换的结果，同一帧的各个租约共用
+        self.scale = 1.0
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.pending = None
+        self.image = None
+        self.scale = 1.0
+
+    def materialize(self, lease):
+        """执行挂起的转换 (只执行一次)，返回 (image, scale)"""
+        with self.lock:
+            if self.pending is not None:
+                convert, self.pending = self.pending, None
+                self.image, self.scale = convert(lease)
+            return self.image, self.scale
+
+
+class FrameLease:
+    """
+    帧租约：持有期间对应的缓冲不会被下一次取图覆盖。
+    用完必须调用 release()，或使用 with 语句自动释放。
+    """
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+        self._image = None     # 转换后的图像 (numpy 视图，指向池内存)
+        self.frame_id = 0
+        self.timestamp = 0.0
+        self.width = 0
+        self.height = 0
+        self.pixel_type = 0
+        self.frame_len = 0
+        self._scale = 1.0      # image 相对传感器分辨率的缩放
+        self.offset = (0, 0)   # 图像左上角在整幅传感器上的坐标 (ROI 偏移)
+
+    def _materialize(self):
+        slot = self._slot
+        if self._image is None and slot is not None and (slot.pending is not None or slot.image is not None):
+            self._image, self._scale = slot.materialize(self)
+
+    @property
+    def image(self):
+        """转换后的图像；转换被 defer() 推迟时在第一次访问处 (消费者线程) 执行，失败为 None"""
+        self._materialize()
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+
+    @property
+    def scale(self):
+        self._materialize()
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale):
+        self._scale = scale
+
+    def defer(self, convert):
+        """
+        推迟格式转换：convert(lease) -> (image, scale) 在第一次访问 image/scale 时执行。
+        SDK 回调线程只拷贝原始数据，转换的耗时落在真正使用这一帧的线程上；没人看的帧不转换。
+        """
+        self._image = None
+        self._slot.pending = convert
+
+    @property
+    def released(self):
+        return self._slot is None
+
+    @property
+    def info(self):
+        """本帧的元数据 (FrameInfo)；release 之后为 None"""
+        return self._slot.info if self._slot is not None else None
+
+    @property
+    def raw_buffer(self):
+        """供 SDK 写入的 ctypes 缓冲"""
+        return self._slot.raw
+
+    @property
+    def data(self):
+        """原始载荷的 numpy 视图 (只包含本帧有效长度)"""
+        return self._slot.data[:self.frame_len]
+
+    def output(self, shape, dtype=np.uint8):
+        """获取本槽位的转换目标缓冲，尺寸不变时复用，不产生新分配"""
+        slot = self._slot
+        if slot.out is None or slot.out.shape != tuple(shape) or slot.out.dtype != dtype:
+            slot.out = np.empty(shape, dtype=dtype)
+            self._pool.counter.add(slot.out.nbytes)
+        return slot.out
+
+    def share(self):
+        """为同一帧再创建一个租约 (引用计数 +1)，各自独立 release"""
+        return self._pool._share(self)
+
+    def release(self):
+        if self._slot is not None:
+            self._pool._release(self._slot)
+            self._slot = None
+            self._image = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __del__(self):
+        # 兜底：忘记 release 时不至于让槽位永久被占用
+        self.release()
+
+
+class FramePool:
+    """
+    固定大小的取图缓冲池，按轮询顺序复用。
+    被租出 (未 release) 的槽位会被跳过，全部被占用时 acquire() 返回 None。
+    """
+
+    def __init__(self, nBufSize, nCount=4, counter=None):
+        self.nBufSize = nBufSize
+        self.counter = counter if counter is not None else AllocCounter()
+        self.nExhausted = 0  # 因全部槽位被占用而取图失败的次数
+        self._lock = threading.Lock()
+        self._next = 0
+        self._slots = []
+        for i in range(nCount):
+            self._slots.append(_FrameSlot(i, nBufSize))
+            self.counter.add(nBufSize)
+
+    @property
+    def size(self):
+        return len(self._slots)
+
+    def free_count(self):
+        with self._lock:
+            return sum(1 for s in self._slots if s.refs == 0)
+
+    def acquire(self):
+        n = len(self._slots)
+        with self._lock:
+            for k in range(n):
+                slot = self._slots[(self._next + k) % n]
+                if slot.refs == 0:
+                    slot.refs = 1
+                    slot.reset()
+                    self._next = (slot.index + 1) % n
+                    return FrameLease(self, slot)
+            self.nExhausted += 1
+        return None
+
+    def _share(self, lease):
+        with self._lock:
+            lease._slot.refs += 1
+        other = FrameLease(self, lease._slot)
+        other._image = lease._image     # 不触发延迟转换，新租约第一次访问 image 时再转换
+        other.frame_id = lease.frame_id
+        other.timestamp = lease.timestamp
+        other.width = lease.width
+        other.height = lease.height
+        other.pixel_type = lease.pixel_type
+        other.frame_len = lease.frame_len
+        other._scale = lease._scale
+        other.offset = lease.offset
+        return other
+
+    def _release(self, slot):
+        with self._lock:
+            if slot.refs > 0:
+                slot.refs -= 1
+
+
+# 队列满时的处理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"   # 丢弃队首最旧的帧，保证消费者拿到的总是较新的帧
+OVERFLOW_DROP_NEWEST = "drop_newest"   # 丢弃刚到的新帧，保留已排队的帧
+OVERFLOW_BLOCK = "block"               # 阻塞生产者直到有空位 (超时后丢弃新帧)
+
+
+class FrameQueue:
+    """
+    有界帧队列：生产者 (SDK 回调/取流线程) 放入 FrameLease，消费者 get() 取出。
+    入队/出队本身只是 deque 的原子操作，条件变量仅用于阻塞等待。
+    被丢弃的帧会立即 release 回缓冲池。
+    """
+
+    def __init__(self, nMaxSize=8, overflow=OVERFLOW_DROP_OLDEST, fBlockTimeout=1.0):
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK):
+            raise ValueError(f"未知的队列溢出策略: {overflow}")
+        self.nMaxSize = max(1, nMaxSize)
+        self.overflow = overflow
+        self.fBlockTimeout = fBlockTimeout
+        self.nDropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, lease):
+        """放入一帧，返回 False 表示该帧被丢弃"""
+        with self._cond:
+            if len(self._items) >= self.nMaxSize:
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft().release()
+                    self.nDropped += 1
+                elif self.overflow == OVERFLOW_DROP_NEWEST:
+                    self.nDropped += 1
+                    lease.release()
+                    return False
+                else:
+                    deadline = time.perf_counter() + self.fBlockTimeout
+                    while len(self._items) >= self.nMaxSize:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self.nDropped += 1
+                            lease.release()
+                            return False
+                        self._cond.wait(remaining)
+            self._items.append(lease)
+            self._cond.notify_all()
+        return True
+
+    def get(self, timeout=1.0):
+        """取出最早的一帧 (需 release)，超时返回 None"""
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while not self._items:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            lease = self._items.popleft()
+            self._cond.notify_all()
+            return lease
+
+    def clear(self):
+        with self._cond:
+            while self._items:
+                self._items.popleft().release()
+            self._cond.notify_all()
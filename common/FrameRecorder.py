@@ -0,0 +1,347 @@
+# -- coding: utf-8 --
+"""
+原始帧环形录制：把相机的原始载荷 (未转换、未编码) 和帧元数据写入预分配的内存映射文件，
+写满后覆盖最旧的帧，始终保留最近 nSlots 帧。每帧只有一次内存拷贝，不创建文件、不编码，
+可以跟上相机的全帧率；排查偶发误检时用 FrameReader 按序号或帧号取回，
+也可以作为模拟相机的帧来源 (sim.source: recording) 重新走一遍 转换 -> 检测 流程。
+
+    recorder = FrameRecorder("frames.ring", nSlots=256, nSlotSize=camera.pool.nBufSize)
+    recorder.attach(camera)        # 之后 start_stream() 取到的每一帧都会被录制
+    ...
+    recorder.close()
+
+    reader = FrameReader("frames.ring")
+    data, info, offset = reader.read(len(reader) - 1)   # 最新一帧
+
+文件布局 (小端)：
+    [0, 4096)       文件头 _HEADER_DTYPE
+    [4096, ...)     索引，每个槽位一条 _INDEX_DTYPE 记录
+    [nDataOffset, ) 数据区，nSlots 个 nSlotSize 字节的槽位 (按 4096 对齐)
+索引记录的 seq 为 写入序号+1，0 表示空槽或正在写入，读取时据此判断该槽是否已被覆盖。
+
+查看录制文件：python -m common.FrameRecorder frames.ring [--dump 序号 --out x.png]
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+RING_MAGIC = b"EXPRING1"
+RING_VERSION = 1
+_PAGE = 4096
+
+_HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("nSlots", "<u4"),
+    ("nSlotSize", "<u8"),
+    ("nDataOffset", "<u8"),
+    ("nWritten", "<u8"),      # 累计写入的帧数 (下一帧的写入序号)
+])
+
+_INDEX_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("frame_id", "<i8"),
+    ("frame_num", "<i8"),
+    ("dev_timestamp", "<u8"),
+    ("host_timestamp", "<i8"),
+    ("recv_time", "<f8"),
+    ("exposure", "<f8"),
+    ("gain", "<f8"),
+    ("lost_packet", "<u4"),
+    ("trigger_index", "<u4"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+    ("pixel_type", "<u4"),
+    ("frame_len", "<u4"),
+    ("offset_x", "<i4"),
+    ("offset_y", "<i4"),
+])
+
+# 与 FrameInfo 同名的索引字段
+_INFO_FIELDS = ("frame_num", "dev_timestamp", "host_timestamp", "recv_time", "lost_packet",
+                "exposure", "gain", "trigger_index", "width", "height", "pixel_type", "frame_len")
+
+
+def _align(value, nAlign=_PAGE):
+    return (value + nAlign - 1) // nAlign * nAlign
+
+
+def _layout(nSlots, nSlotSize):
+    nDataOffset = _PAGE + _align(nSlots * _INDEX_DTYPE.itemsize)
+    return nDataOffset, nDataOffset + nSlots * nSlotSize
+
+
+class _RingFile:
+    """文件头 / 索引列 / 数据区在同一块 np.memmap 上的视图"""
+
+    def _map(self, mm, nSlots, nSlotSize, nDataOffset):
+        self._mm = mm
+        self._header = mm[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)
+        index = mm[_PAGE:_PAGE + nSlots * _INDEX_DTYPE.itemsize].view(_INDEX_DTYPE)
+        # 每列单独取视图，写入时不再为结构化记录创建临时对象
+        self._cols = {name: index[name] for name in _INDEX_DTYPE.names}
+        self._data = mm[nDataOffset:nDataOffset + nSlots * nSlotSize].reshape(nSlots, nSlotSize)
+        self.nSlots = nSlots
+        self.nSlotSize = nSlotSize
+
+
+class FrameRecorder(_RingFile):
+    """
+    环形录制器。nSlotSize 为单帧原始载荷的最大字节数 (一般取 camera.pool.nBufSize)，
+    超过的帧不录制，计入 nOversize。write() 可直接作为 CameraBase.add_sink() 的消费者。
+    """
+
+    def __init__(self, path, nSlots=256, nSlotSize=0):
+        if nSlots <= 0 or nSlotSize <= 0:
+            raise ValueError(f"槽位数和槽位大小必须大于 0: nSlots={nSlots}, nSlotSize={nSlotSize}")
+        self.path = str(path)
+        nSlotSize = _align(int(nSlotSize))
+        nDataOffset, nFileSize = _layout(nSlots, nSlotSize)
+        # 一次性建好整个文件，录制过程中文件大小不变
+        with open(self.path, "wb") as f:
+            f.truncate(nFileSize)
+        self._map(np.memmap(self.path, dtype=np.uint8, mode="r+", shape=(nFileSize,)),
+                  nSlots, nSlotSize, nDataOffset)
+        self._header["magic"] = RING_MAGIC
+        self._header["version"] = RING_VERSION
+        self._header["nSlots"] = nSlots
+        self._header["nSlotSize"] = nSlotSize
+        self._header["nDataOffset"] = nDataOffset
+        self._nWrittenCol = self._header["nWritten"]
+        self._nWrittenCol[0] = 0
+
+        self._lock = threading.Lock()
+        self._camera = None
+        self.nWritten = 0
+        self.nBytes = 0
+        self.nOversize = 0
+        self._t0 = time.perf_counter()
+
+    def write(self, lease):
+        """录制一帧 (FrameLease / SdkFrame)，返回是否写入"""
+        nLen = lease.frame_len
+        if nLen > self.nSlotSize:
+            self.nOversize += 1
+            return False
+        with self._lock:
+            if self._mm is None:
+                return False
+            seq = self.nWritten
+            i = seq % self.nSlots
+            cols = self._cols
+            cols["seq"][i] = 0   # 写入中，读者看到 0 即跳过
+            self._data[i, :nLen] = lease.data[:nLen]
+            info = lease.info
+            if info is not None:
+                for name in _INFO_FIELDS:
+                    cols[name][i] = getattr(info, name)
+            cols["frame_id"][i] = lease.frame_id
+            cols["width"][i] = lease.width
+            cols["height"][i] = lease.height
+            cols["pixel_type"][i] = lease.pixel_type
+            cols["frame_len"][i] = nLen
+            cols["offset_x"][i], cols["offset_y"][i] = lease.offset
+            cols["seq"][i] = seq + 1
+            self.nWritten = seq + 1
+            self._nWrittenCol[0] = self.nWritten
+            self.nBytes += nLen
+        return True
+
+    __call__ = write
+
+    def attach(self, camera):
+        """把录制器挂到相机的后台取流上 (camera.add_sink)"""
+        self.detach()
+        self._camera = camera
+        camera.add_sink(self.write)
+
+    def detach(self):
+        if self._camera is not None:
+            self._camera.remove_sink(self.write)
+            self._camera = None
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def get_stats(self):
+        elapsed = max(1e-6, time.perf_counter() - self._t0)
+        return {
+            "path": self.path,
+            "slots": self.nSlots,
+            "slot_size": self.nSlotSize,
+            "written": self.nWritten,
+            "oversize": self.nOversize,
+            "mb_per_sec": round(self.nBytes / elapsed / 1e6, 2),
+        }
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            if self._mm is None:
+                return
+            self._mm.flush()
+            self._cols = self._data = self._header = self._nWrittenCol = None
+            self._mm = None
+
+
+class FrameReader(_RingFile):
+    """
+    读取环形录制文件，录制进行中也可以打开。
+    序号 k 从 0 (仍保留的最旧一帧) 到 len(reader)-1 (最新一帧)。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        nFileSize = os.path.getsize(self.path)
+        if nFileSize < _PAGE:
+            raise ValueError(f"不是环形录制文件: {self.path}")
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r", shape=(nFileSize,))
+        header = mm[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)[0]
+        if bytes(header["magic"]) != RING_MAGIC:
+            raise ValueError(f"不是环形录制文件: {self.path}")
+        if int(header["version"]) != RING_VERSION:
+            raise ValueError(f"不支持的录制文件版本: {int(header['version'])}")
+        self._map(mm, int(header["nSlots"]), int(header["nSlotSize"]), int(header["nDataOffset"]))
+
+    @property
+    def nWritten(self):
+        return int(self._header["nWritten"][0])
+
+    @property
+    def first_seq(self):
+        return max(0, self.nWritten - self.nSlots)
+
+    def __len__(self):
+        return min(self.nWritten, self.nSlots)
+
+    def _slot_of(self, k):
+        nWritten = self.nWritten
+        nCount = min(nWritten, self.nSlots)
+        if k < 0:
+            k += nCount
+        if not 0 <= k < nCount:
+            raise IndexError(f"帧序号超出范围: {k} (共 {nCount} 帧)")
+        seq = max(0, nWritten - self.nSlots) + k
+        return seq, seq % self.nSlots
+
+    def read(self, k, out=None):
+        """
+        返回第 k 帧 (data, FrameInfo, offset)；该帧已被覆盖或正在写入时返回 None。
+        out 为 None 时 data 是映射内存上的视图 (录制进行中可能被覆盖)，否则拷贝到 out 中。
+        """
+        from .FrameBuffer import FrameInfo
+
+        seq, i = self._slot_of(k)
+        cols = self._cols
+        if int(cols["seq"][i]) != seq + 1:
+            return None
+        nLen = int(cols["frame_len"][i])
+        info = FrameInfo()
+        for name in _INFO_FIELDS:
+            value = cols[name][i]
+            setattr(info, name, float(value) if value.dtype.kind == "f" else int(value))
+        offset = (int(cols["offset_x"][i]), int(cols["offset_y"][i]))
+        data = self._data[i, :nLen]
+        if out is not None:
+            out = out[:nLen]
+            np.copyto(out, data)
+            # 拷贝期间被录制线程覆盖则丢弃
+            if int(cols["seq"][i]) != seq + 1:
+                return None
+            data = out
+        return data, info, offset
+
+    def frame_id(self, k):
+        seq, i = self._slot_of(k)
+        return int(self._cols["frame_id"][i])
+
+    def find(self, frame_num):
+        """按相机帧号查找，返回序号 k，找不到返回 -1"""
+        first = self.first_seq
+        for i in np.flatnonzero(self._cols["frame_num"] == frame_num):
+            seq = int(self._cols["seq"][i]) - 1
+            if seq >= first:
+                return seq - first
+        return -1
+
+    def __iter__(self):
+        for k in range(len(self)):
+            frame = self.read(k)
+            if frame is not None:
+                yield frame
+
+    def close(self):
+        self._cols = self._data = self._header = None
+        self._mm = None
+
+
+def benchmark_write(path, nWidth=2448, nHeight=2048, nSlots=64, fSeconds=2.0):
+    """连续写入 Bayer8 大小的帧，测量录制器能跟上的帧率和吞吐"""
+    from .FrameBuffer import FramePool
+
+    pool = FramePool(nWidth * nHeight, 1)
+    lease = pool.acquire()
+    lease.frame_len = nWidth * nHeight
+    lease.width, lease.height = nWidth, nHeight
+    lease.data[:] = np.random.default_rng(0).integers(0, 256, lease.frame_len, dtype=np.uint8)
+    recorder = FrameRecorder(path, nSlots, pool.nBufSize)
+    try:
+        nFrames = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < fSeconds:
+            lease.frame_id = nFrames
+            recorder.write(lease)
+            nFrames += 1
+        elapsed = time.perf_counter() - t0
+    finally:
+        recorder.close()
+        lease.release()
+    print(f"{nWidth}x{nHeight} 单帧 {nWidth * nHeight / 1e6:.1f} MB，{nFrames / elapsed:.0f} fps，"
+          f"{nFrames * nWidth * nHeight / elapsed / 1e6:.0f} MB/s")
+
+
+def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查看环形录制文件")
+    parser.add_argument("path")
+    parser.add_argument("--dump", type=int, help="把第 k 帧转换后保存为图片 (负数从最新一帧往前数)")
+    parser.add_argument("--out", default="frame.png")
+    parser.add_argument("--bench", action="store_true", help="写入性能测试 (覆盖 path)")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark_write(args.path)
+        return
+
+    reader = FrameReader(args.path)
+    print(f"{args.path}: {reader.nSlots} 槽 x {reader.nSlotSize} 字节，累计写入 {reader.nWritten} 帧，保留 {len(reader)} 帧")
+    if len(reader):
+        first, last = reader.read(0), reader.read(len(reader) - 1)
+        if first is not None and last is not None:
+            print(f"帧号 {first[1].frame_num} ~ {last[1].frame_num}，"
+                  f"时间跨度 {(last[1].host_timestamp - first[1].host_timestamp) / 1000.0:.2f} s")
+    if args.dump is not None:
+        import cv2 as cv
+        from .PixelConvert import FrameConverter
+
+        frame = reader.read(args.dump)
+        if frame is None:
+            print(f"第 {args.dump} 帧已被覆盖")
+            return
+        data, info, offset = frame
+        image = FrameConverter().convert(data, info.width, info.height, info.pixel_type)
+        if image is None:
+            print(f"不支持的像素格式: 0x{info.pixel_type:x}")
+            return
+        cv.imwrite(args.out, image)
+        print(f"{info} offset={offset} -> {args.out}")
+
+
+if __name__ == "__main__":
+    _main()
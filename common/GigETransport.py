@@ -0,0 +1,207 @@
+# -- coding: utf-8 --
+"""
+GigE 传输参数 (camera.transport) 与带宽自测。
+本模块不导入海康 SDK：apply_transport() 只调用传入句柄对象的 MV_* 方法，
+bandwidth_test() 只使用相机的 grab_frame() / get_net_trans_info()，可以直接用模拟对象测试。
+
+    camera:
+      transport:
+        profile: multi_camera   # 预设，其余键覆盖预设中的同名项
+        packet_delay: 2000
+
+带宽自测：python -m common.GigETransport [--seconds 5] [--profile robust] [--config exp_1/config.yaml]
+"""
+
+import time
+
+# 预设：值为 None 的项保持相机/SDK 当前设置不变
+#   packet_size: GevSCPSPacketSize，auto 为打开时探测的最佳包大小
+#   packet_delay: GevSCPD 包间隔 (相机时间戳 tick，见 GevTimestampTickFrequency)，多相机共用网口时拉开包间距避免交换机溢出
+#   resend / resend_percent / resend_timeout: MV_GIGE_SetResend 丢包重传开关、最大重传比例 (%)、重传等待 (ms)
+#   gvcp_timeout / gvcp_retries: 控制通道 (GVCP) 命令超时 (ms) 和重试次数，链路差时加大避免误判掉线
+TRANSPORT_PROFILES = {
+    "default": {},
+    "low_latency": {"packet_delay": 0, "resend": True, "resend_percent": 5, "resend_timeout": 20},
+    "multi_camera": {"packet_delay": 2000, "resend": True, "resend_percent": 10, "resend_timeout": 50},
+    "robust": {"resend": True, "resend_percent": 20, "resend_timeout": 100,
+               "gvcp_timeout": 1000, "gvcp_retries": 5},
+}
+
+TRANSPORT_KEYS = ("packet_size", "packet_delay", "resend", "resend_percent", "resend_timeout",
+                  "gvcp_timeout", "gvcp_retries")
+
+
+def resolve_transport(transport_cfg):
+    """按 profile 合并配置，返回 {键: 值}；未知的 profile 按 default 处理"""
+    transport_cfg = transport_cfg or {}
+    if isinstance(transport_cfg, str):
+        transport_cfg = {"profile": transport_cfg}
+    name = transport_cfg.get("profile") or "default"
+    if name not in TRANSPORT_PROFILES:
+        print(f"未知的传输预设: {name}，可选 {list(TRANSPORT_PROFILES)}")
+        name = "default"
+    merged = dict(TRANSPORT_PROFILES[name])
+    for key in TRANSPORT_KEYS:
+        if transport_cfg.get(key) is not None:
+            merged[key] = transport_cfg[key]
+    merged["profile"] = name
+    return merged
+
+
+def apply_transport(cam, transport, nOptimalPacketSize=0):
+    """
+    把 resolve_transport() 的结果下发到已打开的 GigE 设备 (cam 为 MvCamera 句柄对象)。
+    nOptimalPacketSize: packet_size 为 auto / 未设置时使用的探测值 (0 表示不设置)。
+    返回实际生效的参数，设置失败的项不出现在结果中。
+    """
+    applied = {"profile": transport.get("profile", "default")}
+
+    def _set(key, value, func, *args):
+        ret = func(*args)
+        if ret != 0:
+            print(f"设置 {key}={value} 失败! ret[0x{ret:x}]")
+            return
+        applied[key] = value
+
+    # GVCP 超时先设置，之后的参数下发也按新超时执行
+    if transport.get("gvcp_timeout") is not None:
+        nTimeout = int(transport["gvcp_timeout"])
+        _set("gvcp_timeout", nTimeout, cam.MV_GIGE_SetGvcpTimeout, nTimeout)
+    if transport.get("gvcp_retries") is not None:
+        nRetries = int(transport["gvcp_retries"])
+        _set("gvcp_retries", nRetries, cam.MV_GIGE_SetRetryGvcpTimes, nRetries)
+
+    nPacketSize = transport.get("packet_size")
+    if nPacketSize in (None, "auto"):
+        nPacketSize = nOptimalPacketSize
+    if nPacketSize and int(nPacketSize) > 0:
+        nPacketSize = int(nPacketSize)
+        _set("packet_size", nPacketSize, cam.MV_CC_SetIntValue, "GevSCPSPacketSize", nPacketSize)
+
+    if transport.get("packet_delay") is not None:
+        nDelay = int(transport["packet_delay"])
+        _set("packet_delay", nDelay, cam.MV_CC_SetIntValue, "GevSCPD", nDelay)
+
+    if transport.get("resend") is not None:
+        bEnable = bool(transport["resend"])
+        nPercent = int(transport.get("resend_percent", 10))
+        nResendTimeout = int(transport.get("resend_timeout", 50))
+        ret = cam.MV_GIGE_SetResend(int(bEnable), nPercent, nResendTimeout)
+        if ret != 0:
+            print(f"设置丢包重传失败! ret[0x{ret:x}]")
+        else:
+            applied["resend"] = bEnable
+            if bEnable:
+                applied["resend_percent"] = nPercent
+                applied["resend_timeout"] = nResendTimeout
+    return applied
+
+
+def _delta(after, before, key):
+    if not after or not before or key not in after or key not in before:
+        return None
+    return after[key] - before[key]
+
+
+def bandwidth_test(camera, fSeconds=5.0, nTimeout=1000):
+    """
+    带宽自测：在 fSeconds 内连续 grab_frame()，统计实际吞吐、丢帧和重传。
+    camera 需提供 grab_frame(nTimeout)，有 get_net_trans_info() 时附上 SDK 传输计数的增量。
+    测量链路丢帧时建议 buffering.grab_strategy 用 one_by_one，latest_only 会主动丢弃旧帧 (计入 skipped_frames)。
+    """
+    get_info = getattr(camera, "get_net_trans_info", None)
+    before = get_info() if get_info else None
+
+    nFrames = nBytes = nFailed = nIncomplete = nLostPackets = nSkipped = 0
+    last_num = None
+    t0 = time.perf_counter()
+    deadline = t0 + fSeconds
+    while time.perf_counter() < deadline:
+        lease = camera.grab_frame(nTimeout)
+        if lease is None:
+            nFailed += 1
+            continue
+        with lease:
+            nFrames += 1
+            nBytes += lease.frame_len
+            info = lease.info
+            if info.lost_packet:
+                nIncomplete += 1
+                nLostPackets += info.lost_packet
+            # 帧号跳变：相机已发出但没有交给程序 (SDK 丢弃或取流策略跳过)
+            if last_num is not None and info.frame_num > last_num + 1:
+                nSkipped += info.frame_num - last_num - 1
+            last_num = info.frame_num
+    elapsed = time.perf_counter() - t0
+
+    after = get_info() if get_info else None
+    report = {
+        "seconds": round(elapsed, 3),
+        "frames": nFrames,
+        "fps": round(nFrames / elapsed, 2) if elapsed > 0 else 0.0,
+        "mb_per_sec": round(nBytes / elapsed / 1e6, 2) if elapsed > 0 else 0.0,
+        "grab_failed": nFailed,
+        "incomplete_frames": nIncomplete,
+        "lost_packets": nLostPackets,
+        "skipped_frames": nSkipped,
+    }
+    nReceived = _delta(after, before, "receive_bytes")
+    if nReceived is not None:
+        # SDK 统计的是网口实际收到的数据量，包括程序没有取走的帧
+        report["link_mb_per_sec"] = round(nReceived / elapsed / 1e6, 2) if elapsed > 0 else 0.0
+        report["sdk_lost_frames"] = _delta(after, before, "throw_frames")
+        report["sdk_recv_frames"] = _delta(after, before, "recv_frames")
+        report["resend_requested"] = _delta(after, before, "resend_requested")
+        report["resend_packets"] = _delta(after, before, "resend_packets")
+    return report
+
+
+def format_report(report):
+    lines = [
+        f"时长 {report['seconds']} s，取到 {report['frames']} 帧，{report['fps']} fps",
+        f"吞吐 {report['mb_per_sec']} MB/s" + (f" (网口 {report['link_mb_per_sec']} MB/s)" if "link_mb_per_sec" in report else ""),
+        f"取图失败 {report['grab_failed']}，残帧 {report['incomplete_frames']} (丢包 {report['lost_packets']})，"
+        f"帧号跳过 {report['skipped_frames']}",
+    ]
+    if "sdk_lost_frames" in report:
+        lines.append(f"SDK 丢帧 {report['sdk_lost_frames']}，请求重传 {report['resend_requested']} 包，"
+                     f"重传成功 {report['resend_packets']} 包")
+    return "\n".join(lines)
+
+
+def _main():
+    import argparse
+    from pathlib import Path
+    from .CameraRegistry import create_camera
+
+    parser = argparse.ArgumentParser(description="GigE 带宽自测")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profile", choices=list(TRANSPORT_PROFILES), help="覆盖配置中的 transport.profile")
+    parser.add_argument("--config", help="读取其中的 camera 段 (默认 exp_1/config.yaml)")
+    args = parser.parse_args()
+
+    cam_cfg = {}
+    config_path = Path(args.config) if args.config else Path(__file__).resolve().parent.parent / "exp_1" / "config.yaml"
+    if config_path.exists():
+        import yaml
+        with open(config_path, 'r', encoding='utf-8') as f:
+            cam_cfg = dict((yaml.safe_load(f) or {}).get('camera') or {})
+    if args.profile:
+        transport_cfg = cam_cfg.get('transport') or {}
+        if isinstance(transport_cfg, str):
+            transport_cfg = {"profile": transport_cfg}
+        cam_cfg['transport'] = dict(transport_cfg, profile=args.profile)
+
+    camera = create_camera(cam_cfg)
+    try:
+        if not camera.is_open:
+            print("相机未能打开")
+            return
+        print(f"传输参数: {getattr(camera, 'transport', {})}")
+        print(format_report(bandwidth_test(camera, args.seconds)))
+    finally:
+        camera.CloseCamera()
+
+
+if __name__ == "__main__":
+    _main()
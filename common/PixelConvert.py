@@ -0,0 +1,534 @@
+# -- coding: utf-8 --
+"""
+纯 NumPy 像素格式转换，不依赖 SDK 的 MV_CC_ConvertPixelType，Linux 下同样可用。
+所有转换均为整块的向量化/跨步操作，并支持写入调用方预分配的目标缓冲。
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+# PixelType_header 只包含常量定义，不会加载 DLL
+sdk_path = Path(__file__).resolve().parent / "MvImport"
+if str(sdk_path) not in sys.path:
+    sys.path.append(str(sdk_path))
+
+from PixelType_header import *
+
+# --- 高位深黑白格式 ---
+# 格式 -> 有效位数
+MONO_BITS = {
+    PixelType_Gvsp_Mono10: 10,
+    PixelType_Gvsp_Mono10_Packed: 10,
+    PixelType_Gvsp_Mono12: 12,
+    PixelType_Gvsp_Mono12_Packed: 12,
+}
+MONO_PACKED = (PixelType_Gvsp_Mono10_Packed, PixelType_Gvsp_Mono12_Packed)
+
+# --- Bayer 格式 ---
+# 格式 -> 排列方式 (左上角 2x2 的前两个像素)
+BAYER_PATTERN = {
+    PixelType_Gvsp_BayerRG8: "RG", PixelType_Gvsp_BayerGB8: "GB",
+    PixelType_Gvsp_BayerGR8: "GR", PixelType_Gvsp_BayerBG8: "BG",
+    PixelType_Gvsp_BayerRG10: "RG", PixelType_Gvsp_BayerGB10: "GB",
+    PixelType_Gvsp_BayerGR10: "GR", PixelType_Gvsp_BayerBG10: "BG",
+    PixelType_Gvsp_BayerRG10_Packed: "RG", PixelType_Gvsp_BayerGB10_Packed: "GB",
+    PixelType_Gvsp_BayerGR10_Packed: "GR", PixelType_Gvsp_BayerBG10_Packed: "BG",
+    PixelType_Gvsp_BayerRG12: "RG", PixelType_Gvsp_BayerGB12: "GB",
+    PixelType_Gvsp_BayerGR12: "GR", PixelType_Gvsp_BayerBG12: "BG",
+    PixelType_Gvsp_BayerRG12_Packed: "RG", PixelType_Gvsp_BayerGB12_Packed: "GB",
+    PixelType_Gvsp_BayerGR12_Packed: "GR", PixelType_Gvsp_BayerBG12_Packed: "BG",
+    PixelType_Gvsp_BayerRG16: "RG", PixelType_Gvsp_BayerGB16: "GB",
+    PixelType_Gvsp_BayerGR16: "GR", PixelType_Gvsp_BayerBG16: "BG",
+}
+BAYER8 = (PixelType_Gvsp_BayerRG8, PixelType_Gvsp_BayerGB8,
+          PixelType_Gvsp_BayerGR8, PixelType_Gvsp_BayerBG8)
+
+# OpenCV 的 Bayer 命名取的是第二行第 2、3 个像素，与 GenICam 命名错开一位：
+# GenICam BayerRG (RGGB) 对应 cv.COLOR_BayerBG2BGR，依此类推
+DEMOSAIC_QUALITY = ("bilinear", "vng", "ea")
+_CV_BAYER_CODES = {
+    "RG": (cv.COLOR_BayerBG2BGR, cv.COLOR_BayerBG2BGR_VNG, cv.COLOR_BayerBG2BGR_EA),
+    "GB": (cv.COLOR_BayerGR2BGR, cv.COLOR_BayerGR2BGR_VNG, cv.COLOR_BayerGR2BGR_EA),
+    "GR": (cv.COLOR_BayerGB2BGR, cv.COLOR_BayerGB2BGR_VNG, cv.COLOR_BayerGB2BGR_EA),
+    "BG": (cv.COLOR_BayerRG2BGR, cv.COLOR_BayerRG2BGR_VNG, cv.COLOR_BayerRG2BGR_EA),
+}
+
+# 高位深原始数据 (黑白及 Bayer) 的存储布局：格式 -> (有效位数, 是否打包)
+RAW_LAYOUT = {
+    PixelType_Gvsp_Mono10: (10, False), PixelType_Gvsp_Mono10_Packed: (10, True),
+    PixelType_Gvsp_Mono12: (12, False), PixelType_Gvsp_Mono12_Packed: (12, True),
+    PixelType_Gvsp_BayerRG10: (10, False), PixelType_Gvsp_BayerGB10: (10, False),
+    PixelType_Gvsp_BayerGR10: (10, False), PixelType_Gvsp_BayerBG10: (10, False),
+    PixelType_Gvsp_BayerRG10_Packed: (10, True), PixelType_Gvsp_BayerGB10_Packed: (10, True),
+    PixelType_Gvsp_BayerGR10_Packed: (10, True), PixelType_Gvsp_BayerBG10_Packed: (10, True),
+    PixelType_Gvsp_BayerRG12: (12, False), PixelType_Gvsp_BayerGB12: (12, False),
+    PixelType_Gvsp_BayerGR12: (12, False), PixelType_Gvsp_BayerBG12: (12, False),
+    PixelType_Gvsp_BayerRG12_Packed: (12, True), PixelType_Gvsp_BayerGB12_Packed: (12, True),
+    PixelType_Gvsp_BayerGR12_Packed: (12, True), PixelType_Gvsp_BayerBG12_Packed: (12, True),
+    PixelType_Gvsp_BayerRG16: (16, False), PixelType_Gvsp_BayerGB16: (16, False),
+    PixelType_Gvsp_BayerGR16: (16, False), PixelType_Gvsp_BayerBG16: (16, False),
+}
+
+
+# 2x2 像素块中各颜色的位置 (行, 列)：R, B, G1, G2
+_BAYER_QUAD = {
+    "RG": ((0, 0), (1, 1), (0, 1), (1, 0)),
+    "GB": ((1, 0), (0, 1), (0, 0), (1, 1)),
+    "GR": ((0, 1), (1, 0), (0, 0), (1, 1)),
+    "BG": ((1, 1), (0, 0), (0, 1), (1, 0)),
+}
+
+
+def bayer_code(enPixelType, quality="bilinear"):
+    """Bayer 格式对应的 OpenCV 去马赛克转换码"""
+    if quality not in DEMOSAIC_QUALITY:
+        raise ValueError(f"未知的去马赛克质量: {quality}，可选 {DEMOSAIC_QUALITY}")
+    return _CV_BAYER_CODES[BAYER_PATTERN[enPixelType]][DEMOSAIC_QUALITY.index(quality)]
+
+
+def unpack_mono16(data, nPixels, out=None):
+    """Mono10/Mono12 (非打包)：每像素 2 字节小端，直接按 uint16 解释"""
+    src = data[:nPixels * 2].view("<u2")
+    if out is None:
+        return src
+    out[:] = src
+    return out
+
+
+def unpack_mono10_packed(data, nPixels, out=None):
+    """
+    GVSP Mono10Packed：每 2 像素占 3 字节
+    byte0 = P0[9:2], byte1 = P0[1:0] | P1[1:0] << 4, byte2 = P1[9:2]
+    """
+    return _unpack_packed(data, nPixels, out, 2, 0x03)
+
+
+def unpack_mono12_packed(data, nPixels, out=None):
+    """
+    GVSP Mono12Packed：每 2 像素占 3 字节
+    byte0 = P0[11:4], byte1 = P0[3:0] | P1[3:0] << 4, byte2 = P1[11:4]
+    """
+    return _unpack_packed(data, nPixels, out, 4, 0x0F)
+
+
+def _unpack_packed(data, nPixels, out, nLowBits, nLowMask):
+    if out is None:
+        out = np.empty(nPixels, dtype=np.uint16)
+    nPairs = nPixels // 2
+    trip = data[:nPairs * 3].reshape(nPairs, 3)
+    pairs = out[:nPairs * 2].reshape(nPairs, 2)
+    # 先放高位字节，再原地左移并或上低位
+    pairs[:, 0] = trip[:, 0]
+    pairs[:, 1] = trip[:, 2]
+    pairs <<= nLowBits
+    pairs[:, 0] |= trip[:, 1] & nLowMask
+    pairs[:, 1] |= (trip[:, 1] >> 4) & nLowMask
+    if nPixels % 2:
+        # 奇数像素：最后一个像素只占 2 字节
+        b0, b1 = int(data[nPairs * 3]), int(data[nPairs * 3 + 1])
+        out[nPixels - 1] = (b0 << nLowBits) | (b1 & nLowMask)
+    return out
+
+
+def make_gamma_lut(nBits, gamma=1.0):
+    """生成 nBits -> 8bit 的查找表，gamma<1 提亮暗部"""
+    x = np.arange(1 << nBits, dtype=np.float64) / ((1 << nBits) - 1)
+    return np.clip(np.round(255.0 * np.power(x, gamma)), 0, 255).astype(np.uint8)
+
+
+class MonoConverter:
+    """
+    10/12bit 黑白数据转换器 (同样适用于 Bayer 原始数据的位深转换)。
+    out_bits=8 时按 shift (默认 有效位数-8) 右移，或按 lut (长度 2^有效位数) 查表；
+    out_bits=16 时输出原始数值的 uint16。
+    中间缓冲按尺寸缓存复用，连续转换不再分配内存；缓冲每个线程一份，多个线程可同时转换不同的帧。
+    """
+
+    def __init__(self, out_bits=8, shift=None, lut=None, counter=None):
+        if out_bits not in (8, 16):
+            raise ValueError(f"不支持的输出位深: {out_bits}")
+        self.out_bits = out_bits
+        self.shift = shift
+        self.lut = None if lut is None else np.asarray(lut, dtype=np.uint8)
+        self.counter = counter
+        self._local = threading.local()
+
+    def out_dtype(self):
+        return np.uint8 if self.out_bits == 8 else np.uint16
+
+    def convert(self, data, nWidth, nHeight, enPixelType, out=None):
+        """返回 (nHeight, nWidth, 1) 的图像；out 为预分配的目标缓冲"""
+        nBits, bPacked = RAW_LAYOUT[enPixelType]
+        nPixels = nWidth * nHeight
+        if out is None:
+            out = np.empty((nHeight, nWidth, 1), dtype=self.out_dtype())
+        flat = out.reshape(-1)
+
+        if self.out_bits == 16:
+            self._unpack(data, nPixels, nBits, bPacked, flat)
+            return out
+
+        nShift = self.shift if self.shift is not None else nBits - 8
+        if self.lut is None and nShift == nBits - 8 and bPacked:
+            # 打包格式的默认右移恰好等于每 3 字节中的第 0、2 字节，直接跨步拷贝
+            nPairs = nPixels // 2
+            trip = data[:nPairs * 3].reshape(nPairs, 3)
+            pairs = flat[:nPairs * 2].reshape(nPairs, 2)
+            pairs[:, 0] = trip[:, 0]
+            pairs[:, 1] = trip[:, 2]
+            if nPixels % 2:
+                flat[nPixels - 1] = data[nPairs * 3]
+            return out
+
+        vals = self._unpack(data, nPixels, nBits, bPacked, self._get_scratch(nPixels))
+        if self.lut is not None:
+            np.take(self.lut, vals, out=flat, mode="clip")
+        else:
+            np.right_shift(vals, nShift, out=vals)
+            np.minimum(vals, 255, out=vals)
+            flat[:] = vals
+        return out
+
+    def _unpack(self, data, nPixels, nBits, bPacked, dst):
+        if bPacked and nBits == 10:
+            return unpack_mono10_packed(data, nPixels, dst)
+        if bPacked:
+            return unpack_mono12_packed(data, nPixels, dst)
+        return unpack_mono16(data, nPixels, dst)
+
+    def _get_scratch(self, nPixels):
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None or scratch.size != nPixels:
+            scratch = self._local.scratch = np.empty(nPixels, dtype=np.uint16)
+            if self.counter is not None:
+                self.counter.add(scratch.nbytes)
+        return scratch
+
+
+class BayerConverter:
+    """
+    Bayer 去马赛克：8bit 数据直接交给 OpenCV，10/12/16bit 先按 MonoConverter 降到 8bit。
+    quality: bilinear (最快) / vng (边缘最好，最慢) / ea (边缘感知，折中)
+    结果写入调用方提供的 BGR 缓冲，中间的 8bit 马赛克缓冲按尺寸复用 (每个线程一份)。
+    """
+
+    def __init__(self, quality="bilinear", counter=None, raw_converter=None):
+        if quality not in DEMOSAIC_QUALITY:
+            raise ValueError(f"未知的去马赛克质量: {quality}，可选 {DEMOSAIC_QUALITY}")
+        self.quality = quality
+        self.counter = counter
+        self.raw_converter = raw_converter if raw_converter is not None else MonoConverter(8, counter=counter)
+        self._local = threading.local()
+
+    def convert(self, data, nWidth, nHeight, enPixelType, out=None):
+        """返回 (nHeight, nWidth, 3) 的 BGR 图像"""
+        code = bayer_code(enPixelType, self.quality)
+        if enPixelType in BAYER8:
+            mosaic = data[:nWidth * nHeight].reshape(nHeight, nWidth)
+        else:
+            mosaic = self.raw_converter.convert(data, nWidth, nHeight, enPixelType,
+                                                self._get_mosaic(nHeight, nWidth))
+        if out is None:
+            out = np.empty((nHeight, nWidth, 3), dtype=np.uint8)
+        cv.cvtColor(mosaic, code, dst=out)
+        return out
+
+    def _get_mosaic(self, nHeight, nWidth):
+        mosaic = getattr(self._local, 'mosaic', None)
+        if mosaic is None or mosaic.shape[:2] != (nHeight, nWidth):
+            mosaic = self._local.mosaic = np.empty((nHeight, nWidth, 1), dtype=np.uint8)
+            if self.counter is not None:
+                self.counter.add(mosaic.nbytes)
+        return mosaic
+
+
+class BinnedBayerConverter:
+    """
+    "合并去马赛克"：每个 2x2 Bayer 像素块直接合成一个 BGR 像素 (G 取两个绿点的平均)，
+    不做插值，输出尺寸为 (H/2, W/2)，像素数只有全分辨率的 1/4。中间缓冲每个线程一份。
+    """
+
+    scale = 0.5
+
+    def __init__(self, counter=None, raw_converter=None):
+        self.counter = counter
+        self.raw_converter = raw_converter if raw_converter is not None else MonoConverter(8, counter=counter)
+        self._local = threading.local()
+
+    def out_shape(self, nWidth, nHeight):
+        return (nHeight // 2, nWidth // 2, 3)
+
+    def convert(self, data, nWidth, nHeight, enPixelType, out=None):
+        """返回 (nHeight//2, nWidth//2, 3) 的 BGR 图像"""
+        if enPixelType in BAYER8:
+            mosaic = data[:nWidth * nHeight].reshape(nHeight, nWidth)
+        else:
+            mosaic = self.raw_converter.convert(data, nWidth, nHeight, enPixelType,
+                                                self._get_mosaic(nHeight, nWidth)).reshape(nHeight, nWidth)
+        h2, w2 = nHeight // 2, nWidth // 2
+        if out is None:
+            out = np.empty((h2, w2, 3), dtype=np.uint8)
+
+        (ry, rx), (by, bx), (g1y, g1x), (g2y, g2x) = _BAYER_QUAD[BAYER_PATTERN[enPixelType]]
+        out[:, :, 2] = mosaic[ry:2 * h2:2, rx:2 * w2:2]
+        out[:, :, 0] = mosaic[by:2 * h2:2, bx:2 * w2:2]
+        green = self._get_green(h2, w2)
+        np.add(mosaic[g1y:2 * h2:2, g1x:2 * w2:2], mosaic[g2y:2 * h2:2, g2x:2 * w2:2], out=green, dtype=np.uint16)
+        green >>= 1
+        out[:, :, 1] = green
+        return out
+
+    def _get_mosaic(self, nHeight, nWidth):
+        mosaic = getattr(self._local, 'mosaic', None)
+        if mosaic is None or mosaic.shape[:2] != (nHeight, nWidth):
+            mosaic = self._local.mosaic = np.empty((nHeight, nWidth, 1), dtype=np.uint8)
+            if self.counter is not None:
+                self.counter.add(mosaic.nbytes)
+        return mosaic
+
+    def _get_green(self, h2, w2):
+        green = getattr(self._local, 'green', None)
+        if green is None or green.shape != (h2, w2):
+            green = self._local.green = np.empty((h2, w2), dtype=np.uint16)
+            if self.counter is not None:
+                self.counter.add(green.nbytes)
+        return green
+
+
+# --- 按像素格式分发的转换层 ---
+def _default_output(shape, dtype=np.uint8):
+    return np.empty(shape, dtype=dtype)
+
+
+class FrameConverter:
+    """
+    以 enPixelType 为键的转换分发表，统一输出 OpenCV 习惯的 BGR (H,W,3) 或黑白 (H,W,1)。
+    - 无需转换的格式 (Mono8 / BGR8) 直接返回原始数据上的视图；
+    - 其余格式只做一次 cvtColor / 解包，写入 get_output(shape, dtype) 提供的复用缓冲。
+    convert() 对不支持的格式返回 None，由调用方决定是否交给 SDK。
+    """
+
+    def __init__(self, mono_converter=None, bayer_converter=None, binned_converter=None,
+                 binning=False, counter=None):
+        self.mono_converter = mono_converter if mono_converter is not None else MonoConverter(counter=counter)
+        self.bayer_converter = bayer_converter if bayer_converter is not None else BayerConverter(counter=counter)
+        self.binned_converter = binned_converter if binned_converter is not None else BinnedBayerConverter(counter=counter)
+        self.binning = binning
+
+        self._dispatch = {
+            PixelType_Gvsp_Mono8: self._mono8,
+            PixelType_Gvsp_BGR8_Packed: self._bgr8,
+            PixelType_Gvsp_RGB8_Packed: self._make_cvt(cv.COLOR_RGB2BGR, 3),
+            PixelType_Gvsp_BGRA8_Packed: self._make_cvt(cv.COLOR_BGRA2BGR, 4),
+            PixelType_Gvsp_RGBA8_Packed: self._make_cvt(cv.COLOR_RGBA2BGR, 4),
+            # GigE Vision 的 YUV422_Packed 字节序为 U Y V Y
+            PixelType_Gvsp_YUV422_Packed: self._make_cvt(cv.COLOR_YUV2BGR_UYVY, 2),
+            PixelType_Gvsp_YUV422_YUYV_Packed: self._make_cvt(cv.COLOR_YUV2BGR_YUYV, 2),
+        }
+        for enPixelType in MONO_BITS:
+            self._dispatch[enPixelType] = self._mono_high
+        for enPixelType in BAYER_PATTERN:
+            self._dispatch[enPixelType] = self._bayer
+
+    def supports(self, enPixelType):
+        return enPixelType in self._dispatch
+
+    def convert(self, data, nWidth, nHeight, enPixelType, get_output=_default_output):
+        func = self._dispatch.get(enPixelType)
+        if func is None:
+            return None
+        return func(data, nWidth, nHeight, enPixelType, get_output)
+
+    def _mono8(self, data, nWidth, nHeight, enPixelType, get_output):
+        return data[:nWidth * nHeight].reshape(nHeight, nWidth, 1)
+
+    def _bgr8(self, data, nWidth, nHeight, enPixelType, get_output):
+        return data[:nWidth * nHeight * 3].reshape(nHeight, nWidth, 3)
+
+    def _make_cvt(self, code, nChannels):
+        def _cvt(data, nWidth, nHeight, enPixelType, get_output):
+            src = data[:nWidth * nHeight * nChannels].reshape(nHeight, nWidth, nChannels)
+            return cv.cvtColor(src, code, dst=get_output((nHeight, nWidth, 3)))
+        return _cvt
+
+    def _mono_high(self, data, nWidth, nHeight, enPixelType, get_output):
+        dst = get_output((nHeight, nWidth, 1), self.mono_converter.out_dtype())
+        return self.mono_converter.convert(data, nWidth, nHeight, enPixelType, dst)
+
+    def _bayer(self, data, nWidth, nHeight, enPixelType, get_output):
+        if self.binning:
+            dst = get_output(self.binned_converter.out_shape(nWidth, nHeight))
+            return self.binned_converter.convert(data, nWidth, nHeight, enPixelType, dst)
+        dst = get_output((nHeight, nWidth, 3))
+        return self.bayer_converter.convert(data, nWidth, nHeight, enPixelType, dst)
+
+
+# --- 性能测试 ---
+def _make_mono_payload(nWidth, nHeight, enPixelType, rng):
+    nBits = MONO_BITS[enPixelType]
+    nPixels = nWidth * nHeight
+    vals = rng.integers(0, 1 << nBits, nPixels, dtype=np.uint16)
+    if enPixelType not in MONO_PACKED:
+        return vals.astype("<u2").view(np.uint8), vals
+    nLowBits = nBits - 8
+    p0 = vals[0::2]
+    p1 = vals[1::2]
+    trip = np.empty((nPixels // 2, 3), dtype=np.uint8)
+    trip[:, 0] = p0 >> nLowBits
+    trip[:, 1] = (p0 & ((1 << nLowBits) - 1)) | ((p1 & ((1 << nLowBits) - 1)) << 4)
+    trip[:, 2] = p1 >> nLowBits
+    return trip.reshape(-1), vals
+
+
+def benchmark_mono(nWidth=2448, nHeight=2048, nRepeat=20):
+    """各格式、各输出模式的解包吞吐量 (同时校验结果正确性)"""
+    rng = np.random.default_rng(0)
+    modes = [
+        ("8bit 右移", lambda bits: MonoConverter(8)),
+        ("8bit LUT", lambda bits: MonoConverter(8, lut=make_gamma_lut(bits, 0.8))),
+        ("16bit", lambda bits: MonoConverter(16)),
+    ]
+    names = {
+        PixelType_Gvsp_Mono10: "Mono10",
+        PixelType_Gvsp_Mono10_Packed: "Mono10_Packed",
+        PixelType_Gvsp_Mono12: "Mono12",
+        PixelType_Gvsp_Mono12_Packed: "Mono12_Packed",
+    }
+    results = []
+    for enPixelType, name in names.items():
+        data, vals = _make_mono_payload(nWidth, nHeight, enPixelType, rng)
+        nBits = MONO_BITS[enPixelType]
+        for mode_name, factory in modes:
+            conv = factory(nBits)
+            out = np.empty((nHeight, nWidth, 1), dtype=conv.out_dtype())
+            conv.convert(data, nWidth, nHeight, enPixelType, out)  # 预热 + 分配中间缓冲
+            if conv.out_bits == 16:
+                expect = vals
+            elif conv.lut is not None:
+                expect = conv.lut[vals]
+            else:
+                expect = vals >> (nBits - 8)
+            assert np.array_equal(out.reshape(-1), expect), f"{name} {mode_name} 结果错误"
+
+            t0 = time.perf_counter()
+            for _ in range(nRepeat):
+                conv.convert(data, nWidth, nHeight, enPixelType, out)
+            dt = (time.perf_counter() - t0) / nRepeat
+            results.append((name, mode_name, dt * 1000, nWidth * nHeight / dt / 1e6, data.nbytes / dt / 1e6))
+
+    print(f"图像尺寸 {nWidth}x{nHeight}，每项重复 {nRepeat} 次")
+    print(f"{'格式':<16}{'模式':<12}{'ms/帧':>10}{'Mpix/s':>10}{'MB/s':>10}")
+    for name, mode_name, ms, mpix, mbs in results:
+        print(f"{name:<16}{mode_name:<12}{ms:>10.2f}{mpix:>10.1f}{mbs:>10.1f}")
+    return results
+
+
+def benchmark_bayer(nWidth=2448, nHeight=2048, nRepeat=20):
+    """各去马赛克质量档位的耗时 (8bit 与 12bit Packed 输入)"""
+    rng = np.random.default_rng(0)
+    raw8 = rng.integers(0, 256, nWidth * nHeight, dtype=np.uint8)
+    raw12p, _ = _make_mono_payload(nWidth, nHeight, PixelType_Gvsp_Mono12_Packed, rng)
+    inputs = [("BayerRG8", PixelType_Gvsp_BayerRG8, raw8),
+              ("BayerRG12_Packed", PixelType_Gvsp_BayerRG12_Packed, raw12p)]
+    results = []
+    for name, enPixelType, data in inputs:
+        for quality in DEMOSAIC_QUALITY:
+            conv = BayerConverter(quality)
+            out = np.empty((nHeight, nWidth, 3), dtype=np.uint8)
+            conv.convert(data, nWidth, nHeight, enPixelType, out)
+            t0 = time.perf_counter()
+            for _ in range(nRepeat):
+                conv.convert(data, nWidth, nHeight, enPixelType, out)
+            dt = (time.perf_counter() - t0) / nRepeat
+            results.append((name, quality, dt * 1000, nWidth * nHeight / dt / 1e6))
+
+        conv = BinnedBayerConverter()
+        out = np.empty(conv.out_shape(nWidth, nHeight), dtype=np.uint8)
+        conv.convert(data, nWidth, nHeight, enPixelType, out)
+        t0 = time.perf_counter()
+        for _ in range(nRepeat):
+            conv.convert(data, nWidth, nHeight, enPixelType, out)
+        dt = (time.perf_counter() - t0) / nRepeat
+        results.append((name, "binned", dt * 1000, nWidth * nHeight / dt / 1e6))
+
+    print(f"图像尺寸 {nWidth}x{nHeight}，每项重复 {nRepeat} 次")
+    print(f"{'格式':<20}{'质量':<10}{'ms/帧':>10}{'Mpix/s':>10}")
+    for name, quality, ms, mpix in results:
+        print(f"{name:<20}{quality:<10}{ms:>10.2f}{mpix:>10.1f}")
+    return results
+
+
+def _legacy_mono_numpy(data, nWidth, nHeight):
+    """旧版 Camera.Mono_numpy：为增加通道维度额外分配并拷贝一次"""
+    data_ = np.frombuffer(data, count=int(nWidth * nHeight), dtype=np.uint8, offset=0)
+    numArray = np.zeros([nHeight, nWidth, 1], "uint8")
+    numArray[:, :, 0] = data_.reshape(nHeight, nWidth)
+    return numArray
+
+
+def _legacy_color_numpy(data, nWidth, nHeight):
+    """旧版 Camera.Color_numpy：按 3 的步长拆出 R/G/B 后逐通道拷贝"""
+    data_ = np.frombuffer(data, count=int(nWidth * nHeight * 3), dtype=np.uint8, offset=0)
+    numArray = np.zeros([nHeight, nWidth, 3], "uint8")
+    numArray[:, :, 2] = data_[0:nWidth * nHeight * 3:3].reshape(nHeight, nWidth)
+    numArray[:, :, 1] = data_[1:nWidth * nHeight * 3:3].reshape(nHeight, nWidth)
+    numArray[:, :, 0] = data_[2:nWidth * nHeight * 3:3].reshape(nHeight, nWidth)
+    return numArray
+
+
+def benchmark_dispatch(nWidth=2448, nHeight=2048, nRepeat=20):
+    """
+    新旧转换路径对比。旧版中除 Mono8/RGB8 外的格式都先经 SDK 转成 RGB8 再走 Color_numpy，
+    SDK 部分在此无法计时，因此"旧版"一栏只统计 Color_numpy 这一步 (真实耗时只会更高)。
+    """
+    rng = np.random.default_rng(0)
+    nPixels = nWidth * nHeight
+    formats = [
+        ("Mono8", PixelType_Gvsp_Mono8, 1, _legacy_mono_numpy),
+        ("RGB8", PixelType_Gvsp_RGB8_Packed, 3, _legacy_color_numpy),
+        ("BGR8", PixelType_Gvsp_BGR8_Packed, 3, _legacy_color_numpy),
+        ("BGRA8", PixelType_Gvsp_BGRA8_Packed, 4, _legacy_color_numpy),
+        ("RGBA8", PixelType_Gvsp_RGBA8_Packed, 4, _legacy_color_numpy),
+        ("YUV422", PixelType_Gvsp_YUV422_Packed, 2, _legacy_color_numpy),
+    ]
+    conv = FrameConverter()
+    outputs = {}
+
+    def get_output(shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype))
+        if key not in outputs:
+            outputs[key] = np.empty(shape, dtype=dtype)
+        return outputs[key]
+
+    def timeit(func):
+        func()
+        t0 = time.perf_counter()
+        for _ in range(nRepeat):
+            func()
+        return (time.perf_counter() - t0) / nRepeat * 1000
+
+    results = []
+    rgb = rng.integers(0, 256, nPixels * 3, dtype=np.uint8)
+    for name, enPixelType, nBytes, legacy in formats:
+        data = rng.integers(0, 256, nPixels * nBytes, dtype=np.uint8)
+        legacy_src = data if nBytes == 1 else rgb
+        t_old = timeit(lambda: legacy(legacy_src, nWidth, nHeight))
+        t_new = timeit(lambda: conv.convert(data, nWidth, nHeight, enPixelType, get_output))
+        results.append((name, t_old, t_new))
+
+    print(f"图像尺寸 {nWidth}x{nHeight}，每项重复 {nRepeat} 次 (单位 ms/帧)")
+    print(f"{'格式':<10}{'旧版':>10}{'分发表':>10}{'加速比':>10}")
+    for name, t_old, t_new in results:
+        print(f"{name:<10}{t_old:>10.2f}{t_new:>10.3f}{t_old / max(t_new, 1e-6):>10.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_mono()
+    benchmark_bayer()
+    benchmark_dispatch()
@@ -0,0 +1,293 @@
+# -- coding: utf-8 --
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import cv2 as cv
+
+from .CameraBase import CameraBase, TRIGGER_OFF, trigger_mode_of
+from .FrameBuffer import FrameInfo, FramePool
+from .FrameRecorder import FrameReader
+from .PixelConvert import BayerConverter, FrameConverter
+
+# 海康 GVSP 的 BGR8 像素类型值，帧信息与真实相机保持一致 (不导入 SDK)
+PixelType_Gvsp_BGR8_Packed = 0x02180015
+MV_E_NODATA = 0x80000007   # 与 SDK 错误码一致：无数据 (超时或播放结束)
+
+SIM_SOURCE_SYNTHETIC = "synthetic"   # 程序生成的彩色矩形场景
+SIM_SOURCE_FOLDER = "folder"         # 目录中的图片依次播放
+SIM_SOURCE_VIDEO = "video"           # 视频文件
+SIM_SOURCE_RECORDING = "recording"   # FrameRecorder 录制的原始帧 (按原像素格式重新转换)
+
+IMAGE_SUFFIXES = (".bmp", ".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+# 合成场景中的色块 (BGR)：默认 config.yaml 黄色任务 HSV 区间的中点，以及一个红色块
+DEFAULT_SCENE_COLORS = [(125, 143, 94), (43, 43, 200)]
+
+
+class SimCamera(CameraBase):
+    """
+    模拟相机：与 Camera 相同的取图接口 (getCameraData / grab_frame / start_stream ...)，
+    帧来自图片目录、视频文件或合成场景，按设定帧率输出 BGR8，用于无相机环境下的吞吐/延迟测试；
+    也可以回放 FrameRecorder 录制的原始帧，与真实相机走同一套像素格式转换，用于复现误检。
+    cam_cfg['sim'] 配置项：
+        source: synthetic / folder / video / recording
+        path: 图片目录、视频文件或环形录制文件 (source 为 folder / video / recording 时)
+        width / height: 输出分辨率，图片尺寸不同时缩放
+        fps: 帧率，0 表示不限速 (触发模式下每次触发出一帧，不受帧率限制)
+        loop: 播放完是否从头循环 (默认 true)
+        colors: 合成场景的色块颜色列表 (BGR)
+    camera.roi 与真实相机相同，输出图像裁为 ROI 区域并记录偏移；回放录制文件时使用录制时的 ROI 偏移。
+    """
+
+    def __init__(self, cam_cfg=None, nPoolSize=4):
+        super().__init__(cam_cfg, nPoolSize)
+        sim_cfg = self.cam_cfg.get('sim') or {}
+        self.source = sim_cfg.get('source', SIM_SOURCE_SYNTHETIC)
+        self.path = sim_cfg.get('path')
+        # 传感器尺寸；配置了 camera.roi 时输出图像只包含 ROI 区域
+        self.nSensorWidth = int(sim_cfg.get('width', 1280))
+        self.nSensorHeight = int(sim_cfg.get('height', 1024))
+        self.nWidth, self.nHeight = self._apply_roi()
+        self.fps = float(sim_cfg.get('fps', 30))
+        self.loop = bool(sim_cfg.get('loop', True))
+        self.scene_colors = [tuple(c) for c in sim_cfg.get('colors', DEFAULT_SCENE_COLORS)]
+        self.serial = f"SIM-{self.source}"
+        self.nPayloadSize = self.nWidth * self.nHeight * 3
+
+        self._nFrameNum = 0
+        self._next_time = 0.0
+        self._files = []
+        self._capture = None
+        self._scratch = None   # 尺寸不符时的解码缓冲，缩放后写入池中
+        self._full = None      # 启用 ROI 时整幅画面的缓冲，从中裁出 ROI
+        self._reader = None    # 回放录制文件
+        self._nReplay = 0      # 下一帧在录制文件中的序号
+        self._trigger_event = threading.Event()
+        self.trigger_mode = trigger_mode_of(self.cam_cfg)[0]
+
+        print(f"正在初始化模拟相机 ({self.source})...")
+        self._open_source()
+
+    def _apply_roi(self):
+        roi_cfg = self.cam_cfg.get('roi')
+        if not roi_cfg or self.source == SIM_SOURCE_RECORDING:
+            return self.nSensorWidth, self.nSensorHeight
+        x = min(max(0, int(roi_cfg.get('x', 0))), self.nSensorWidth - 1)
+        y = min(max(0, int(roi_cfg.get('y', 0))), self.nSensorHeight - 1)
+        w = min(int(roi_cfg.get('width') or self.nSensorWidth), self.nSensorWidth - x)
+        h = min(int(roi_cfg.get('height') or self.nSensorHeight), self.nSensorHeight - y)
+        self.roi = {"OffsetX": x, "OffsetY": y, "Width": w, "Height": h}
+        self.roi_offset = (x, y)
+        return w, h
+
+    def _open_source(self):
+        if self.source == SIM_SOURCE_FOLDER:
+            folder = Path(self.path or ".")
+            self._files = sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES) if folder.is_dir() else []
+            if not self._files:
+                print(f"模拟相机：目录中没有图片 -> {folder}")
+                return
+        elif self.source == SIM_SOURCE_VIDEO:
+            self._capture = cv.VideoCapture(str(self.path))
+            if not self._capture.isOpened():
+                print(f"模拟相机：无法打开视频 -> {self.path}")
+                self._capture = None
+                return
+        elif self.source == SIM_SOURCE_RECORDING:
+            try:
+                self._reader = FrameReader(self.path)
+            except (OSError, ValueError) as e:
+                print(f"模拟相机：无法打开录制文件 -> {self.path} ({e})")
+                return
+            if len(self._reader) == 0:
+                print(f"模拟相机：录制文件中没有帧 -> {self.path}")
+                return
+            # 与 Camera 相同的转换设置，回放结果与现场一致
+            self.converter = FrameConverter(
+                bayer_converter=BayerConverter(self.cam_cfg.get('demosaic', 'bilinear'), counter=self.alloc_counter),
+                binning=bool(self.cam_cfg.get('binning', False)),
+                counter=self.alloc_counter)
+            self.nPayloadSize = self._reader.nSlotSize
+        elif self.source == SIM_SOURCE_SYNTHETIC:
+            self._background = np.full((self.nHeight, self.nWidth, 3), 90, dtype=np.uint8)
+        else:
+            print(f"模拟相机：未知的帧来源 {self.source}")
+            return
+
+        self.pool = FramePool(self.nPayloadSize, self.nPoolSize, self.alloc_counter)
+        self._next_time = time.perf_counter()
+        self.is_open = True
+        print("模拟相机初始化成功")
+
+    def _grab_once(self, nTimeout):
+        lease = self.pool.acquire()
+        if lease is None:
+            return None, None
+
+        with self._grab_lock:
+            if self.trigger_mode != TRIGGER_OFF:
+                # 模拟相机没有 I/O 线，软/硬触发都由 _send_trigger() 触发
+                if not self._trigger_event.wait(nTimeout / 1000.0):
+                    lease.release()
+                    return None, MV_E_NODATA
+                self._trigger_event.clear()
+            elif self.fps > 0:
+                # 按帧率节拍出帧，模拟曝光+传输的等待
+                wait = self._next_time - time.perf_counter()
+                if wait > nTimeout / 1000.0:
+                    time.sleep(nTimeout / 1000.0)
+                    lease.release()
+                    return None, MV_E_NODATA
+                if wait > 0:
+                    time.sleep(wait)
+                self._next_time = max(self._next_time + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+            if self._reader is not None:
+                if not self._replay_into(lease):
+                    lease.release()
+                    return None, MV_E_NODATA
+                return lease, 0
+
+            lease.frame_len = self.nPayloadSize
+            image = lease.data.reshape(self.nHeight, self.nWidth, 3)
+            if not self._render(image):
+                lease.release()
+                return None, MV_E_NODATA
+
+            self._nFrameNum += 1
+            lease.frame_id = self._nFrameNum
+            lease.timestamp = time.time()
+            lease.width = self.nWidth
+            lease.height = self.nHeight
+            lease.pixel_type = PixelType_Gvsp_BGR8_Packed
+            info = lease.info
+            info.clear()
+            info.frame_num = lease.frame_id
+            info.host_timestamp = int(lease.timestamp * 1000)
+            info.recv_time = lease.timestamp
+            info.width = self.nWidth
+            info.height = self.nHeight
+            info.pixel_type = lease.pixel_type
+            info.frame_len = lease.frame_len
+            lease.image = image
+            lease.scale = self._update_scale(image, self.nWidth)
+            lease.offset = self.roi_offset
+        return lease, 0
+
+    def _replay_into(self, lease):
+        """
+        把录制文件中的下一帧原始数据拷入 lease 并转换。
+        帧号、相机时间戳、曝光等沿用录制值；host_timestamp / recv_time 取回放时刻，延迟统计仍然有效。
+        """
+        for _ in range(len(self._reader)):
+            if self._nReplay >= len(self._reader):
+                if not self.loop:
+                    return False
+                self._nReplay = 0
+            frame = self._reader.read(self._nReplay)
+            self._nReplay += 1
+            if frame is not None:
+                break
+        else:
+            return False
+        data, recorded, offset = frame
+
+        lease.frame_len = len(data)
+        np.copyto(lease.data, data)
+        self._nFrameNum += 1
+        lease.frame_id = self._nFrameNum
+        lease.timestamp = time.time()
+        lease.width = recorded.width
+        lease.height = recorded.height
+        lease.pixel_type = recorded.pixel_type
+        info = lease.info
+        for name in FrameInfo.__slots__:
+            setattr(info, name, getattr(recorded, name))
+        info.host_timestamp = int(lease.timestamp * 1000)
+        info.recv_time = lease.timestamp
+
+        image = self.converter.convert(lease.data, recorded.width, recorded.height, recorded.pixel_type, lease.output)
+        if image is None:
+            print(f"模拟相机：不支持的像素格式 0x{recorded.pixel_type:x}")
+            return False
+        lease.image = image
+        lease.scale = self._update_scale(image, recorded.width)
+        lease.offset = self.roi_offset = offset
+        self.nWidth, self.nHeight = recorded.width, recorded.height
+        return True
+
+    def _render(self, image):
+        """把下一帧写入 image (池内存)，无帧可出时返回 False"""
+        if self.source == SIM_SOURCE_SYNTHETIC:
+            self._draw_scene(image, self._nFrameNum)
+            return True
+        if self.source == SIM_SOURCE_FOLDER:
+            path = self._files[self._nFrameNum % len(self._files)]
+            if self._nFrameNum >= len(self._files) and not self.loop:
+                return False
+            # 文件名可能含中文，cv.imread 在 Windows 下读不了，改用 imdecode
+            src = cv.imdecode(np.fromfile(str(path), dtype=np.uint8), cv.IMREAD_COLOR)
+            if src is None:
+                return False
+            self._fit_into(src, image)
+            return True
+
+        ret, src = self._capture.read(self._scratch)
+        if not ret and self.loop:
+            self._capture.set(cv.CAP_PROP_POS_FRAMES, 0)
+            ret, src = self._capture.read(self._scratch)
+        if not ret:
+            return False
+        self._scratch = src
+        self._fit_into(src, image)
+        return True
+
+    def _fit_into(self, src, image):
+        if self.roi is not None:
+            # 先缩放到传感器尺寸，再裁出 ROI
+            if src.shape[:2] != (self.nSensorHeight, self.nSensorWidth):
+                if self._full is None:
+                    self._full = np.empty((self.nSensorHeight, self.nSensorWidth, 3), dtype=np.uint8)
+                src = cv.resize(src, (self.nSensorWidth, self.nSensorHeight), dst=self._full)
+            x, y = self.roi_offset
+            np.copyto(image, src[y:y + self.nHeight, x:x + self.nWidth])
+        elif src.shape[:2] == image.shape[:2]:
+            np.copyto(image, src)
+        else:
+            cv.resize(src, (self.nWidth, self.nHeight), dst=image)
+
+    def _draw_scene(self, image, nFrame):
+        """灰色背景上若干缓慢移动的彩色矩形，尺寸约为画面宽度的 1/8"""
+        np.copyto(image, self._background)
+        # 色块位置按整幅传感器计算，再平移到 ROI 坐标 (超出部分由 rectangle 自动裁掉)
+        w, h = self.nSensorWidth, self.nSensorHeight
+        ox, oy = self.roi_offset
+        size = max(8, w // 8)
+        for k, color in enumerate(self.scene_colors):
+            span = max(1, w - size)
+            x = int((nFrame * 4 + k * span // max(1, len(self.scene_colors))) % span) - ox
+            y = int((h - size) * (k + 1) / (len(self.scene_colors) + 1)) - oy
+            cv.rectangle(image, (x, y), (x + size, y + size // 2), color, -1)
+
+    def _send_trigger(self):
+        self._trigger_event.set()
+        return 0
+
+    def _flush_stale(self):
+        self._trigger_event.clear()
+
+    def grab_zero_copy(self, nTimeout=1000):
+        """与 Camera 接口一致；模拟帧本就在缓冲池中，直接返回 FrameLease"""
+        return self.grab_frame(nTimeout)
+
+    def _close_device(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
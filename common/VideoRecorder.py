@@ -0,0 +1,189 @@
+# -- coding: utf-8 --
+"""
+后台视频录制：取流线程只把图像拷入预分配的槽位并放入有界队列，编码 (cv.VideoWriter) 在单独线程中进行。
+编码跟不上时直接丢帧 (计入 nDropped)，不会阻塞取流，也不占用相机缓冲池的槽位。
+
+    recorder = VideoRecorder("run.mp4", fps=30, annotate=draw_frame_info)
+    recorder.attach(camera)        # 录制后台取流的每一帧 (camera.add_sink)
+    recorder.submit(image_draw)    # 或者提交任意图像，如检测结果的标注图
+    ...
+    recorder.close()               # 编完队列中剩余的帧再关闭文件
+
+annotate(frame) 在编码线程中调用，frame.image 是录制器自己的拷贝，可以直接在上面绘制；
+frame.info / frame.offset / frame.scale 与 FrameLease 同名属性含义相同。
+录制的是转换后的图像 (BGR / 黑白)，原始 Bayer 数据请用 FrameRecorder。
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2 as cv
+import numpy as np
+
+from .FrameBuffer import FrameInfo, LatencyStats, RateCounter
+
+
+class _VideoSlot:
+    """队列中的一帧：图像拷贝 + 元数据，循环复用"""
+
+    __slots__ = ("image", "info", "offset", "scale")
+
+    def __init__(self):
+        self.image = None
+        self.info = FrameInfo()
+        self.offset = (0, 0)
+        self.scale = 1.0
+
+
+def draw_frame_info(frame):
+    """默认标注：左上角写帧号和帧到达时间"""
+    info = frame.info
+    stamp = info.host_timestamp / 1000.0 if info.host_timestamp else info.recv_time
+    text = f"#{info.frame_num}  {time.strftime('%H:%M:%S', time.localtime(stamp))}.{int(stamp * 1000) % 1000:03d}"
+    cv.putText(frame.image, text, (10, 30), cv.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv.LINE_AA)
+
+
+class VideoRecorder:
+    """
+    path: 输出文件 (.mp4 / .avi)；fps: 写入文件的帧率；fourcc: 编码器四字符码
+    nQueueSize: 等待编码的最大帧数，也是预分配的图像拷贝数 (另加一个正在编码的)
+    annotate: 可选的标注函数，见模块说明
+    """
+
+    def __init__(self, path, fps=30.0, fourcc="mp4v", nQueueSize=8, annotate=None):
+        self.path = str(path)
+        self.fps = float(fps)
+        self.fourcc = fourcc
+        self.annotate = annotate
+        self.nQueueSize = max(1, int(nQueueSize))
+        self._free = deque(_VideoSlot() for _ in range(self.nQueueSize + 1))
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._writer = None
+        self._frame_shape = None
+        self._camera = None
+
+        self.nSubmitted = 0
+        self.nWritten = 0
+        self.nDropped = 0          # 编码跟不上 (没有空闲槽位) 而丢弃的帧
+        self.nSizeMismatch = 0     # 尺寸与第一帧不同而丢弃的帧
+        self.encode_counter = RateCounter()
+        self.encode_time = LatencyStats()
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    # --- 生产者 (取流线程) ---
+    def write(self, lease):
+        """camera.add_sink 的消费者：拷贝 lease.image，返回 False 表示该帧被丢弃"""
+        if lease.image is None:
+            return False
+        return self._enqueue(lease.image, lease.info, lease.offset, lease.scale)
+
+    __call__ = write
+
+    def submit(self, image, info=None, offset=(0, 0), scale=1.0):
+        """提交任意图像 (如标注后的检测结果)，同样不阻塞"""
+        return self._enqueue(image, info, offset, scale)
+
+    def _enqueue(self, image, info, offset, scale):
+        with self._cond:
+            if not self._running:
+                return False
+            self.nSubmitted += 1
+            if not self._free:
+                self.nDropped += 1
+                return False
+            slot = self._free.popleft()
+        # 拷贝在锁外进行；槽位的图像缓冲尺寸不变时复用
+        if slot.image is None or slot.image.shape != image.shape or slot.image.dtype != image.dtype:
+            slot.image = np.empty_like(image)
+        np.copyto(slot.image, image)
+        if info is not None:
+            for name in FrameInfo.__slots__:
+                setattr(slot.info, name, getattr(info, name))
+        else:
+            slot.info.clear()
+            slot.info.recv_time = time.time()
+        slot.offset = offset
+        slot.scale = scale
+        with self._cond:
+            self._queue.append(slot)
+            self._cond.notify_all()
+        return True
+
+    def attach(self, camera):
+        self.detach()
+        self._camera = camera
+        camera.add_sink(self.write)
+
+    def detach(self):
+        if self._camera is not None:
+            self._camera.remove_sink(self.write)
+            self._camera = None
+
+    # --- 编码线程 ---
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                slot = self._queue.popleft()
+            t0 = time.perf_counter()
+            try:
+                self._encode(slot)
+            except Exception as e:
+                print(f"视频编码异常: {e}")
+            self.encode_time.add(time.perf_counter() - t0)
+            with self._cond:
+                self._free.append(slot)
+                self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    def _encode(self, slot):
+        image = slot.image
+        if self.annotate is not None:
+            self.annotate(slot)
+        if self._writer is None:
+            nHeight, nWidth = image.shape[:2]
+            bColor = image.ndim == 3 and image.shape[2] == 3
+            self._writer = cv.VideoWriter(self.path, cv.VideoWriter_fourcc(*self.fourcc), self.fps,
+                                          (nWidth, nHeight), bColor)
+            if not self._writer.isOpened():
+                print(f"无法创建视频文件: {self.path} (fourcc={self.fourcc})")
+            self._frame_shape = image.shape
+        if image.shape != self._frame_shape:
+            # VideoWriter 的尺寸在创建时确定，中途变化 (如重连后 ROI 改变) 的帧无法写入
+            self.nSizeMismatch += 1
+            return
+        self._writer.write(image)
+        self.nWritten += 1
+        self.encode_counter.add()
+
+    # --- 统计与关闭 ---
+    def get_stats(self):
+        return {
+            "path": self.path,
+            "submitted": self.nSubmitted,
+            "written": self.nWritten,
+            "dropped": self.nDropped,
+            "size_mismatch": self.nSizeMismatch,
+            "queue_len": len(self._queue),
+            "encode_fps": self.encode_counter.per_second(),
+            "encode_fps_avg": round(self.nWritten / max(1e-6, time.perf_counter() - self._t0), 2),
+            "encode_ms": self.encode_time.summary(),
+        }
+
+    def close(self, timeout=10.0):
+        """停止接收新帧，等待队列中的帧编码完成后关闭文件"""
+        self.detach()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,367 @@
+import sys
+import time
+import copy
+import argparse
+import tempfile
+import statistics
+
+import cv2
+import numpy as np
+
+import main
+from main import (ConfigManager, fix_iccp_warning, prepare_frame, color_mask, run_detection_once,
+                  run_detection_multi, locate_target)
+from color_lut import ColorLUT
+from tracker import TargetTracker
+from common.CameraRegistry import create_camera
+
+# --- 检测性能对比 ---
+# 同一组帧分别走 旧流程 (fix_iccp_warning：JPEG 编解码) 和 新流程 (prepare_frame：直接使用相机帧)，
+# 对比预处理耗时、整次检测耗时，以及检测结果 (是否找到、中心坐标) 和 HSV 掩膜的差异。
+#
+#   python benchmark.py                              # 模拟相机合成场景
+#   python benchmark.py --recording frames.ring      # FrameRecorder 录制的现场原始帧
+#   python benchmark.py --folder ./test_images --task red --max-delta 2
+#   python benchmark.py --multi                      # 多颜色：逐个颜色检测 与 run_detection_multi 一次检测 对比
+#   python benchmark.py --lut --bits 5 6 7           # 颜色分割：HSV + inRange 与 BGR 查表 (color_lut.py) 的耗时和精度对比
+#   python benchmark.py --pyramid --levels 1 2 3     # 金字塔检测：各 pyramid_level 与全分辨率检测的耗时和测量差异
+#   python benchmark.py --track --margins 0.25 0.5 1 # 帧间跟踪：按顺序处理各帧，对比整幅搜索与跟踪窗口搜索
+#
+# 指定 --max-delta 时作为一致性检查：任一帧 找到/未找到 不一致或中心偏差超过该值 (像素) 时返回码为 1
+# (--lut / --pyramid / --track 时比较的是与 HSV 分割 / 全分辨率检测 / 整幅搜索的结果)。
+
+
+def load_frames(cam_cfg, nFrames):
+    """从模拟相机 (合成场景 / 图片目录 / 录制文件) 取 nFrames 帧，返回 [(image, scale, offset), ...]"""
+    camera = create_camera(cam_cfg)
+    frames = []
+    try:
+        if not camera.is_open:
+            return frames
+        while len(frames) < nFrames:
+            lease = camera.grab_frame(1000)
+            if lease is None:
+                break
+            with lease:
+                frames.append((lease.image.copy(), lease.scale, lease.offset))
+    finally:
+        camera.CloseCamera()
+    return frames
+
+
+def _time_ms(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - t0) * 1000.0
+
+
+def compare(frames, cfg, task):
+    param = cfg['colors'][task]
+    rows = []
+    for image, scale, offset in frames:
+        row = {}
+        for name, prep in (("legacy", fix_iccp_warning), ("fast", prepare_frame)):
+            prepared, prep_ms = _time_ms(prep, image)
+            (path, cx, cy), detect_ms = _time_ms(run_detection_once, prepared, cfg, scale, offset)
+            hsv = cv2.cvtColor(prepared, cv2.COLOR_BGR2HSV)
+            row[name] = {
+                "prep_ms": prep_ms,
+                "total_ms": prep_ms + detect_ms,
+                "found": path not in (None, "", "NOT_FOUND"),
+                "center": (cx, cy),
+                "mask": color_mask(hsv, param),
+            }
+        rows.append(row)
+    return rows
+
+
+def report(rows, max_delta=None):
+    def med(name, key):
+        return statistics.median(r[name][key] for r in rows)
+
+    print(f"共 {len(rows)} 帧 (中位数)")
+    print(f"{'':<10}{'预处理 ms':>12}{'预处理+检测 ms':>16}")
+    for name, label in (("legacy", "JPEG 往返"), ("fast", "直接使用")):
+        print(f"{label:<10}{med(name, 'prep_ms'):>12.2f}{med(name, 'total_ms'):>16.2f}")
+    saved = med("legacy", "total_ms") - med("fast", "total_ms")
+    print(f"每帧节省 {saved:.2f} ms")
+
+    nMismatch = 0
+    deltas = []
+    mask_diff = []
+    for r in rows:
+        a, b = r["legacy"], r["fast"]
+        if a["found"] != b["found"]:
+            nMismatch += 1
+        elif a["found"]:
+            deltas.append(float(np.hypot(a["center"][0] - b["center"][0], a["center"][1] - b["center"][1])))
+        mask_diff.append(np.count_nonzero(a["mask"] != b["mask"]) / a["mask"].size * 100.0)
+
+    print(f"找到/未找到不一致: {nMismatch} 帧")
+    if deltas:
+        print(f"中心偏差 (像素): 平均 {statistics.mean(deltas):.2f}，最大 {max(deltas):.2f}")
+    print(f"HSV 掩膜不同的像素: 平均 {statistics.mean(mask_diff):.3f}%，最大 {max(mask_diff):.3f}%")
+
+    if max_delta is None:
+        return True
+    ok = nMismatch == 0 and all(d <= max_delta for d in deltas)
+    print("一致性检查: " + ("PASS" if ok else f"FAIL (允许中心偏差 {max_delta} 像素)"))
+    return ok
+
+
+def compare_multi(frames, cfg, tasks):
+    """每帧先逐个颜色调用 run_detection_once (各自转换 HSV)，再调用一次 run_detection_multi"""
+    rows = []
+    for image, scale, offset in frames:
+        image = prepare_frame(image)
+        t0 = time.perf_counter()
+        single = {}
+        for name in tasks:
+            cfg['system']['current_task'] = name
+            path, cx, cy = run_detection_once(image, cfg, scale, offset)
+            single[name] = {"found": path not in (None, "", "NOT_FOUND"), "center": (cx, cy)}
+        single_ms = (time.perf_counter() - t0) * 1000.0
+        cfg['system']['current_task'] = "all"
+        _, multi, timing = run_detection_multi(image, cfg, scale, offset, tasks)
+        rows.append({"single_ms": single_ms, "single": single, "multi": multi, "timing": timing})
+    return rows
+
+
+def report_multi(rows, tasks):
+    print(f"共 {len(rows)} 帧，颜色 {tasks} (中位数)")
+    single_ms = statistics.median(r["single_ms"] for r in rows)
+    multi_ms = statistics.median(r["timing"]["total_ms"] for r in rows)
+    print(f"逐个颜色检测 {single_ms:.2f} ms，一次检测 {multi_ms:.2f} ms，每帧节省 {single_ms - multi_ms:.2f} ms")
+    stages = [k for k in rows[0]["timing"] if k != "total_ms"]
+    print("  " + "，".join(f"{k[:-3]} {statistics.median(r['timing'][k] for r in rows):.2f}" for k in stages))
+    nDiff = sum(1 for r in rows for name in tasks if r["single"][name] != r["multi"].get(name))
+    print("结果一致性: " + ("PASS" if nDiff == 0 else f"FAIL ({nDiff} 处不同)"))
+    return nDiff == 0
+
+
+def compare_lut(frames, cfg, bits_list):
+    """
+    每个 bits 建一张查表：记录建表耗时、表大小和整个 BGR 立方体上的误差；
+    每帧交替计时 HSV 分割 (cvtColor + 各颜色 inRange) 与查表分割 (查表 + 各颜色取掩膜)，
+    统计掩膜不同的像素比例，并比较两种分割下 run_detection_multi 的检测结果。
+    """
+    colors = cfg['colors']
+    names = list(colors)
+    luts = {}
+    for bits in bits_list:
+        lut, build_ms = _time_ms(ColorLUT, colors, bits)
+        luts[bits] = {"lut": lut, "build_ms": build_ms, "seg_ms": [], "diff": {name: [] for name in names},
+                      "mismatch": 0, "deltas": []}
+    hsv_ms = []
+    for image, scale, offset in frames:
+        image = prepare_frame(image)
+        t0 = time.perf_counter()
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        ref = {name: color_mask(hsv, colors[name]) for name in names}
+        hsv_ms.append((time.perf_counter() - t0) * 1000.0)
+        cfg['system']['segmentation'] = 'hsv'
+        _, ref_result, _ = run_detection_multi(image, cfg, scale, offset, names)
+
+        for bits, row in luts.items():
+            lut = row["lut"]
+            t0 = time.perf_counter()
+            label = lut.segment(image)
+            masks = {name: lut.mask(label, name) for name in names}
+            row["seg_ms"].append((time.perf_counter() - t0) * 1000.0)
+            for name in names:
+                row["diff"][name].append(np.count_nonzero(masks[name] != ref[name]) / label.size * 100.0)
+
+            cfg['system'].update(segmentation='lut', lut_bits=bits)
+            _, result, _ = run_detection_multi(image, cfg, scale, offset, names)
+            for name in names:
+                a, b = ref_result[name], result[name]
+                if a["found"] != b["found"]:
+                    row["mismatch"] += 1
+                elif a["found"]:
+                    row["deltas"].append(float(np.hypot(a["center"][0] - b["center"][0],
+                                                        a["center"][1] - b["center"][1])))
+    cfg['system']['segmentation'] = 'hsv'
+    return hsv_ms, luts
+
+
+def report_lut(hsv_ms, luts, nFrames, max_delta=None):
+    names = list(next(iter(luts.values()))["lut"].names)
+    print(f"共 {nFrames} 帧，颜色 {names} (耗时为中位数，含取出每个颜色的掩膜)")
+    print(f"HSV + inRange: {statistics.median(hsv_ms):.2f} ms")
+    ok = True
+    for bits, row in luts.items():
+        lut = row["lut"]
+        print(f"查表 bits={bits}: {statistics.median(row['seg_ms']):.2f} ms，"
+              f"表 {lut.nbytes // 1024} KB，建表 {row['build_ms']:.0f} ms")
+        for name in names:
+            print(f"  {name:<10} 立方体误差 {lut.cube_error[name]:.3f}%，"
+                  f"帧内掩膜不同 平均 {statistics.mean(row['diff'][name]):.3f}% 最大 {max(row['diff'][name]):.3f}%")
+        line = f"  检测结果：找到/未找到不一致 {row['mismatch']} 处"
+        if row["deltas"]:
+            line += f"，中心偏差 平均 {statistics.mean(row['deltas']):.2f} 最大 {max(row['deltas']):.2f} 像素"
+        print(line)
+        if max_delta is not None:
+            ok = ok and row["mismatch"] == 0 and all(d <= max_delta for d in row["deltas"])
+    if max_delta is not None:
+        print("一致性检查: " + ("PASS" if ok else f"FAIL (允许中心偏差 {max_delta} 像素)"))
+    return ok
+
+
+def _measure(cnt, cfg, scale):
+    """目标轮廓的 minAreaRect 测量：中心 (像素) 和长、宽 (mm)"""
+    (cx, cy), (dim1, dim2), _ = cv2.minAreaRect(cnt)
+    ppm = cfg['system'].get('pixels_per_mm', 1.0)
+    if ppm <= 0: ppm = 1.0
+    ppm = ppm * scale
+    return cx, cy, max(dim1, dim2) / ppm, min(dim1, dim2) / ppm
+
+
+def compare_pyramid(frames, cfg, task, levels):
+    """每帧交替计时全分辨率 locate_target 与各 pyramid_level 的 locate_target，比较找到与否和测量结果"""
+    rows = []
+    for image, scale, offset in frames:
+        image = prepare_frame(image)
+        row = {}
+        for level in [0] + list(levels):
+            cfg['system']['pyramid_level'] = level
+            cnt, ms = _time_ms(locate_target, image, cfg, task, scale)
+            row[level] = {"ms": ms, "measure": None if cnt is None else _measure(cnt, cfg, scale)}
+        rows.append(row)
+    cfg['system']['pyramid_level'] = 0
+    return rows
+
+
+def report_pyramid(rows, levels, max_delta=None):
+    full_ms = statistics.median(r[0]["ms"] for r in rows)
+    print(f"共 {len(rows)} 帧 (耗时为中位数，分割 + 开运算 + 找轮廓)")
+    print(f"全分辨率: {full_ms:.2f} ms")
+    ok = True
+    for level in levels:
+        ms = statistics.median(r[level]["ms"] for r in rows)
+        nMismatch = 0
+        deltas, len_deltas, wid_deltas = [], [], []
+        for r in rows:
+            a, b = r[0]["measure"], r[level]["measure"]
+            if (a is None) != (b is None):
+                nMismatch += 1
+            elif a is not None:
+                deltas.append(float(np.hypot(a[0] - b[0], a[1] - b[1])))
+                len_deltas.append(abs(a[2] - b[2]))
+                wid_deltas.append(abs(a[3] - b[3]))
+        print(f"pyramid_level={level} (缩小 {1 << level} 倍): {ms:.2f} ms，加速 {full_ms / max(ms, 1e-6):.2f} 倍，"
+              f"找到/未找到不一致 {nMismatch} 帧")
+        if deltas:
+            print(f"  中心偏差 最大 {max(deltas):.2f} 像素，长度偏差 最大 {max(len_deltas):.3f} mm，"
+                  f"宽度偏差 最大 {max(wid_deltas):.3f} mm")
+        if max_delta is not None:
+            ok = ok and nMismatch == 0 and all(d <= max_delta for d in deltas)
+    if max_delta is not None:
+        print("一致性检查: " + ("PASS" if ok else f"FAIL (允许中心偏差 {max_delta} 像素)"))
+    return ok
+
+
+def compare_track(frames, cfg, task, margins, min_margin):
+    """按帧顺序，每帧先整幅搜索，再用各 margin 的跟踪器搜索 (跟踪器在帧间保持状态)"""
+    trackers = {margin: TargetTracker(margin, min_margin) for margin in margins}
+    rows = []
+    for image, scale, offset in frames:
+        image = prepare_frame(image)
+        cnt, ms = _time_ms(locate_target, image, cfg, task, scale)
+        row = {None: {"ms": ms, "measure": None if cnt is None else _measure(cnt, cfg, scale)}}
+        for margin, tracker in trackers.items():
+            cnt, ms = _time_ms(locate_target, image, cfg, task, scale, tracker)
+            row[margin] = {"ms": ms, "measure": None if cnt is None else _measure(cnt, cfg, scale)}
+        rows.append(row)
+    return rows, trackers
+
+
+def report_track(rows, trackers, max_delta=None):
+    full_ms = statistics.median(r[None]["ms"] for r in rows)
+    print(f"共 {len(rows)} 帧 (耗时为中位数)")
+    print(f"整幅搜索: {full_ms:.2f} ms")
+    ok = True
+    for margin, tracker in trackers.items():
+        ms = statistics.median(r[margin]["ms"] for r in rows)
+        mean_ms = statistics.mean(r[margin]["ms"] for r in rows)
+        nMismatch = 0
+        deltas = []
+        for r in rows:
+            a, b = r[None]["measure"], r[margin]["measure"]
+            if (a is None) != (b is None):
+                nMismatch += 1
+            elif a is not None:
+                deltas.append(float(np.hypot(a[0] - b[0], a[1] - b[1])))
+        stats = tracker.get_stats()
+        print(f"margin={margin}: {ms:.2f} ms (平均 {mean_ms:.2f})，加速 {full_ms / max(ms, 1e-6):.2f} 倍，"
+              f"命中 {stats['hits']} / 未命中 {stats['misses']} / 截断 {stats['clipped']} / 丢失 {stats['lost']}，"
+              f"命中率 {stats['hit_rate']}")
+        line = f"  找到/未找到不一致 {nMismatch} 帧"
+        if deltas:
+            line += f"，中心偏差 最大 {max(deltas):.2f} 像素"
+        print(line)
+        if max_delta is not None:
+            ok = ok and nMismatch == 0 and all(d <= max_delta for d in deltas)
+    if max_delta is not None:
+        print("一致性检查: " + ("PASS" if ok else f"FAIL (允许中心偏差 {max_delta} 像素)"))
+    return ok
+
+
+def benchmark_entry():
+    parser = argparse.ArgumentParser(description="检测预处理 / 多颜色检测 / 查表分割 / 金字塔检测 / 帧间跟踪的耗时和结果对比")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--recording", help="FrameRecorder 录制文件")
+    source.add_argument("--folder", help="图片目录")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--task", help="颜色任务，默认 config.yaml 的 current_task")
+    parser.add_argument("--max-delta", type=float, help="一致性检查允许的中心偏差 (像素)")
+    parser.add_argument("--multi", action="store_true", help="对比多颜色一次检测")
+    parser.add_argument("--lut", action="store_true", help="对比 HSV 分割与 BGR 查表分割")
+    parser.add_argument("--bits", type=int, nargs="+", default=[5, 6, 7], help="--lut 的每通道量化位数")
+    parser.add_argument("--pyramid", action="store_true", help="对比金字塔检测与全分辨率检测")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3], help="--pyramid 的金字塔层级")
+    parser.add_argument("--track", action="store_true", help="对比帧间跟踪与整幅搜索")
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.25, 0.5, 1.0], help="--track 的窗口外扩比例")
+    parser.add_argument("--min-margin", type=int, default=32, help="--track 的窗口外扩下限 (像素)")
+    args = parser.parse_args()
+
+    cfg = copy.deepcopy(ConfigManager(main.find_config_path()).config)
+    task = args.task or cfg['system']['current_task']
+    if not (args.multi or args.lut) and task not in cfg['colors']:
+        print(f"ERROR: 未知的任务模式 '{task}'")
+        return 1
+    cfg['system']['current_task'] = task
+    cfg['system']['show_window'] = False
+    # 结果图写到临时目录，不覆盖正式的检测结果
+    cfg['system']['save_root'] = tempfile.mkdtemp(prefix="benchmark_")
+
+    sim_cfg = dict((cfg.get('camera') or {}).get('sim') or {})
+    sim_cfg.update(fps=0, loop=False)
+    if args.recording:
+        sim_cfg.update(source="recording", path=args.recording)
+    elif args.folder:
+        sim_cfg.update(source="folder", path=args.folder)
+    else:
+        sim_cfg.update(source="synthetic")
+    frames = load_frames({'backend': 'sim', 'sim': sim_cfg}, args.frames)
+    if not frames:
+        print("ERROR: 没有取到任何帧")
+        return 1
+
+    if args.track:
+        rows, trackers = compare_track(frames, cfg, task, args.margins, args.min_margin)
+        ok = report_track(rows, trackers, args.max_delta)
+    elif args.pyramid:
+        ok = report_pyramid(compare_pyramid(frames, cfg, task, args.levels), args.levels, args.max_delta)
+    elif args.lut:
+        hsv_ms, luts = compare_lut(frames, cfg, args.bits)
+        ok = report_lut(hsv_ms, luts, len(frames), args.max_delta)
+    elif args.multi:
+        tasks = list(cfg['colors'])
+        ok = report_multi(compare_multi(frames, cfg, tasks), tasks)
+    else:
+        ok = report(compare(frames, cfg, task), args.max_delta)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_entry())
@@ -0,0 +1,147 @@
+import threading
+
+import cv2
+import numpy as np
+
+# --- BGR 查表分割 ---
+# config.yaml 中的颜色规则都是 HSV 空间的轴对齐区间，某个 BGR 值属于哪些颜色是固定的。
+# 把全部颜色预先编译成一张以量化 BGR 为下标的位掩码表 (bit i = 第 i 个颜色)，
+# 每帧只需要一次查表得到多类别标签图，不再 cvtColor 到 HSV 再对每个颜色 inRange。
+#
+#   lut = get_color_lut(cfg['colors'], bits=6)   # 配置不变时返回缓存的表
+#   label = lut.segment(image)                  # uint8 标签图 (颜色多于 8 个时为 uint16)，下一次 segment 前有效
+#   mask = lut.mask(label, "red")               # 0/255 掩膜，与 color_mask() 的输出格式相同
+#
+# bits: 每个通道保留的高位数，表项数 2^(3*bits)：5 -> 32K，6 -> 256K，7 -> 2M，8 -> 16M (无量化误差)。
+# 量化后同一格内的 BGR 值只能取同一个结果：建表时对每一格内全部 BGR 值精确计算 HSV 区间判断，按多数取值，
+# 顺带得到整个 BGR 立方体上与精确 HSV 判断不一致的比例 (cube_error)。
+
+
+def hsv_ranges(param):
+    """颜色配置中的 HSV 区间列表 [(lower, upper), ...]，红色的 lower1/upper1 + lower2/upper2 为两段"""
+    if 'lower1' in param:
+        keys = (('lower1', 'upper1'), ('lower2', 'upper2'))
+    else:
+        keys = (('lower', 'upper'),)
+    return [(np.array(param[l], dtype=np.uint8), np.array(param[u], dtype=np.uint8)) for l, u in keys]
+
+
+class ColorLUT:
+    """colors: cfg['colors']；bits: 每通道量化位数 (1~8)"""
+
+    def __init__(self, colors, bits=6):
+        bits = int(bits)
+        if not 1 <= bits <= 8:
+            raise ValueError(f"bits 需在 1~8 之间: {bits}")
+        self.names = list(colors)
+        if len(self.names) > 16:
+            raise ValueError(f"查表分割最多支持 16 种颜色: {len(self.names)}")
+        self.bits = bits
+        self.ranges = {name: hsv_ranges(colors[name]) for name in self.names}
+        self.dtype = np.uint8 if len(self.names) <= 8 else np.uint16
+        self.table = np.zeros(1 << (3 * bits), dtype=self.dtype)
+        self.cube_error = {}    # 颜色 -> 整个 BGR 立方体上与精确 HSV 判断不一致的像素比例 (%)
+        self._local = threading.local()    # 每个线程各自的复用缓冲，并发分割互不覆盖
+        self._build()
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def bit(self, name):
+        return 1 << self.names.index(name)
+
+    def _build(self):
+        bits = self.bits
+        nShift = 8 - bits
+        nCells = 1 << bits
+        nPerCell = 1 << nShift
+        nVotes = nPerCell ** 3
+        table = self.table.reshape(nCells, nCells, nCells)     # [r][g][b]
+        nMiss = dict.fromkeys(self.names, 0)
+
+        # 按 R 分片计算，每片 nSlab 个 R 值 × 256 × 256
+        gb = np.empty((256, 256, 3), dtype=np.uint8)
+        gb[..., 0] = np.arange(256, dtype=np.uint8)[None, :]
+        gb[..., 1] = np.arange(256, dtype=np.uint8)[:, None]
+        nSlab = max(nPerCell, 16)
+        slab = np.empty((nSlab, 256, 256, 3), dtype=np.uint8)
+        slab[:] = gb
+        for r0 in range(0, 256, nSlab):
+            slab[..., 2] = np.arange(r0, r0 + nSlab, dtype=np.uint8)[:, None, None]
+            hsv = cv2.cvtColor(slab.reshape(nSlab * 256, 256, 3), cv2.COLOR_BGR2HSV)
+            rows = slice(r0 >> nShift, (r0 + nSlab) >> nShift)
+            for i, name in enumerate(self.names):
+                mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+                for lower, upper in self.ranges[name]:
+                    mask |= cv2.inRange(hsv, lower, upper)
+                mask &= 1
+                # 每格 nPerCell^3 个 BGR 值中属于该颜色的个数
+                votes = mask.reshape(nSlab >> nShift, nPerCell, nCells, nPerCell, nCells, nPerCell)
+                votes = votes.sum(axis=(1, 3, 5), dtype=np.int32)
+                hit = votes * 2 > nVotes
+                table[rows] |= (hit * (1 << i)).astype(self.dtype)
+                nMiss[name] += int(np.where(hit, nVotes - votes, votes).sum())
+        self.cube_error = {name: n / float(1 << 24) * 100.0 for name, n in nMiss.items()}
+
+    def _work_buffers(self, shape):
+        # 每帧新分配的大数组首次写入时要缺页，耗时与查表本身相当；按最大像素数分配一次，
+        # 较小的图像 (如候选 ROI、跟踪窗口) 取前面一段 reshape 使用
+        nPixels = shape[0] * shape[1]
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None or buffers[1].size < nPixels:
+            buffers = (np.empty(nPixels * 4, dtype=np.uint8), np.empty(nPixels, dtype=np.uint32),
+                       np.empty(nPixels, dtype=np.uint32), np.empty(nPixels, dtype=np.intp),
+                       np.empty(nPixels, dtype=self.dtype))
+            self._local.buffers = buffers
+        bgra, idx, part, index, labels = buffers
+        return (bgra[:nPixels * 4].reshape(shape + (4,)), idx[:nPixels].reshape(shape),
+                part[:nPixels].reshape(shape), index[:nPixels].reshape(shape), labels[:nPixels].reshape(shape))
+
+    def segment(self, image):
+        """
+        一次查表得到标签图，bit i 表示属于 names[i]。
+        标签图写在本线程的复用缓冲中，同一线程的下一次 segment() 会覆盖它：先用 mask() 取出需要的颜色再做下一次分割。
+        """
+        bits = self.bits
+        m = (1 << bits) - 1
+        bgra, idx, part, index, labels = self._work_buffers(image.shape[:2])
+        # 补成 BGRA 后按小端 uint32 读出，一个像素一个整数：B | G << 8 | R << 16
+        bgra = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA, dst=bgra)
+        packed = bgra.view('<u4')[..., 0]
+        # 下标 = b | g << bits | r << 2*bits (各为量化后的值)
+        np.right_shift(packed, 8 - bits, out=idx)
+        np.bitwise_and(idx, m, out=idx)
+        np.right_shift(packed, 16 - 2 * bits, out=part)
+        np.bitwise_and(part, m << bits, out=part)
+        np.bitwise_or(idx, part, out=idx)
+        np.right_shift(packed, 24 - 3 * bits, out=part)
+        np.bitwise_and(part, m << (2 * bits), out=part)
+        np.bitwise_or(idx, part, out=idx)
+        np.copyto(index, idx)
+        # 下标由位运算保证在表内，mode='clip' 省去 'raise' 模式下输出的额外缓冲
+        return np.take(self.table, index, out=labels, mode='clip')
+
+    def mask(self, label, name):
+        """标签图中某个颜色的 0/255 掩膜"""
+        return cv2.compare(cv2.bitwise_and(label, self.bit(name)), 0, cv2.CMP_NE)
+
+
+_cache = {}
+_CACHE_SIZE = 4     # 同时保留的表数 (如 benchmark 对比多个 bits)
+
+
+def _colors_key(colors):
+    return tuple((name, tuple((tuple(l.tolist()), tuple(u.tolist())) for l, u in hsv_ranges(colors[name])))
+                 for name in colors)
+
+
+def get_color_lut(colors, bits=6):
+    """按颜色配置取查表器：HSV 区间和 bits 都不变时复用已建好的表，配置修改后重建"""
+    key = (int(bits), _colors_key(colors))
+    lut = _cache.get(key)
+    if lut is None:
+        while len(_cache) >= _CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+        lut = _cache[key] = ColorLUT(colors, bits)
+    return lut
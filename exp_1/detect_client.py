@@ -0,0 +1,68 @@
+import sys
+import socket
+from pathlib import Path
+
+# 客户端只依赖标准库 (+ yaml 读取端口)，不导入 OpenCV / 相机 SDK，启动足够快
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 50721
+
+
+def server_address():
+    """从 config.yaml 的 server 段读取监听地址，读取失败时使用默认值"""
+    if getattr(sys, 'frozen', False):
+        config_path = Path(sys.executable).parent / "config.yaml"
+    else:
+        config_path = Path(__file__).resolve().parent / "config.yaml"
+    host, port = DEFAULT_HOST, DEFAULT_PORT
+    try:
+        import yaml
+        with open(config_path, 'r', encoding='utf-8') as f:
+            server_cfg = (yaml.safe_load(f) or {}).get('server') or {}
+        host = server_cfg.get('host', host)
+        port = int(server_cfg.get('port', port))
+    except Exception:
+        pass
+    return host, port
+
+
+def send_request(command="DETECT", host=None, port=None, timeout=10.0):
+    """
+    向检测服务发送一条命令，返回响应行 (不含换行)。
+    服务未运行 (连接被拒绝) 时返回 None，调用方可退回本地检测。
+    """
+    if host is None or port is None:
+        host, port = server_address()
+    try:
+        sock = socket.create_connection((host, port), timeout=1.0)
+    except OSError:
+        return None
+    with sock:
+        sock.settimeout(timeout)
+        sock.sendall((command + "\n").encode('utf-8'))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    return reply.decode('utf-8').rstrip("\n")
+
+
+def client_entry(command="DETECT"):
+    """launcher detect 的客户端模式：服务在线时打印其结果并返回 True"""
+    try:
+        reply = send_request(command)
+    except OSError as e:
+        print(f"ERROR: 检测服务通信失败 - {e}")
+        return True
+    if reply is None:
+        return False
+    print(reply)
+    return True
+
+
+if __name__ == "__main__":
+    command = " ".join(sys.argv[1:]) or "DETECT"
+    if not client_entry(command):
+        print("ERROR: 检测服务未运行，请先执行 launcher serve")
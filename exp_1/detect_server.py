@@ -0,0 +1,194 @@
+import sys
+import json
+import time
+import threading
+import socketserver
+
+import cv2
+import main
+from main import ConfigManager, detect_with_camera
+from tracker import create_tracker
+from common.CameraRegistry import create_camera
+from common.FrameRecorder import FrameRecorder
+from common.VideoRecorder import VideoRecorder, draw_frame_info
+from detect_client import server_address
+
+# --- 常驻检测服务 ---
+# 相机只打开一次并持续取流，配置只解析一次；launcher detect 作为客户端发一条命令即可拿到结果，
+# 每次测量只剩 取图 + 处理 的时间。
+#
+# 协议：TCP 文本行，每行一条命令，每条命令回复一行
+#   DETECT  -> SUCCESS|path|cx|cy  (与 launcher detect 原输出一致) 或 ERROR: ...
+#   PING    -> PONG
+#   STATS   -> 相机统计 (JSON)
+#   RELOAD  -> 重新读取 config.yaml (相机参数变化需重启服务)
+#   QUIT    -> 停止服务
+
+
+class DetectService:
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.cfg_mgr = ConfigManager(config_path)
+        server_cfg = self.cfg_mgr.config.get('server') or {}
+        # True：等待请求之后到达的新帧；False：直接使用最新一帧 (最多旧一个帧周期)
+        self.fresh_frame = bool(server_cfg.get('fresh_frame', True))
+        self.nRequests = 0
+        self._last_center = None        # 最近一次检测到的中心 (整幅传感器坐标)，标注录像用
+        self._lock = threading.Lock()   # 同一时刻只处理一个检测请求
+        # system.tracking.enabled：连续请求之间跟踪目标，只搜索上一次位置附近的窗口
+        self.tracker = create_tracker(self.cfg_mgr.config)
+
+        self.camera = create_camera(self.cfg_mgr.config.get('camera'))
+        if not self.camera.is_open:
+            raise RuntimeError("相机未能打开")
+        if self.camera.trigger_mode == "off":
+            # 连续采集时后台持续取流，请求到来时直接拿新帧，不用等待 SDK 取图调用
+            self.camera.start_stream()
+
+        # camera.record.path：把取流的每一帧原始数据录入环形文件，排查偶发误检时回放
+        self.recorder = None
+        record_cfg = (self.cfg_mgr.config.get('camera') or {}).get('record') or {}
+        if record_cfg.get('path') and self.camera.is_streaming:
+            self.recorder = FrameRecorder(record_cfg['path'], int(record_cfg.get('slots', 256)),
+                                          self.camera.pool.nBufSize)
+            self.recorder.attach(self.camera)
+            print(f"原始帧录制: {record_cfg['path']} ({self.recorder.nSlots} 帧)")
+
+        # camera.video.path：后台编码录像，编码跟不上时丢帧，不影响取流和检测
+        self.video = None
+        video_cfg = (self.cfg_mgr.config.get('camera') or {}).get('video') or {}
+        if video_cfg.get('path') and self.camera.is_streaming:
+            self.video = VideoRecorder(video_cfg['path'], fps=video_cfg.get('fps', 30),
+                                       fourcc=video_cfg.get('fourcc', 'mp4v'),
+                                       nQueueSize=int(video_cfg.get('queue', 8)),
+                                       annotate=self._annotate if video_cfg.get('annotate', True) else None)
+            self.video.attach(self.camera)
+            print(f"视频录制: {video_cfg['path']}")
+
+    def _annotate(self, frame):
+        """录像标注 (编码线程中执行)：帧号/时间，以及最近一次检测结果的位置"""
+        draw_frame_info(frame)
+        center = self._last_center
+        if center is not None:
+            x = int((center[0] - frame.offset[0]) * frame.scale)
+            y = int((center[1] - frame.offset[1]) * frame.scale)
+            cv2.drawMarker(frame.image, (x, y), (0, 0, 255), cv2.MARKER_CROSS, 40, 2)
+
+    def detect(self):
+        with self._lock:
+            self.nRequests += 1
+            cfg = self.cfg_mgr.config
+            frame = None
+            if self.camera.is_streaming:
+                if self.fresh_frame:
+                    latest = self.camera.get_latest()
+                    after_id = -1
+                    if latest is not None:
+                        after_id = latest.frame_id
+                        latest.release()
+                    frame = self.camera.wait_next(after_id, timeout=1.0)
+                else:
+                    frame = self.camera.get_latest() or self.camera.wait_next(timeout=1.0)
+                if frame is None:
+                    return "ERROR: 取图失败 (Empty Frame)"
+            try:
+                reply = detect_with_camera(self.camera, cfg, frame, self.tracker)
+            except Exception as e:
+                return f"ERROR: 处理过程异常 - {e}"
+            parts = reply.split("|")
+            if parts[0] == "SUCCESS" and parts[1] != "NOT_FOUND" and len(parts) == 4:
+                self._last_center = (int(parts[2]), int(parts[3]))
+            return reply
+
+    def handle(self, command):
+        command = command.strip().upper()
+        if command == "DETECT":
+            return self.detect()
+        if command == "PING":
+            return "PONG"
+        if command == "STATS":
+            stats = self.camera.get_stats()
+            stats["requests"] = self.nRequests
+            if self.recorder is not None:
+                stats["recorder"] = self.recorder.get_stats()
+            if self.video is not None:
+                stats["video"] = self.video.get_stats()
+            if self.tracker is not None:
+                stats["tracker"] = self.tracker.get_stats()
+            return json.dumps(stats, ensure_ascii=False, default=str)
+        if command == "RELOAD":
+            with self._lock:
+                self.cfg_mgr = ConfigManager(self.config_path)
+                self.tracker = create_tracker(self.cfg_mgr.config)
+            return "OK"
+        return f"ERROR: 未知命令 {command}"
+
+    def close(self):
+        self.camera.CloseCamera()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.video is not None:
+            self.video.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # 一个连接可以连续发送多条命令
+        for line in self.rfile:
+            command = line.decode('utf-8', errors='ignore').strip()
+            if not command:
+                continue
+            if command.upper() == "QUIT":
+                self.wfile.write(b"BYE\n")
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            t0 = time.perf_counter()
+            reply = self.server.service.handle(command)
+            self.wfile.write((reply + "\n").encode('utf-8'))
+            if command.upper() == "DETECT":
+                print(f"[{time.strftime('%H:%M:%S')}] {reply}  ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+
+class DetectServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, service, host, port):
+        self.service = service
+        super().__init__((host, port), _RequestHandler)
+
+
+def serve_entry():
+    """launcher serve：启动常驻检测服务，Ctrl+C 或 QUIT 命令退出"""
+    config_path = main.find_config_path()
+    if not config_path.exists():
+        print(f"ERROR: 找不到配置文件: {config_path}")
+        return
+
+    try:
+        service = DetectService(config_path)
+    except Exception as e:
+        print(f"ERROR: 相机启动失败 - {e}")
+        return
+
+    host, port = server_address()
+    try:
+        server = DetectServer(service, host, port)
+    except OSError as e:
+        print(f"ERROR: 无法监听 {host}:{port} - {e}")
+        service.close()
+        return
+
+    print(f"检测服务已启动: {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        print("检测服务已停止")
+
+
+if __name__ == "__main__":
+    serve_entry()
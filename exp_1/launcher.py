@@ -1,24 +1,31 @@
 import sys
 import multiprocessing
-# 导入模块
-import main      # 对应 main.py
-import main_gui  # 对应 main_gui.py
+# 各模式按需导入：detect 的客户端模式不加载 OpenCV / GUI / 相机 SDK，启动更快
 
 def entry_point():
     multiprocessing.freeze_support()
 
     args = sys.argv
 
-    # 如果有参数 "detect"，调用 main.py 的逻辑
+    # 如果有参数 "detect"：检测服务在线时只作为客户端发请求，否则调用 main.py 的逻辑
     if len(args) > 1 and args[1] == "detect":
         try:
-            main.main_entry()  # <--- 调用修改后的函数名
+            import detect_client
+            if "--local" in args[2:] or not detect_client.client_entry():
+                import main      # 对应 main.py
+                main.main_entry()  # <--- 调用修改后的函数名
         except Exception as e:
             print(f"ERROR: {e}")
-            
+
+    # 参数 "serve"：启动常驻检测服务 (相机保持打开)
+    elif len(args) > 1 and args[1] == "serve":
+        import detect_server
+        detect_server.serve_entry()
+
     # 否则启动 GUI
     else:
+        import main_gui  # 对应 main_gui.py
         main_gui.gui_entry()   # <--- 调用修改后的函数名
 
 if __name__ == "__main__":
-    entry_point()
\ No newline at end of file
+    entry_point()
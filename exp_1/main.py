@@ -11,12 +11,17 @@ current_file_path = Path(__file__).resolve()
 exp_dir = current_file_path.parent
 root_path = current_file_path.parent.parent
 sys.path.append(str(root_path))
+# 同目录的模块 (color_lut 等) 不依赖启动时的工作目录
+if str(exp_dir) not in sys.path:
+    sys.path.append(str(exp_dir))
 
 try:
-    from common import Camera
+    from common.CameraRegistry import create_camera
+    from common.PixelConvert import MONO_BITS
 except ImportError:
     print("ERROR: 找不到 common 模块")
     sys.exit(1)
+from color_lut import get_color_lut
 
 # --- 2. 配置加载 ---
 class ConfigManager:
@@ -48,15 +53,86 @@ class ConfigManager:
 
 # --- 3. 图像处理 ---
 def fix_iccp_warning(image):
+    """
+    旧的预处理：JPEG 编码再解码。每帧几十毫秒，且有损压缩会改变像素值、影响 HSV 阈值。
+    检测流程已改用 prepare_frame()，保留本函数用于 benchmark.py 的对比。
+    """
     if image is None: return None
     _, encoded_img = cv2.imencode('.jpg', image)
     return cv2.imdecode(encoded_img, cv2.IMREAD_COLOR)
 
+def prepare_frame(image, bits=None):
+    """
+    检测前的预处理：把图像整理为连续内存的 8bit BGR 三通道，已经满足时原样返回 (不拷贝)。
+    相机帧本身不带 ICC 配置，iCCP 警告只来自带错误 sRGB 配置的 PNG 文件，用 strip_png_iccp() 处理素材即可。
+    bits：高位深图像 (如 MonoConverter out_bits=16 输出的 Mono10/12 原始值) 的有效位数，
+          按 bits-8 右移到 8bit (与 MonoConverter 默认的 8bit 输出一致)；None 时按数据类型的全部位数。
+    """
+    if image is None: return None
+    if image.dtype != np.uint8:
+        if image.dtype.kind == 'u':
+            nBits = bits if bits else image.dtype.itemsize * 8
+            image = np.right_shift(image, max(nBits - 8, 0)).astype(np.uint8)
+        else:
+            image = cv2.convertScaleAbs(image)
+    if image.ndim == 2 or image.shape[2] == 1:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return np.ascontiguousarray(image)
+
+def strip_png_iccp(src_path, dst_path=None):
+    """
+    去掉 PNG 中的 iCCP 块 (libpng warning: iCCP: known incorrect sRGB profile 的来源)，像素数据不变。
+    dst_path 为空时覆盖原文件；返回是否删除了 iCCP 块。
+    """
+    import struct
+    data = Path(src_path).read_bytes()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return False
+    out = [data[:8]]
+    pos = 8
+    found = False
+    while pos + 8 <= len(data):
+        length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+        end = pos + 12 + length
+        if ctype == b"iCCP":
+            found = True
+        else:
+            out.append(data[pos:end])
+        pos = end
+    if found:
+        Path(dst_path or src_path).write_bytes(b"".join(out))
+    return found
+
 def ensure_numpy(val):
     if isinstance(val, list):
         return np.array(val, dtype=np.uint8)
     return val
 
+def color_mask(hsv, param):
+    """按颜色配置 (lower/upper，或红色的 lower1/upper1 + lower2/upper2 两段) 生成 HSV 掩膜"""
+    if 'lower1' in param:
+        l1 = ensure_numpy(param['lower1']); u1 = ensure_numpy(param['upper1'])
+        l2 = ensure_numpy(param['lower2']); u2 = ensure_numpy(param['upper2'])
+        return cv2.bitwise_or(cv2.inRange(hsv, l1, u1), cv2.inRange(hsv, l2, u2))
+    l = ensure_numpy(param['lower']); u = ensure_numpy(param['upper'])
+    return cv2.inRange(hsv, l, u)
+
+def segment_colors(image, cfg):
+    """
+    按 system.segmentation 对整幅图做颜色分割，返回 mask_of(颜色名) -> 0/255 掩膜：
+      hsv (默认): cvtColor 到 HSV，每个颜色各自 inRange；
+      lut: 全部颜色预编译的 BGR 查表 (color_lut.py)，一次查表得到所有颜色，system.lut_bits 为每通道量化位数。
+    """
+    colors = cfg['colors']
+    if cfg['system'].get('segmentation', 'hsv') == 'lut':
+        lut = get_color_lut(colors, cfg['system'].get('lut_bits', 6))
+        label = lut.segment(image)
+        return lambda name: lut.mask(label, name)
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    return lambda name: color_mask(hsv, colors[name])
+
 def draw_rotated_text(img, text, center, angle, color, scale, thickness):
     """在图像上绘制旋转文字 (带边界检查)"""
     font = cv2.FONT_HERSHEY_SIMPLEX
@@ -101,158 +177,375 @@ def draw_rotated_text(img, text, center, angle, color, scale, thickness):
     
     img[y1:y2, x1:x2] = dst
 
-def run_detection_once(image, cfg):
-    mode = cfg['system']['current_task']
-    colors = cfg['colors']
-
-    if mode not in colors:
-        print(f"ERROR: 未知的任务模式 '{mode}'")
-        return None, 0, 0
-
-    param = colors[mode]
-    image_draw = image.copy()
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-
-    if 'lower1' in param:
-        l1 = ensure_numpy(param['lower1']); u1 = ensure_numpy(param['upper1'])
-        l2 = ensure_numpy(param['lower2']); u2 = ensure_numpy(param['upper2'])
-        mask = cv2.bitwise_or(cv2.inRange(hsv, l1, u1), cv2.inRange(hsv, l2, u2))
-    else:
-        l = ensure_numpy(param['lower']); u = ensure_numpy(param['upper'])
-        mask = cv2.inRange(hsv, l, u)
-
-    kernel = np.ones((5, 5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    detected = False
+MORPH_KERNEL = np.ones((5, 5), np.uint8)
+
+def open_mask(mask, kernel=MORPH_KERNEL):
+    """
+    开运算去噪，只在掩膜非零像素的外接矩形 (外扩核半径) 内计算，结果与整幅计算完全相同；
+    目标只占画面一小部分时，形态学的计算量随之减少。
+    """
+    x, y, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        return mask
+    ry, rx = kernel.shape[0] // 2, kernel.shape[1] // 2
+    x1 = max(0, x - rx); y1 = max(0, y - ry)
+    x2 = min(mask.shape[1], x + w + rx); y2 = min(mask.shape[0], y + h + ry)
+    mask[y1:y2, x1:x2] = cv2.morphologyEx(mask[y1:y2, x1:x2], cv2.MORPH_OPEN, kernel)
+    return mask
+
+MIN_TARGET_AREA = 1500    # 目标最小面积 (全分辨率像素)
+
+def find_target(mask, scale=1.0, offset=(0, 0)):
+    """
+    在去噪后的掩膜中找面积最大且超过阈值的轮廓，没有时返回 None；
+    offset: mask 是整幅图的一部分时其左上角坐标，返回的轮廓为整幅图坐标。
+    """
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=tuple(offset))
     max_area = 0
     best_cnt = None
+    min_area = MIN_TARGET_AREA * scale * scale
 
     for cnt in contours:
         area = cv2.contourArea(cnt)
-        if area > 1500:
+        if area > min_area:
             if area > max_area:
                 max_area = area
                 best_cnt = cnt
-                detected = True
+    return best_cnt
 
-    save_path_str = ""
-    cx, cy = 0, 0
-    draw_color = tuple(map(int, param.get('draw_color', [0, 255, 0])))
-    
-    if detected and best_cnt is not None:
-        rect = cv2.minAreaRect(best_cnt)
-        box = cv2.boxPoints(rect)
-        box = np.int0(box)
-
-        cx_float, cy_float = rect[0]
-        cx = int(cx_float)
-        cy = int(cy_float)
-        
-        dim1, dim2 = rect[1]
-        pixel_len = max(dim1, dim2)
-        pixel_wid = min(dim1, dim2)
-        
-        scale = cfg['system'].get('pixels_per_mm', 1.0)
-        if scale <= 0: scale = 1.0
-        real_len = pixel_len / scale
-        real_wid = pixel_wid / scale
-
-        # 绘图
-        cv2.drawContours(image_draw, [box], 0, draw_color, 3)
-        cv2.drawMarker(image_draw, (cx, cy), draw_color, cv2.MARKER_CROSS, 20, 3)
-
-        # 绘制长宽文字
-        drawn_len = False
-        drawn_wid = False
-
-        for i in range(4):
-            p1 = box[i]
-            p2 = box[(i + 1) % 4]
-
-            edge_len = np.linalg.norm(p1 - p2)
-            mid_x = int((p1[0] + p2[0]) / 2)
-            mid_y = int((p1[1] + p2[1]) / 2)
-            
-            vec_x = mid_x - cx
-            vec_y = mid_y - cy
-            vec_len = math.sqrt(vec_x**2 + vec_y**2)
-            if vec_len < 1e-3: vec_len = 1
-            norm_x = vec_x / vec_len
-            norm_y = vec_y / vec_len
-            
-            shift_dist = 40 
-            text_cx = int(mid_x + norm_x * shift_dist)
-            text_cy = int(mid_y + norm_y * shift_dist)
-            text_center = (text_cx, text_cy)
-
-            angle_rad = math.atan2(p2[1] - p1[1], p2[0] - p1[0])
-            angle_deg = angle_rad * 180 / math.pi
-            text_angle = angle_deg
-            if text_angle < -90: text_angle += 180
-            elif text_angle > 90: text_angle -= 180
-            
-            if not drawn_len and abs(edge_len - pixel_len) < 10:
-                text = f"L:{real_len:.1f}"
-                draw_rotated_text(image_draw, text, text_center, text_angle, draw_color, 0.7, 2)
-                drawn_len = True
-
-            elif not drawn_wid and abs(edge_len - pixel_wid) < 10:
-                text = f"W:{real_wid:.1f}"
-                draw_rotated_text(image_draw, text, text_center, text_angle, draw_color, 0.7, 2)
-                drawn_wid = True
-
-        # --- 【修复】绘制颜色标签 (YELLOW/RED) ---
-        # 找到矩形最高的顶点 (Y值最小的点)
-        top_point = min(box, key=lambda p: p[1])
-        # 计算文字位置：在最高点上方 30 像素
-        # max(40, ...) 确保文字不会画到图片外面去
-        label_x = top_point[0] - 20
-        label_y = max(40, top_point[1] - 20)
-        
-        cv2.putText(image_draw, mode.upper(), (label_x, label_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, draw_color, 2)
-
-        # 保存图片 (文件名无时间戳)
-        raw_root = cfg['system']['save_root']
-        if raw_root.startswith("."):
-            save_root = (exp_dir / raw_root).resolve()
-        else:
-            save_root = Path(raw_root)
+def find_target_in_rois(image, cfg, name, rois, scale=1.0):
+    """只在 rois [(x1, y1, x2, y2), ...] 内按全分辨率分割、开运算、找轮廓，返回面积最大的目标 (整幅图坐标)"""
+    best_cnt = None
+    max_area = 0
+    for x1, y1, x2, y2 in rois:
+        mask = open_mask(segment_colors(image[y1:y2, x1:x2], cfg)(name))
+        cnt = find_target(mask, scale, (x1, y1))
+        if cnt is not None:
+            area = cv2.contourArea(cnt)
+            if area > max_area:
+                max_area = area
+                best_cnt = cnt
+    return best_cnt
+
+def pyramid_rois(coarse_mask, level, min_area, shape):
+    """
+    缩小 2^level 倍的掩膜中可能达到面积阈值的连通域 -> 全分辨率下的候选 ROI [(x1, y1, x2, y2), ...]。
+    外接矩形放大回全分辨率后外扩 (补偿降采样丢掉的边缘和开运算的核半径)，相互重叠的 ROI 合并为一个。
+    """
+    f = 1 << level
+    margin = 2 * f + MORPH_KERNEL.shape[0]
+    nHeight, nWidth = shape[:2]
+    contours, _ = cv2.findContours(coarse_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    rois = []
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        # 外接矩形 (各边再放宽一个粗像素) 都不到阈值的连通域不可能是目标
+        if (w + 1) * (h + 1) * f * f < min_area:
+            continue
+        rois.append([max(0, x * f - margin), max(0, y * f - margin),
+                     min(nWidth, (x + w) * f + margin), min(nHeight, (y + h) * f + margin)])
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rois)):
+            for j in range(i + 1, len(rois)):
+                a, b = rois[i], rois[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rois[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rois[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [tuple(r) for r in rois]
+
+def locate_target(image, cfg, name, scale=1.0, tracker=None):
+    """
+    找 name 颜色的目标轮廓 (整幅图坐标)，没有时返回 None。
+    system.pyramid_level > 0 时先在缩小 2^level 倍的图上分割找候选区域，
+    再只在候选 ROI 内按全分辨率精确分割、开运算、找轮廓，minAreaRect 和尺寸测量仍基于全分辨率轮廓。
+    tracker: TargetTracker (tracker.py)，先只搜索按上一次结果预测的窗口，找不到时再整幅搜索。
+    """
+    if tracker is None:
+        return search_target(image, cfg, name, scale)
+
+    window = tracker.search_window(name, image.shape)
+    if window is not None:
+        best_cnt = find_target_in_rois(image, cfg, name, [window], scale)
+        if tracker.accept(best_cnt, window):
+            tracker.update(name, image.shape, best_cnt)
+            return best_cnt
+    best_cnt = search_target(image, cfg, name, scale)
+    tracker.update(name, image.shape, best_cnt, bFullSearch=True)
+    return best_cnt
+
+def search_target(image, cfg, name, scale=1.0):
+    """整幅搜索 (全分辨率，或按 system.pyramid_level 先粗后精)"""
+    level = int(cfg['system'].get('pyramid_level', 0) or 0)
+    if level <= 0:
+        return find_target(open_mask(segment_colors(image, cfg)(name)), scale)
+
+    f = 1 << level
+    # 最近邻抽样：不混合边缘两侧的颜色，避免平均出落在阈值内的假颜色
+    small = cv2.resize(image, None, fx=1.0 / f, fy=1.0 / f, interpolation=cv2.INTER_NEAREST)
+    coarse_mask = segment_colors(small, cfg)(name)
+    rois = pyramid_rois(coarse_mask, level, MIN_TARGET_AREA * scale * scale, image.shape)
+    return find_target_in_rois(image, cfg, name, rois, scale)
+
+def draw_target(image_draw, best_cnt, label, draw_color, cfg, scale=1.0, offset=(0, 0)):
+    """在 image_draw 上标注目标 (外接矩形、中心、长宽 mm、颜色标签)，返回整幅传感器坐标下的中心"""
+    rect = cv2.minAreaRect(best_cnt)
+    box = cv2.boxPoints(rect)
+    box = box.astype(np.int32)
+
+    cx_float, cy_float = rect[0]
+    cx = int(cx_float)
+    cy = int(cy_float)
+    full_cx = int(cx_float / scale) + int(offset[0])
+    full_cy = int(cy_float / scale) + int(offset[1])
+
+    dim1, dim2 = rect[1]
+    pixel_len = max(dim1, dim2)
+    pixel_wid = min(dim1, dim2)
+
+    ppm = cfg['system'].get('pixels_per_mm', 1.0)
+    if ppm <= 0: ppm = 1.0
+    ppm = ppm * scale  # 标定系数基于全分辨率
+    real_len = pixel_len / ppm
+    real_wid = pixel_wid / ppm
+
+    # 绘图：线宽、标记和字号与偏移量一样按全分辨率设计，随 scale 缩小，binning 后标注大小不变
+    line_width = max(1, int(round(3 * scale)))
+    text_width = max(1, int(round(2 * scale)))
+    cv2.drawContours(image_draw, [box], 0, draw_color, line_width)
+    cv2.drawMarker(image_draw, (cx, cy), draw_color, cv2.MARKER_CROSS, max(1, int(round(20 * scale))), line_width)
+
+    # 绘制长宽文字
+    drawn_len = False
+    drawn_wid = False
+
+    for i in range(4):
+        p1 = box[i]
+        p2 = box[(i + 1) % 4]
+
+        edge_len = np.linalg.norm(p1 - p2)
+        mid_x = int((p1[0] + p2[0]) / 2)
+        mid_y = int((p1[1] + p2[1]) / 2)
+
+        vec_x = mid_x - cx
+        vec_y = mid_y - cy
+        vec_len = math.sqrt(vec_x**2 + vec_y**2)
+        if vec_len < 1e-3: vec_len = 1
+        norm_x = vec_x / vec_len
+        norm_y = vec_y / vec_len
+
+        shift_dist = 40 * scale
+        text_cx = int(mid_x + norm_x * shift_dist)
+        text_cy = int(mid_y + norm_y * shift_dist)
+        text_center = (text_cx, text_cy)
+
+        angle_rad = math.atan2(p2[1] - p1[1], p2[0] - p1[0])
+        angle_deg = angle_rad * 180 / math.pi
+        text_angle = angle_deg
+        if text_angle < -90: text_angle += 180
+        elif text_angle > 90: text_angle -= 180
+
+        if not drawn_len and abs(edge_len - pixel_len) < 10 * scale:
+            text = f"L:{real_len:.1f}"
+            draw_rotated_text(image_draw, text, text_center, text_angle, draw_color, 0.7 * scale, text_width)
+            drawn_len = True
+
+        elif not drawn_wid and abs(edge_len - pixel_wid) < 10 * scale:
+            text = f"W:{real_wid:.1f}"
+            draw_rotated_text(image_draw, text, text_center, text_angle, draw_color, 0.7 * scale, text_width)
+            drawn_wid = True
+
+    # --- 【修复】绘制颜色标签 (YELLOW/RED) ---
+    # 找到矩形最高的顶点 (Y值最小的点)
+    top_point = min(box, key=lambda p: p[1])
+    # 计算文字位置：在最高点上方 30 像素
+    # max(40, ...) 确保文字不会画到图片外面去
+    label_x = int(top_point[0] - 20 * scale)
+    label_y = int(max(40 * scale, top_point[1] - 20 * scale))
+
+    cv2.putText(image_draw, label.upper(), (label_x, label_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0 * scale, draw_color, text_width)
+    return full_cx, full_cy
+
+def save_result_image(image_draw, cfg, sub_folder, filename):
+    """保存标注图 (文件名无时间戳)，返回路径字符串"""
+    raw_root = cfg['system']['save_root']
+    if raw_root.startswith("."):
+        save_root = (exp_dir / raw_root).resolve()
+    else:
+        save_root = Path(raw_root)
 
-        sub_folder = param['save_folder']
-        save_dir = save_root / sub_folder
-        save_dir.mkdir(parents=True, exist_ok=True)
+    save_dir = save_root / sub_folder
+    save_dir.mkdir(parents=True, exist_ok=True)
 
-        filename = f"{mode}.jpg"
-        save_full_path = save_dir / filename
-        
-        cv2.imwrite(str(save_full_path), image_draw)
-        save_path_str = str(save_full_path)
-    else:
-        save_path_str = "NOT_FOUND"
+    save_full_path = save_dir / filename
+    cv2.imwrite(str(save_full_path), image_draw)
+    return str(save_full_path)
 
+def show_result(image_draw, cfg):
     if cfg['system']['show_window']:
         cv2.imshow("Result", image_draw)
         cv2.waitKey(2000)
         cv2.destroyAllWindows()
 
-    return save_path_str, cx, cy
+def run_detection_once(image, cfg, scale=1.0, offset=(0, 0), tracker=None):
+    """
+    scale: 图像相对传感器全分辨率的缩放 (相机 binning 输出半分辨率时为 0.5)。
+    面积阈值、像素/毫米系数和标注偏移都按 scale 换算，mm 尺寸保持不变；
+    offset: 图像左上角在整幅传感器上的坐标 (相机 ROI 偏移)。
+    tracker: 连续检测时传入同一个 TargetTracker，只搜索上一次目标附近的窗口。
+    返回的中心坐标换算回全分辨率、整幅传感器坐标。
+    """
+    mode = cfg['system']['current_task']
+    colors = cfg['colors']
+
+    if mode not in colors:
+        print(f"ERROR: 未知的任务模式 '{mode}'")
+        return None, 0, 0
+
+    param = colors[mode]
+    image_draw = image.copy()
+    best_cnt = locate_target(image, cfg, mode, scale, tracker)
+
+    full_cx, full_cy = 0, 0
+    draw_color = tuple(map(int, param.get('draw_color', [0, 255, 0])))
+
+    if best_cnt is not None:
+        full_cx, full_cy = draw_target(image_draw, best_cnt, mode, draw_color, cfg, scale, offset)
+        save_path_str = save_result_image(image_draw, cfg, param['save_folder'], f"{mode}.jpg")
+    else:
+        save_path_str = "NOT_FOUND"
+
+    show_result(image_draw, cfg)
+    return save_path_str, full_cx, full_cy
+
+def is_multi_task(cfg):
+    """current_task 为 all 或颜色列表时，一帧内同时检测多种颜色"""
+    task = cfg['system']['current_task']
+    return task == "all" or isinstance(task, (list, tuple))
+
+def run_detection_multi(image, cfg, scale=1.0, offset=(0, 0), tasks=None):
+    """
+    一帧同时检测多种颜色：HSV 只转换一次 (segmentation: lut 时为一次查表)，各颜色 (含 lower1/lower2 双区间的红色) 共用；
+    所有目标画在同一张标注图上，保存到 save_root/multi_save_folder (默认 multi_results)。
+    tasks: 要检测的颜色列表，默认取 current_task 列表，current_task 为 all 时为 cfg['colors'] 中的全部颜色。
+    返回 (标注图路径或 NOT_FOUND, {颜色: {"found", "center"}}, 各阶段耗时 ms)。
+    各颜色共用整幅图的分割结果，system.pyramid_level 只用于单颜色检测 (run_detection_once)。
+    """
+    t_start = time.perf_counter()
+    colors = cfg['colors']
+    if tasks is None:
+        task = cfg['system']['current_task']
+        tasks = list(colors) if task == "all" else list(task)
+    # hsv_ms: 颜色分割阶段 (HSV 转换，segmentation: lut 时为查表)
+    timing = {"hsv_ms": 0.0, "mask_ms": 0.0, "morph_ms": 0.0, "contour_ms": 0.0, "draw_ms": 0.0, "save_ms": 0.0}
+
+    t0 = time.perf_counter()
+    mask_of = segment_colors(image, cfg)
+    image_draw = image.copy()
+    timing["hsv_ms"] = (time.perf_counter() - t0) * 1000.0
+
+    results = {}
+    for name in tasks:
+        if name not in colors:
+            print(f"ERROR: 未知的任务模式 '{name}'")
+            continue
+        param = colors[name]
+        t0 = time.perf_counter()
+        mask = mask_of(name)
+        t1 = time.perf_counter()
+        open_mask(mask)
+        t2 = time.perf_counter()
+        best_cnt = find_target(mask, scale)
+        t3 = time.perf_counter()
+        timing["mask_ms"] += (t1 - t0) * 1000.0
+        timing["morph_ms"] += (t2 - t1) * 1000.0
+        timing["contour_ms"] += (t3 - t2) * 1000.0
+
+        center = (0, 0)
+        if best_cnt is not None:
+            draw_color = tuple(map(int, param.get('draw_color', [0, 255, 0])))
+            center = draw_target(image_draw, best_cnt, name, draw_color, cfg, scale, offset)
+            timing["draw_ms"] += (time.perf_counter() - t3) * 1000.0
+        results[name] = {"found": best_cnt is not None, "center": center}
+
+    save_path_str = "NOT_FOUND"
+    if any(r["found"] for r in results.values()):
+        t0 = time.perf_counter()
+        save_path_str = save_result_image(image_draw, cfg, cfg['system'].get('multi_save_folder', 'multi_results'),
+                                          "multi.jpg")
+        timing["save_ms"] = (time.perf_counter() - t0) * 1000.0
+
+    show_result(image_draw, cfg)
+    timing["total_ms"] = (time.perf_counter() - t_start) * 1000.0
+    return save_path_str, results, timing
+
+def format_result(result_path, center_x, center_y):
+    """launcher detect 的标准输出格式 (调用方按 | 分割解析)"""
+    if result_path and result_path != "NOT_FOUND":
+        return f"SUCCESS|{result_path}|{center_x}|{center_y}"
+    return "SUCCESS|NOT_FOUND|0|0"
+
+def format_multi_result(result_path, results):
+    """多颜色结果：SUCCESS|path|颜色|cx|cy|颜色|cx|cy...，未找到的颜色坐标为 0|0"""
+    fields = ["SUCCESS", result_path or "NOT_FOUND"]
+    for name, r in results.items():
+        cx, cy = r["center"] if r["found"] else (0, 0)
+        fields += [name, str(cx), str(cy)]
+    return "|".join(fields)
+
+def detect_with_camera(camera, cfg, frame=None, tracker=None):
+    """
+    取一帧 (或使用传入的 frame) 并检测，返回 format_result() 的结果行；取图失败返回 ERROR 行。
+    frame 用完即归还相机/缓冲池；tracker 只用于单颜色检测。
+    """
+    if frame is None:
+        if camera.trigger_mode != "off":
+            # 触发模式：本次请求之后才曝光，避免拿到最多一个帧周期之前的旧图
+            frame = camera.capture_triggered()
+        else:
+            # 零拷贝取图：Mono8/BGR8 帧直接以 SDK 内存送入检测，处理完再归还
+            frame = camera.grab_zero_copy()
+    if frame is None:
+        return "ERROR: 取图失败 (Empty Frame)"
+
+    with frame:
+        if frame.image is None:
+            # 回调取流的帧在这里才做格式转换，转换失败时没有图像
+            return "ERROR: 取图失败 (Empty Frame)"
+        # 零拷贝帧直接送入检测，不再经过 JPEG 编解码
+        image = prepare_frame(frame.image, MONO_BITS.get(frame.pixel_type))
+
+        if is_multi_task(cfg):
+            result_path, results, _ = run_detection_multi(image, cfg, frame.scale, frame.offset)
+            return format_multi_result(result_path, results)
+
+        # 传入配置对象
+        result_path, center_x, center_y = run_detection_once(image, cfg, frame.scale, frame.offset, tracker)
+    return format_result(result_path, center_x, center_y)
 
 # --- 4. 主入口 ---
-def main_entry():
-    """这是供 Launcher 调用的入口函数"""
-    
-    # 1. 智能判断路径 (兼容 打包后运行 和 代码直接运行)
+def find_config_path():
+    """智能判断路径 (兼容 打包后运行 和 代码直接运行)"""
     if getattr(sys, 'frozen', False):
         # 如果是打包后的 EXE，配置文件在 EXE 同级目录下
         base_dir = Path(sys.executable).parent
     else:
         # 如果是 Python 脚本运行，配置文件在脚本同级目录下
         base_dir = Path(__file__).resolve().parent
+    return base_dir / "config.yaml"
+
+def main_entry():
+    """这是供 Launcher 调用的入口函数"""
     
-    config_path = base_dir / "config.yaml"
+    # 1. 智能判断路径 (兼容 打包后运行 和 代码直接运行)
+    config_path = find_config_path()
     
     # 2. 检查配置是否存在
     if not config_path.exists():
@@ -265,27 +558,14 @@ def main_entry():
     
     hkki_camera = None
     try:
-        hkki_camera = Camera.Camera()
+        hkki_camera = create_camera(cfg_mgr.config.get('camera'))
         time.sleep(0.5) 
     except Exception as e:
         print(f"ERROR: 相机启动失败 - {e}")
         return # 注意这里改成 return，不要 sys.exit，否则会把 launcher 也关掉
 
     try:
-        raw_image = hkki_camera.getCameraData()
-        if raw_image is None:
-            print("ERROR: 取图失败 (Empty Frame)")
-            return
-
-        image = fix_iccp_warning(raw_image)
-
-        # 传入配置对象
-        result_path, center_x, center_y = run_detection_once(image, cfg_mgr.config)
-
-        if result_path and result_path != "NOT_FOUND":
-            print(f"SUCCESS|{result_path}|{center_x}|{center_y}")
-        else:
-            print("SUCCESS|NOT_FOUND|0|0")
+        print(detect_with_camera(hkki_camera, cfg_mgr.config))
 
     except Exception as e:
         print(f"ERROR: 处理过程异常 - {e}")
@@ -295,4 +575,4 @@ def main_entry():
 
 # --- 保持独立运行能力 ---
 if __name__ == "__main__":
-    main_entry()
\ No newline at end of file
+    main_entry()
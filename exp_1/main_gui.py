@@ -19,8 +19,8 @@ config_path = exp_dir / "config.yaml"
 
 # --- 导入核心模块 ---
 try:
-    from common import Camera
-    from main import run_detection_once, fix_iccp_warning, ensure_numpy
+    from common.CameraRegistry import create_camera
+    from main import run_detection_once, run_detection_multi, prepare_frame, ensure_numpy
 except ImportError as e:
     messagebox.showerror("启动错误", f"缺失必要模块: {e}")
     sys.exit(1)
@@ -60,7 +60,16 @@ class ModernApp(tk.Tk):
 
     def connect_camera_thread(self):
         try:
-            self.camera = Camera.Camera()
+            camera = create_camera(self.config_data.get('camera'))
+            # 启动时相机不在线：每 2 秒重试一次 (运行中掉线由相机自身的自动重连处理)
+            while not camera.is_open:
+                camera.CloseCamera()
+                self.camera_status_var.set("未连接到相机，2 秒后重试...")
+                time.sleep(2.0)
+                camera = create_camera(self.config_data.get('camera'))
+            self.camera = camera
+            # 后台连续取流，各页面取图直接拿最新帧，无需等待曝光+传输
+            self.camera.start_stream()
             raw = self.camera.getCameraData()
             if raw is not None: self.camera_status_var.set("相机已连接")
             else: self.camera_status_var.set("相机连接成功但无数据")
@@ -68,9 +77,19 @@ class ModernApp(tk.Tk):
             self.page_detect.update_camera_status(True)
             self.page_tune.update_camera_status(True)
             self.page_calib.update_camera_status(True)
+            self.after(1000, self.poll_camera_status)
         except Exception as e:
             self.camera_status_var.set(f"相机连接失败: {e}")
 
+    def poll_camera_status(self):
+        """侧边栏显示掉线/重连状态"""
+        if not self.camera: return
+        if getattr(self.camera, 'is_reconnecting', False):
+            self.camera_status_var.set("相机掉线，正在重连...")
+        elif self.camera.is_open:
+            self.camera_status_var.set("相机已连接")
+        self.after(1000, self.poll_camera_status)
+
     def setup_layout(self):
         # 1. 侧边栏
         self.sidebar = tk.Frame(self, bg=COLORS["bg_dark"], width=200)
@@ -158,6 +177,10 @@ class DetectionPage(tk.Frame):
         for color in colors:
             ttk.Button(self.btn_container, text=f"检测 {color.upper()}", 
                        command=lambda c=color: self.perform_detection(c)).pack(side=tk.LEFT, padx=5)
+        if len(colors) > 1:
+            # 一帧内同时检测全部颜色 (HSV 只转换一次)
+            ttk.Button(self.btn_container, text="检测全部",
+                       command=lambda: self.perform_detection("all")).pack(side=tk.LEFT, padx=5)
 
     def update_camera_status(self, is_ready):
         if is_ready: self.img_label.config(text="相机就绪，请选择任务")
@@ -170,10 +193,21 @@ class DetectionPage(tk.Frame):
         if raw_img is None:
             self.lbl_result.config(text="取图失败", fg="red")
             return
-        image = fix_iccp_warning(raw_img)
+        image = prepare_frame(raw_img)
         self.app.config_data['system']['current_task'] = task_mode
+        if task_mode == "all":
+            path, results, timing = run_detection_multi(image, self.app.config_data, self.app.camera.image_scale,
+                                                         self.app.camera.roi_offset)
+            text = "  ".join(f"{name}({r['center'][0]}, {r['center'][1]})" if r["found"] else f"{name}未找到"
+                             for name, r in results.items())
+            found = path and path != "NOT_FOUND"
+            self.lbl_result.config(text=f"{text}  [{timing['total_ms']:.0f} ms]", fg="green" if found else "#e67e22")
+            res_img = cv2.imread(path) if found else None
+            self.display_image(res_img if res_img is not None else image)
+            return
         # 调用 main.py 里的函数 (它会自动读取 config 里的 pixels_per_mm)
-        path, cx, cy = run_detection_once(image, self.app.config_data)
+        path, cx, cy = run_detection_once(image, self.app.config_data, self.app.camera.image_scale,
+                                          self.app.camera.roi_offset)
         if path and path != "NOT_FOUND":
             self.lbl_result.config(text=f"成功: {task_mode} ({cx}, {cy})", fg="green")
             res_img = cv2.imread(path)
@@ -274,7 +308,7 @@ class TuningPage(tk.Frame):
         if not self.app.camera: return
         raw = self.app.camera.getCameraData()
         if raw is not None:
-            self.current_img = fix_iccp_warning(raw)
+            self.current_img = prepare_frame(raw)
             self.update_view()
 
     def update_view(self):
@@ -407,7 +441,7 @@ class CalibrationPage(tk.Frame):
         if not self.app.camera: return
         raw = self.app.camera.getCameraData()
         if raw is not None:
-            self.current_img = fix_iccp_warning(raw)
+            self.current_img = prepare_frame(raw)
             self.points = [] # 清空点
             self.show_image()
 
@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+
+# --- 帧间 ROI 跟踪 ---
+# 连续/重复检测时目标在相邻两帧之间移动很小。跟踪器根据上一次的 minAreaRect 和匀速运动假设预测
+# 下一次的搜索窗口，检测只处理窗口内的像素；窗口内没找到、或目标碰到窗口边缘 (可能被窗口截断) 时退回整幅搜索。
+#
+#   tracker = create_tracker(cfg)          # system.tracking.enabled 为 false 时返回 None
+#   run_detection_once(image, cfg, tracker=tracker)
+#   tracker.get_stats()                    # hits / misses / clipped，用于调整 margin
+#
+#   system:
+#     tracking:
+#       enabled: true
+#       margin: 0.5       # 窗口外扩：目标外接矩形长边的比例
+#       min_margin: 32    # 窗口外扩下限 (像素)
+#
+# misses 多：目标移动快或频繁离开视野，加大 margin；clipped 多：窗口偏小，加大 margin 或 min_margin；
+# hit_rate 接近 1 时可以逐步减小 margin，窗口越小处理越快。
+
+
+class TargetTracker:
+    def __init__(self, margin=0.5, min_margin=32):
+        self.margin = float(margin)
+        self.min_margin = int(min_margin)
+        self.nHits = 0           # 在预测窗口内找到
+        self.nMisses = 0         # 预测窗口内没找到，退回整幅搜索
+        self.nClipped = 0        # 窗口内找到但碰到窗口边缘，退回整幅搜索
+        self.nFullSearches = 0   # 整幅搜索次数 (没有跟踪状态 + 以上两种退回)
+        self.nLost = 0           # 整幅搜索也没找到，跟踪状态清空
+        self.reset()
+
+    def reset(self):
+        self.name = None
+        self.shape = None
+        self.box = None                  # 上一次目标 minAreaRect 顶点的外接矩形 (x, y, w, h)
+        self.center = None
+        self.velocity = (0.0, 0.0)       # 上一次到这一次的中心位移 (像素/次)
+
+    def search_window(self, name, shape):
+        """预测本次的搜索窗口 (x1, y1, x2, y2)；没有跟踪状态 (或颜色、图像尺寸变了) 时返回 None，需要整幅搜索"""
+        if self.box is None or name != self.name or tuple(shape[:2]) != self.shape:
+            return None
+        x, y, w, h = self.box
+        vx, vy = self.velocity
+        pad = max(self.min_margin, self.margin * max(w, h))
+        nHeight, nWidth = self.shape
+        x1 = max(0, int(x + vx - pad)); y1 = max(0, int(y + vy - pad))
+        x2 = min(nWidth, int(x + w + vx + pad) + 1); y2 = min(nHeight, int(y + h + vy + pad) + 1)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+
+    def accept(self, cnt, window):
+        """窗口搜索的结果是否可用：找到且没有碰到窗口边缘 (图像边缘除外)"""
+        if cnt is None:
+            self.nMisses += 1
+            return False
+        x, y, w, h = cv2.boundingRect(cnt)
+        x1, y1, x2, y2 = window
+        nHeight, nWidth = self.shape
+        if (x <= x1 and x1 > 0) or (y <= y1 and y1 > 0) or \
+                (x + w >= x2 and x2 < nWidth) or (y + h >= y2 and y2 < nHeight):
+            self.nClipped += 1
+            return False
+        self.nHits += 1
+        return True
+
+    def update(self, name, shape, cnt, bFullSearch=False):
+        """记录本次结果 (整幅图坐标的轮廓，None 表示没找到)，更新位置和速度"""
+        if bFullSearch:
+            self.nFullSearches += 1
+        if cnt is None:
+            if bFullSearch:
+                self.nLost += 1
+            self.reset()
+            return
+        rect = cv2.minAreaRect(cnt)
+        center = rect[0]
+        if self.center is not None and name == self.name and tuple(shape[:2]) == self.shape:
+            self.velocity = (center[0] - self.center[0], center[1] - self.center[1])
+        else:
+            self.velocity = (0.0, 0.0)
+        self.name = name
+        self.shape = tuple(shape[:2])
+        self.center = center
+        self.box = cv2.boundingRect(cv2.boxPoints(rect).astype(np.int32))
+
+    def get_stats(self):
+        nTracked = self.nHits + self.nMisses + self.nClipped
+        return {
+            "hits": self.nHits,
+            "misses": self.nMisses,
+            "clipped": self.nClipped,
+            "full_searches": self.nFullSearches,
+            "lost": self.nLost,
+            "hit_rate": round(self.nHits / nTracked, 3) if nTracked else None,
+            "margin": self.margin,
+            "min_margin": self.min_margin,
+            "tracking": self.name if self.box is not None else None,
+        }
+
+
+def create_tracker(cfg):
+    """按 system.tracking 创建跟踪器，未启用时返回 None"""
+    tracking_cfg = cfg['system'].get('tracking') or {}
+    if not tracking_cfg.get('enabled', False):
+        return None
+    return TargetTracker(tracking_cfg.get('margin', 0.5), tracking_cfg.get('min_margin', 32))
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# common 为仓库根目录下的包，exp_1 的脚本模块 (main、color_lut 等) 以脚本目录为导入路径
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "exp_1"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,208 @@
+# -- coding: utf-8 --
+"""
+测试用的假海康 SDK：用 MvImport 中纯 ctypes 的头文件拼出 MvCameraControl_class 模块，
+MvCamera 换成记录调用的 FakeMvCamera，不加载 DLL，任何平台都能导入 common.Camera。
+
+    fake_sdk.install()            # 必须在导入 common.Camera 之前调用
+    from common.Camera import Camera
+"""
+
+import sys
+import types
+from ctypes import addressof, byref, c_ubyte, cast, memmove, pointer, sizeof, POINTER
+from pathlib import Path
+
+import numpy as np
+
+MVIMPORT_DIR = Path(__file__).resolve().parent.parent / "common" / "MvImport"
+if str(MVIMPORT_DIR) not in sys.path:
+    sys.path.append(str(MVIMPORT_DIR))
+
+import CameraParams_const as _const        # noqa: E402
+import CameraParams_header as _header      # noqa: E402
+import MvErrorDefine_const as _error       # noqa: E402
+import PixelType_header as _pixel          # noqa: E402
+
+MV_OK = 0
+MV_E_NODATA = 0x80000007
+
+
+def make_device(serial, tlayer=None):
+    stDevInfo = _header.MV_CC_DEVICE_INFO()
+    stDevInfo.nTLayerType = _const.MV_GIGE_DEVICE if tlayer is None else tlayer
+    for i, ch in enumerate(serial.encode("ascii")):
+        stDevInfo.SpecialInfo.stGigEInfo.chSerialNumber[i] = ch
+    return stDevInfo
+
+
+class FakeMvCamera:
+    """
+    记录所有 MV_* 调用 (calls)；整型节点按 int_nodes 中的 (min, max, inc) 约束，
+    Width/Height 的上限随 OffsetX/OffsetY 变化，OffsetX/OffsetY 的上限随 Width/Height 变化 (与真实相机一致)。
+    未单独实现的 MV_* 方法一律返回 0。
+    """
+
+    devices = []
+    sensor = (1280, 1024)
+    instances = []
+    preset = {}        # 打开前已留在相机上的节点值 (如上次运行的 ROI)
+
+    def __init__(self):
+        self.calls = []
+        self.connected = True
+        self.fail = {}            # 方法名 -> 返回码，模拟调用失败
+        nWidth, nHeight = self.sensor
+        self.values = {"Width": nWidth, "Height": nHeight, "OffsetX": 0, "OffsetY": 0}
+        self.values.update(self.preset)
+        # 节点约束 (nMin, nInc)
+        self.int_nodes = {"Width": (32, 8), "Height": (32, 2), "OffsetX": (0, 8), "OffsetY": (0, 2)}
+        self.pixel_format = _pixel.PixelType_Gvsp_BGR8_Packed
+        self.supported_formats = [_pixel.PixelType_Gvsp_BGR8_Packed, _pixel.PixelType_Gvsp_Mono8]
+        self.nFrame = 0
+        self._frames = []
+        FakeMvCamera.instances.append(self)
+
+    def _record(self, name, *args):
+        self.calls.append((name,) + args)
+        return self.fail.get(name, MV_OK)
+
+    def called(self, name):
+        return [c for c in self.calls if c[0] == name]
+
+    def __getattr__(self, name):
+        if name.startswith("MV_"):
+            return lambda *args: self._record(name, *args)
+        raise AttributeError(name)
+
+    @staticmethod
+    def MV_CC_EnumDevices(nTLayerType, stDeviceList):
+        stDeviceList.nDeviceNum = len(FakeMvCamera.devices)
+        for i, stDevInfo in enumerate(FakeMvCamera.devices):
+            stDeviceList.pDeviceInfo[i] = cast(pointer(stDevInfo), POINTER(_header.MV_CC_DEVICE_INFO))
+        return MV_OK
+
+    # --- 整型节点 ---
+    def _node_max(self, key):
+        nWidth, nHeight = self.sensor
+        v = self.values
+        return {"Width": nWidth - v["OffsetX"], "Height": nHeight - v["OffsetY"],
+                "OffsetX": nWidth - v["Width"], "OffsetY": nHeight - v["Height"]}[key]
+
+    def _payload_size(self):
+        bpp = 1 if self.pixel_format in (_pixel.PixelType_Gvsp_Mono8,) + tuple(self._bayer8()) else 3
+        return self.values["Width"] * self.values["Height"] * bpp
+
+    @staticmethod
+    def _bayer8():
+        return (_pixel.PixelType_Gvsp_BayerRG8, _pixel.PixelType_Gvsp_BayerGB8,
+                _pixel.PixelType_Gvsp_BayerGR8, _pixel.PixelType_Gvsp_BayerBG8)
+
+    def MV_CC_GetIntValue(self, strKey, stIntValue):
+        ret = self._record("MV_CC_GetIntValue", strKey)
+        if ret != MV_OK:
+            return ret
+        if strKey == "PayloadSize":
+            stIntValue.nCurValue = self._payload_size()
+        elif strKey in self.int_nodes:
+            nMin, nInc = self.int_nodes[strKey]
+            stIntValue.nCurValue = self.values[strKey]
+            stIntValue.nMin = nMin
+            stIntValue.nMax = self._node_max(strKey)
+            stIntValue.nInc = nInc
+        return MV_OK
+
+    def MV_CC_GetIntValueEx(self, strKey, stIntValue):
+        # 与 MvCameraControl_class 中的封装相同：byref(strKey) 对 str 抛出 TypeError
+        return byref(strKey)
+
+    def _set_int(self, name, strKey, nValue):
+        ret = self._record(name, strKey, nValue)
+        if ret != MV_OK:
+            return ret
+        if strKey in self.int_nodes:
+            nMin, nInc = self.int_nodes[strKey]
+            if nValue < nMin or nValue > self._node_max(strKey) or (nValue - nMin) % nInc:
+                return 0x80000004   # MV_E_PARAMETER
+        self.values[strKey] = nValue
+        return MV_OK
+
+    def MV_CC_SetIntValue(self, strKey, nValue):
+        return self._set_int("MV_CC_SetIntValue", strKey, nValue)
+
+    def MV_CC_SetIntValueEx(self, strKey, nValue):
+        return self._set_int("MV_CC_SetIntValueEx", strKey, nValue)
+
+    # --- 像素格式 ---
+    def MV_CC_GetEnumValue(self, strKey, stEnumValue):
+        ret = self._record("MV_CC_GetEnumValue", strKey)
+        if ret == MV_OK and strKey == "PixelFormat":
+            stEnumValue.nCurValue = self.pixel_format
+            stEnumValue.nSupportedNum = len(self.supported_formats)
+            for i, enPixelType in enumerate(self.supported_formats):
+                stEnumValue.nSupportValue[i] = enPixelType
+        return ret
+
+    def MV_CC_SetEnumValue(self, strKey, nValue):
+        ret = self._record("MV_CC_SetEnumValue", strKey, nValue)
+        if ret == MV_OK and strKey == "PixelFormat":
+            if nValue not in self.supported_formats:
+                return 0x80000004
+            self.pixel_format = nValue
+        return ret
+
+    def MV_CC_GetOptimalPacketSize(self):
+        self._record("MV_CC_GetOptimalPacketSize")
+        return 1500
+
+    def MV_CC_IsDeviceConnected(self):
+        self._record("MV_CC_IsDeviceConnected")
+        return self.connected
+
+    # --- 取图 ---
+    def make_frame(self):
+        """生成一帧 (BGR8 渐变图)，返回 (numpy 数据, MV_FRAME_OUT_INFO_EX)"""
+        self.nFrame += 1
+        nWidth, nHeight = self.values["Width"], self.values["Height"]
+        data = np.full(nWidth * nHeight * 3, self.nFrame % 256, dtype=np.uint8)
+        stFrameInfo = _header.MV_FRAME_OUT_INFO_EX()
+        stFrameInfo.nWidth = nWidth
+        stFrameInfo.nHeight = nHeight
+        stFrameInfo.enPixelType = _pixel.PixelType_Gvsp_BGR8_Packed
+        stFrameInfo.nFrameNum = self.nFrame
+        stFrameInfo.nFrameLen = data.nbytes
+        return data, stFrameInfo
+
+    def MV_CC_GetOneFrameTimeout(self, pData, nDataSize, stFrameInfo, nMsec):
+        ret = self._record("MV_CC_GetOneFrameTimeout")
+        if ret != MV_OK or not self.connected:
+            return ret or MV_E_NODATA
+        data, stInfo = self.make_frame()
+        memmove(addressof(pData._obj), data.ctypes.data, min(nDataSize, data.nbytes))
+        memmove(addressof(stFrameInfo), addressof(stInfo), sizeof(stInfo))
+        return MV_OK
+
+    def MV_CC_GetImageBuffer(self, stOutFrame, nMsec):
+        ret = self._record("MV_CC_GetImageBuffer")
+        if ret != MV_OK or not self.connected:
+            return ret or MV_E_NODATA
+        data, stInfo = self.make_frame()
+        self._frames.append(data)
+        stOutFrame.pBufAddr = data.ctypes.data_as(POINTER(c_ubyte))
+        stOutFrame.stFrameInfo = stInfo
+        return MV_OK
+
+
+def install(devices=None):
+    """注册假的 MvCameraControl_class 模块；devices 为 make_device() 的列表 (默认一台 GigE 相机)"""
+    FakeMvCamera.devices = list(devices) if devices is not None else [make_device("SN0001")]
+    FakeMvCamera.instances = []
+    FakeMvCamera.preset = {}
+    module = sys.modules.get("MvCameraControl_class")
+    if module is None or not getattr(module, "IS_FAKE", False):
+        module = types.ModuleType("MvCameraControl_class")
+        for src in (_pixel, _const, _header, _error):
+            module.__dict__.update({k: v for k, v in vars(src).items() if not k.startswith("__")})
+        module.IS_FAKE = True
+        sys.modules["MvCameraControl_class"] = module
+    module.MvCamera = FakeMvCamera
+    return FakeMvCamera
@@ -0,0 +1,49 @@
+"""检测测试用的合成帧和配置"""
+
+import copy
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "exp_1" / "config.yaml"
+
+# 落在 config.yaml 各颜色 HSV 区间中部的 BGR 值
+YELLOW_BGR = (132, 150, 97)     # HSV (80, 90, 150)
+RED_BGR = (43, 69, 200)         # HSV (5, 200, 200)，lower1/upper1 段
+BACKGROUND_BGR = (90, 90, 90)   # S = 0，不属于任何颜色
+
+
+def load_cfg(tmp_path, **system):
+    """读取 exp_1/config.yaml，结果图保存到 tmp_path，system 中的键覆盖配置"""
+    import main
+    cfg = copy.deepcopy(main.ConfigManager(CONFIG_PATH).config)
+    cfg['system']['save_root'] = str(tmp_path)
+    cfg['system']['show_window'] = False
+    cfg['system'].update(system)
+    return cfg
+
+
+def make_frame(targets, shape=(480, 640), noise=3, seed=0):
+    """
+    targets: [(center, size, angle, bgr), ...]，在灰色背景上画实心旋转矩形，再叠加 ±noise 的均匀噪声。
+    """
+    rng = np.random.default_rng(seed)
+    image = np.empty(shape + (3,), dtype=np.uint8)
+    image[:] = BACKGROUND_BGR
+    for center, size, angle, color in targets:
+        box = cv2.boxPoints((center, size, angle)).astype(np.int32)
+        cv2.fillPoly(image, [box], color)
+    if noise:
+        jitter = rng.integers(-noise, noise + 1, size=image.shape, dtype=np.int16)
+        image = np.clip(image.astype(np.int16) + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+SCENES = [
+    [((320, 240), (120, 60), 0, YELLOW_BGR)],
+    [((200, 160), (150, 50), 30, YELLOW_BGR), ((480, 330), (90, 90), 0, RED_BGR)],
+    [((520, 120), (80, 140), -20, RED_BGR)],        # 没有黄色目标
+    [((60, 420), (90, 60), 10, YELLOW_BGR)],         # 靠近图像边缘
+    [],
+]
@@ -0,0 +1,136 @@
+import threading
+from ctypes import POINTER, c_ubyte, pointer
+
+import numpy as np
+import pytest
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common.Camera import Camera  # noqa: E402
+from common.FrameBuffer import FramePool  # noqa: E402
+from common.PixelConvert import FrameConverter  # noqa: E402
+from PixelType_header import PixelType_Gvsp_BayerRG12, PixelType_Gvsp_Mono12  # noqa: E402
+
+
+@pytest.fixture
+def camera():
+    fake_sdk.install()
+    cam = Camera({"reconnect": {"enabled": False}})
+    yield cam
+    cam.CloseCamera()
+
+
+def push_frame(camera):
+    """模拟 SDK 回调线程推送一帧"""
+    data, stFrameInfo = camera.cam.make_frame()
+    pData = data.ctypes.data_as(POINTER(c_ubyte))
+    camera._on_frame_callback(pData, pointer(stFrameInfo), None)
+    return data
+
+
+def test_callback_defers_conversion(camera, monkeypatch):
+    calls = []
+    convert_into = camera._convert_into
+    monkeypatch.setattr(camera, "_convert_into", lambda lease, info: calls.append(info.nFrameNum) or convert_into(lease, info))
+    camera._stream_running = True
+    try:
+        data = push_frame(camera)
+        assert calls == []          # 回调中只拷贝原始数据
+
+        lease = camera.get_latest()
+        assert calls == []          # share() 不触发转换
+        image = lease.image
+        assert calls == [1]
+        assert image.shape == (camera.cam.values["Height"], camera.cam.values["Width"], 3)
+        assert np.array_equal(image.reshape(-1), data)
+        assert lease.scale == 1.0
+
+        other = camera.get_latest()
+        assert other.image is image  # 同一帧只转换一次
+        assert calls == [1]
+        lease.release()
+        other.release()
+    finally:
+        camera._stream_running = False
+
+
+def test_unread_frames_are_never_converted(camera, monkeypatch):
+    calls = []
+    monkeypatch.setattr(camera, "_convert_into", lambda lease, info: calls.append(1))
+    camera._stream_running = True
+    try:
+        for _ in range(camera.pool.size * 2):
+            push_frame(camera)
+    finally:
+        camera._stream_running = False
+    assert calls == []
+
+
+def test_failed_deferred_conversion_gives_none(camera, monkeypatch):
+    monkeypatch.setattr(camera, "_convert_into", lambda lease, info: None)
+    camera._stream_running = True
+    try:
+        push_frame(camera)
+        assert camera.getCameraData() is None
+    finally:
+        camera._stream_running = False
+
+
+def test_reused_slot_drops_pending_conversion():
+    pool = FramePool(16, nCount=1)
+    lease = pool.acquire()
+    lease.defer(lambda l: (np.zeros(4, dtype=np.uint8), 2.0))
+    lease.release()
+    lease = pool.acquire()
+    assert lease.image is None and lease.scale == 1.0
+
+
+def push_raw(camera, raw, enPixelType, nFrameNum):
+    """推送一帧任意像素格式的原始数据"""
+    stFrameInfo = fake_sdk._header.MV_FRAME_OUT_INFO_EX()
+    stFrameInfo.nWidth = camera.cam.values["Width"]
+    stFrameInfo.nHeight = camera.cam.values["Height"]
+    stFrameInfo.enPixelType = enPixelType
+    stFrameInfo.nFrameNum = nFrameNum
+    stFrameInfo.nFrameLen = raw.nbytes
+    camera._on_frame_callback(raw.ctypes.data_as(POINTER(c_ubyte)), pointer(stFrameInfo), None)
+
+
+@pytest.mark.parametrize("enPixelType", [PixelType_Gvsp_BayerRG12, PixelType_Gvsp_Mono12])
+def test_concurrent_materialization(camera, enPixelType):
+    # 两个消费者线程同时触发两帧的延迟转换：转换器的解包/马赛克中间缓冲不能相互覆盖
+    nWidth, nHeight = camera.cam.values["Width"], camera.cam.values["Height"]
+    rng = np.random.default_rng(0)
+    raws = [rng.integers(0, 1 << 12, nWidth * nHeight, dtype=np.uint16).astype("<u2").view(np.uint8)
+            for _ in range(2)]
+    expected = [FrameConverter().convert(raw, nWidth, nHeight, enPixelType).copy() for raw in raws]
+
+    held = []
+    camera.add_sink(lambda lease: held.append(lease.share()))
+    camera._stream_running = True
+    try:
+        for nRound in range(10):
+            for k, raw in enumerate(raws):
+                push_raw(camera, raw, enPixelType, nRound * 2 + k + 1)
+            leases, held[:] = list(held), []
+            barrier = threading.Barrier(len(leases))
+            images = [None] * len(leases)
+
+            def materialize(k):
+                barrier.wait()
+                images[k] = leases[k].image.copy()
+
+            threads = [threading.Thread(target=materialize, args=(k,)) for k in range(len(leases))]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            for lease in leases:
+                lease.release()
+            for k in range(len(raws)):
+                assert np.array_equal(images[k], expected[k]), f"round {nRound} frame {k}"
+    finally:
+        camera._stream_running = False
+        camera.remove_sink(camera._sinks[0])
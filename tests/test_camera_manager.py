@@ -0,0 +1,37 @@
+import pytest
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common import CameraManager as manager_module  # noqa: E402
+from common.Camera import Camera, device_serial  # noqa: E402
+
+
+def test_open_failure_closes_opened_cameras(monkeypatch):
+    fake_sdk.install([fake_sdk.make_device(f"SN{i}") for i in range(3)])
+    opened = []
+
+    def open_one(self, stDevInfo, cfg):
+        if device_serial(stDevInfo) == "SN1":
+            raise RuntimeError("open failed")
+        cam = Camera(dict(cfg, reconnect={"enabled": False}), stDevInfo=stDevInfo)
+        opened.append(cam)
+        return cam
+
+    monkeypatch.setattr(manager_module.CameraManager, "_open_one", open_one)
+    with pytest.raises(RuntimeError, match="open failed"):
+        manager_module.CameraManager()
+    assert len(opened) == 2
+    for cam in opened:
+        assert not cam.is_open
+        assert cam.cam.called("MV_CC_CloseDevice")
+
+
+def test_all_cameras_open(monkeypatch):
+    fake_sdk.install([fake_sdk.make_device(f"SN{i}") for i in range(2)])
+    monkeypatch.setattr(manager_module.CameraManager, "_open_one",
+                        lambda self, stDevInfo, cfg: Camera(dict(cfg, reconnect={"enabled": False}), stDevInfo=stDevInfo))
+    with manager_module.CameraManager() as manager:
+        assert manager.names == ["cam0", "cam1"]
+        assert [cam.serial for _, cam in manager] == ["SN0", "SN1"]
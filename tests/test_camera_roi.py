@@ -0,0 +1,85 @@
+import pytest
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common.Camera import Camera  # noqa: E402
+
+
+STALE_ROI = {"OffsetX": 200, "OffsetY": 100, "Width": 320, "Height": 240}
+
+
+def open_camera(roi, preset=None):
+    fake = fake_sdk.install()
+    fake.preset = dict(preset or {})
+    return Camera({"reconnect": {"enabled": False}, "roi": roi})
+
+
+def test_roi_aligned_to_node_increments():
+    cam = open_camera({"x": 101, "y": 51, "width": 301, "height": 201})
+    try:
+        assert cam.roi == {"OffsetX": 96, "Width": 312, "OffsetY": 50, "Height": 202}
+        assert cam.roi_offset == (96, 50)
+        assert {k: cam.cam.values[k] for k in cam.roi} == cam.roi
+        # 对齐后的区域覆盖配置的区域
+        roi = cam.roi
+        assert roi["OffsetX"] <= 101 and roi["OffsetX"] + roi["Width"] >= 101 + 301
+        assert roi["OffsetY"] <= 51 and roi["OffsetY"] + roi["Height"] >= 51 + 201
+        assert cam.nPayloadSize == 312 * 202 * 3
+        with cam.grab_frame() as lease:
+            assert lease.image.shape[:2] == (202, 312)
+            assert lease.offset == (96, 50)
+    finally:
+        cam.CloseCamera()
+
+
+def test_roi_clamped_to_sensor():
+    # 超出传感器右下角：尺寸按上限截断，偏移向下对齐到剩余范围内
+    cam = open_camera({"x": 1200, "y": 1000, "width": 200, "height": 100})
+    try:
+        nWidth, nHeight = cam.cam.sensor
+        assert cam.roi["OffsetX"] + cam.roi["Width"] <= nWidth
+        assert cam.roi["OffsetY"] + cam.roi["Height"] <= nHeight
+        assert cam.roi["OffsetX"] % 8 == 0 and cam.roi["Width"] % 8 == 0
+    finally:
+        cam.CloseCamera()
+
+
+def test_roi_minimum_size():
+    cam = open_camera({"x": 0, "y": 0, "width": 5, "height": 3})
+    try:
+        assert cam.roi["Width"] == 32 and cam.roi["Height"] == 32
+    finally:
+        cam.CloseCamera()
+
+
+def test_no_roi():
+    # 相机上残留的 ROI (上次运行或 MVS 设置) 必须被清除，否则坐标按零偏移上报是错的
+    cam = open_camera(None, STALE_ROI)
+    try:
+        assert cam.roi is None and cam.roi_offset == (0, 0)
+        nWidth, nHeight = cam.cam.sensor
+        assert {k: cam.cam.values[k] for k in STALE_ROI} == {"Width": nWidth, "Height": nHeight, "OffsetX": 0, "OffsetY": 0}
+        assert cam.nPayloadSize == nWidth * nHeight * 3
+    finally:
+        cam.CloseCamera()
+
+
+def test_roi_replaces_stale_roi():
+    cam = open_camera({"x": 101, "y": 51, "width": 301, "height": 201}, STALE_ROI)
+    try:
+        assert cam.roi == {"OffsetX": 96, "Width": 312, "OffsetY": 50, "Height": 202}
+    finally:
+        cam.CloseCamera()
+
+
+def test_roi_without_size_extends_to_sensor_edge():
+    # 未配置 width/height 时不沿用相机上残留的尺寸
+    cam = open_camera({"x": 101, "y": 51}, STALE_ROI)
+    try:
+        nWidth, nHeight = cam.cam.sensor
+        assert cam.roi == {"OffsetX": 96, "Width": nWidth - 96, "OffsetY": 50, "Height": nHeight - 50}
+        assert {k: cam.cam.values[k] for k in cam.roi} == cam.roi
+    finally:
+        cam.CloseCamera()
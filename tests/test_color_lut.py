@@ -0,0 +1,91 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import main
+from color_lut import ColorLUT, get_color_lut
+from synthetic import CONFIG_PATH, SCENES, load_cfg, make_frame
+
+
+@pytest.fixture(scope="module")
+def colors():
+    return main.ConfigManager(CONFIG_PATH).config['colors']
+
+
+def random_image(shape=(240, 320), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=shape + (3,), dtype=np.uint8)
+
+
+def test_bits8_matches_hsv_exactly(colors):
+    lut = get_color_lut(colors, 8)
+    assert all(err == 0.0 for err in lut.cube_error.values())
+    image = random_image()
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    label = lut.segment(image)
+    for name in colors:
+        assert np.array_equal(lut.mask(label, name), main.color_mask(hsv, colors[name]))
+
+
+@pytest.mark.parametrize("bits", [5, 6])
+def test_quantized_error_matches_cube_error(colors, bits):
+    # 全部 2^24 个 BGR 值组成的图像上，与精确 HSV 判断不同的像素比例就是 cube_error
+    lut = ColorLUT(colors, bits)
+    values = np.arange(1 << 24, dtype=np.uint32)
+    image = np.stack([values & 255, (values >> 8) & 255, values >> 16], axis=-1).astype(np.uint8).reshape(4096, 4096, 3)
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    label = lut.segment(image)
+    for name in colors:
+        nDiff = np.count_nonzero(lut.mask(label, name) != main.color_mask(hsv, colors[name]))
+        assert nDiff / float(1 << 24) * 100.0 == pytest.approx(lut.cube_error[name])
+
+
+def test_segment_reuses_label_buffer(colors):
+    lut = ColorLUT(colors, 5)
+    image = random_image()
+    first = lut.segment(image)
+    expected = first.copy()
+    second = lut.segment(image)
+    assert np.shares_memory(first, second)
+    assert np.array_equal(second, expected)
+    # 较小的图像 (ROI) 使用同一缓冲的前一段
+    small = lut.segment(image[10:50, 20:90])
+    assert small.shape == (40, 70) and np.shares_memory(small, first)
+    assert np.array_equal(small, expected[10:50, 20:90])
+
+
+def test_segment_buffers_are_per_thread(colors):
+    lut = ColorLUT(colors, 5)
+    image = random_image()
+    main_label = lut.segment(image)
+    other = []
+    t = threading.Thread(target=lambda: other.append(lut.segment(image)))
+    t.start()
+    t.join()
+    assert not np.shares_memory(main_label, other[0])
+    assert np.array_equal(main_label, other[0])
+
+
+def test_more_than_eight_colors_use_uint16(colors):
+    many = {f"{name}{i}": param for i in range(5) for name, param in colors.items()}
+    lut = ColorLUT(many, 4)
+    label = lut.segment(random_image())
+    assert lut.dtype == np.uint16 and label.dtype == np.uint16
+    assert np.array_equal(lut.mask(label, "red0"), lut.mask(label, "red4"))
+
+
+def test_cache(colors):
+    assert get_color_lut(colors, 5) is get_color_lut(colors, 5)
+    assert get_color_lut(colors, 5) is not get_color_lut(colors, 4)
+
+
+@pytest.mark.parametrize("scene", range(len(SCENES)))
+def test_lut_detection_matches_hsv(tmp_path, scene):
+    image = make_frame(SCENES[scene], seed=scene)
+    results = []
+    for segmentation in ("hsv", "lut"):
+        cfg = load_cfg(tmp_path, segmentation=segmentation, lut_bits=6)
+        _, found, _ = main.run_detection_multi(image, cfg, tasks=["yellow", "red"])
+        results.append(found)
+    assert results[0] == results[1]
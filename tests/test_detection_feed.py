@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+import main
+from synthetic import SCENES, load_cfg, make_frame
+
+
+@pytest.mark.parametrize("scene", range(len(SCENES)))
+def test_direct_feed_matches_jpeg_round_trip(tmp_path, scene):
+    cfg = load_cfg(tmp_path)
+    image = make_frame(SCENES[scene], seed=scene)
+    path_direct, cx_direct, cy_direct = main.run_detection_once(main.prepare_frame(image), cfg)
+    path_jpeg, cx_jpeg, cy_jpeg = main.run_detection_once(main.fix_iccp_warning(image), cfg)
+    assert (path_direct == "NOT_FOUND") == (path_jpeg == "NOT_FOUND")
+    assert (cx_direct - cx_jpeg, cy_direct - cy_jpeg) == (0, 0)
+
+
+def test_direct_feed_finds_target(tmp_path):
+    cfg = load_cfg(tmp_path)
+    path, cx, cy = main.run_detection_once(main.prepare_frame(make_frame(SCENES[0])), cfg)
+    assert path != "NOT_FOUND"
+    assert abs(cx - 320) <= 1 and abs(cy - 240) <= 1
+
+
+def test_prepare_frame_does_not_copy_bgr():
+    image = make_frame(SCENES[0])
+    assert main.prepare_frame(image) is image
+
+
+def test_prepare_frame_normalizes_layout():
+    image = make_frame(SCENES[1])
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    assert np.array_equal(main.prepare_frame(gray), cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    assert np.array_equal(main.prepare_frame(gray[..., None]), cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    bgra = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    assert np.array_equal(main.prepare_frame(bgra), image)
+    strided = image[:, ::2]
+    prepared = main.prepare_frame(strided)
+    assert prepared.flags.c_contiguous and np.array_equal(prepared, strided)
+    assert main.prepare_frame(None) is None
+
+
+def test_prepare_frame_high_bit_depth():
+    # MonoConverter(out_bits=16) 输出的 Mono12 原始值：按有效位数右移，不经过有损 JPEG，也不在 255 截断
+    raw = (np.arange(480 * 640, dtype=np.uint32) % 4096).astype(np.uint16).reshape(480, 640, 1)
+    expected = cv2.cvtColor((raw[..., 0] >> 4).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+    prepared = main.prepare_frame(raw, 12)
+    assert prepared.dtype == np.uint8 and prepared.shape == (480, 640, 3)
+    assert np.array_equal(prepared, expected)
+    assert prepared.max() == 255
+    # 未给位数时按 16bit 处理
+    assert np.array_equal(main.prepare_frame(raw << 4), expected)
+
+
+def test_draw_target_overlay_scales_with_binning(tmp_path):
+    # 2x2 binning 的帧 (scale=0.5) 上的标注应是全分辨率标注的缩小版，而不是同样的线宽和字号
+    cfg = load_cfg(tmp_path)
+    cnt = np.array([[[200, 150]], [[440, 150]], [[440, 300]], [[200, 300]]], dtype=np.int32)
+    full = np.zeros((480, 640, 3), dtype=np.uint8)
+    binned = np.zeros((240, 320, 3), dtype=np.uint8)
+    center_full = main.draw_target(full, cnt, "yellow", (255, 255, 255), cfg)
+    center_binned = main.draw_target(binned, cnt // 2, "yellow", (255, 255, 255), cfg, scale=0.5)
+    assert center_full == center_binned
+    nFull = np.count_nonzero(full[..., 0])
+    nBinned = np.count_nonzero(binned[..., 0])
+    assert 0.15 < nBinned / nFull < 0.35
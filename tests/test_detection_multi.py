@@ -0,0 +1,38 @@
+import pytest
+
+import main
+from synthetic import SCENES, load_cfg, make_frame
+
+
+@pytest.mark.parametrize("segmentation", ["hsv", "lut"])
+@pytest.mark.parametrize("scene", range(len(SCENES)))
+def test_multi_matches_single(tmp_path, scene, segmentation):
+    cfg = load_cfg(tmp_path, segmentation=segmentation, lut_bits=8)
+    image = make_frame(SCENES[scene], seed=scene)
+    _, results, timing = main.run_detection_multi(image, cfg, tasks=["yellow", "red"])
+    for name in ("yellow", "red"):
+        cfg['system']['current_task'] = name
+        path, cx, cy = main.run_detection_once(image, cfg)
+        assert results[name]["found"] == (path != "NOT_FOUND")
+        if results[name]["found"]:
+            assert results[name]["center"] == (cx, cy)
+    assert set(timing) >= {"hsv_ms", "mask_ms", "morph_ms", "contour_ms", "draw_ms", "save_ms", "total_ms"}
+
+
+def test_multi_task_all_and_format(tmp_path):
+    cfg = load_cfg(tmp_path, current_task="all")
+    assert main.is_multi_task(cfg)
+    path, results, _ = main.run_detection_multi(make_frame(SCENES[1]), cfg)
+    assert list(results) == list(cfg['colors'])
+    assert all(r["found"] for r in results.values())
+    line = main.format_multi_result(path, results).split("|")
+    assert line[0] == "SUCCESS" and line[1] == path
+    assert line[2::3] == list(cfg['colors'])
+
+
+def test_multi_nothing_found(tmp_path):
+    cfg = load_cfg(tmp_path)
+    path, results, _ = main.run_detection_multi(make_frame(SCENES[4]), cfg, tasks=["yellow", "red"])
+    assert path == "NOT_FOUND"
+    assert not any(r["found"] for r in results.values())
+    assert main.format_multi_result(path, results) == "SUCCESS|NOT_FOUND|yellow|0|0|red|0|0"
@@ -0,0 +1,167 @@
+import pytest
+
+from common import GigETransport
+from common.GigETransport import TRANSPORT_PROFILES, apply_transport, bandwidth_test, resolve_transport
+
+
+class RecordingHandle:
+    """只记录 MV_* 调用的句柄；fail 中的方法返回错误码"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __getattr__(self, name):
+        if not name.startswith("MV_"):
+            raise AttributeError(name)
+
+        def call(*args):
+            self.calls.append((name,) + args)
+            return 0x80000004 if name in self.fail else 0
+        return call
+
+
+EXPECTED_CALLS = {
+    "default": [
+        ("MV_CC_SetIntValue", "GevSCPSPacketSize", 8164),
+    ],
+    "low_latency": [
+        ("MV_CC_SetIntValue", "GevSCPSPacketSize", 8164),
+        ("MV_CC_SetIntValue", "GevSCPD", 0),
+        ("MV_GIGE_SetResend", 1, 5, 20),
+    ],
+    "multi_camera": [
+        ("MV_CC_SetIntValue", "GevSCPSPacketSize", 8164),
+        ("MV_CC_SetIntValue", "GevSCPD", 2000),
+        ("MV_GIGE_SetResend", 1, 10, 50),
+    ],
+    "robust": [
+        ("MV_GIGE_SetGvcpTimeout", 1000),
+        ("MV_GIGE_SetRetryGvcpTimes", 5),
+        ("MV_CC_SetIntValue", "GevSCPSPacketSize", 8164),
+        ("MV_GIGE_SetResend", 1, 20, 100),
+    ],
+}
+
+
+def test_every_profile_is_covered():
+    assert set(EXPECTED_CALLS) == set(TRANSPORT_PROFILES)
+
+
+@pytest.mark.parametrize("profile", sorted(EXPECTED_CALLS))
+def test_apply_profile(profile):
+    cam = RecordingHandle()
+    applied = apply_transport(cam, resolve_transport({"profile": profile}), nOptimalPacketSize=8164)
+    assert cam.calls == EXPECTED_CALLS[profile]
+    assert applied["profile"] == profile
+    assert applied["packet_size"] == 8164
+    for key, value in TRANSPORT_PROFILES[profile].items():
+        assert applied[key] == value
+
+
+def test_apply_overrides():
+    cam = RecordingHandle()
+    transport = resolve_transport({"profile": "multi_camera", "packet_size": 1500, "packet_delay": 500,
+                                   "resend_percent": 30, "gvcp_retries": 2})
+    applied = apply_transport(cam, transport, nOptimalPacketSize=8164)
+    assert cam.calls == [
+        ("MV_GIGE_SetRetryGvcpTimes", 2),
+        ("MV_CC_SetIntValue", "GevSCPSPacketSize", 1500),
+        ("MV_CC_SetIntValue", "GevSCPD", 500),
+        ("MV_GIGE_SetResend", 1, 30, 50),
+    ]
+    assert applied == {"profile": "multi_camera", "gvcp_retries": 2, "packet_size": 1500, "packet_delay": 500,
+                       "resend": True, "resend_percent": 30, "resend_timeout": 50}
+
+
+def test_apply_resend_disabled_and_no_packet_size():
+    cam = RecordingHandle()
+    applied = apply_transport(cam, resolve_transport({"profile": "low_latency", "resend": False}))
+    assert cam.calls == [("MV_CC_SetIntValue", "GevSCPD", 0), ("MV_GIGE_SetResend", 0, 5, 20)]
+    assert applied == {"profile": "low_latency", "packet_delay": 0, "resend": False}
+
+
+def test_apply_failures_are_left_out():
+    cam = RecordingHandle(fail={"MV_GIGE_SetResend"})
+    applied = apply_transport(cam, resolve_transport("robust"), nOptimalPacketSize=1500)
+    assert "resend" not in applied and "resend_percent" not in applied
+    assert applied["gvcp_timeout"] == 1000 and applied["packet_size"] == 1500
+
+
+def test_unknown_profile_falls_back_to_default():
+    assert resolve_transport({"profile": "nope"}) == {"profile": "default"}
+
+
+class FakeInfo:
+    def __init__(self, frame_num, lost_packet):
+        self.frame_num = frame_num
+        self.lost_packet = lost_packet
+
+
+class FakeLease:
+    def __init__(self, frame_num, lost_packet, frame_len):
+        self.frame_len = frame_len
+        self.info = FakeInfo(frame_num, lost_packet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class ScriptedCamera:
+    """每次 grab_frame 返回脚本中的下一项 (None 为取图失败)，并把时钟推进 fStep 秒"""
+
+    def __init__(self, clock, script, fStep, net_infos):
+        self.clock = clock
+        self.script = list(script)
+        self.fStep = fStep
+        self.net_infos = list(net_infos)
+
+    def grab_frame(self, nTimeout):
+        self.clock[0] += self.fStep
+        item = self.script.pop(0)
+        return None if item is None else FakeLease(*item)
+
+    def get_net_trans_info(self):
+        return self.net_infos.pop(0)
+
+
+def test_bandwidth_test(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(GigETransport.time, "perf_counter", lambda: clock[0])
+    script = [(1, 0, 1000000), (2, 0, 1000000), None, (3, 0, 1000000), (6, 0, 1000000),
+              (7, 3, 1000000), (8, 0, 1000000), (9, 0, 1000000)]
+    before = {"receive_bytes": 500, "throw_frames": 1, "recv_frames": 10, "resend_requested": 4, "resend_packets": 3}
+    after = {"receive_bytes": 500 + 9000000, "throw_frames": 3, "recv_frames": 19, "resend_requested": 10,
+             "resend_packets": 8}
+    camera = ScriptedCamera(clock, script, 0.125, [before, after])
+
+    report = bandwidth_test(camera, fSeconds=1.0)
+    assert camera.script == []
+    assert report == {
+        "seconds": 1.0,
+        "frames": 7,
+        "fps": 7.0,
+        "mb_per_sec": 7.0,
+        "grab_failed": 1,
+        "incomplete_frames": 1,
+        "lost_packets": 3,
+        "skipped_frames": 2,
+        "link_mb_per_sec": 9.0,
+        "sdk_lost_frames": 2,
+        "sdk_recv_frames": 9,
+        "resend_requested": 6,
+        "resend_packets": 5,
+    }
+
+
+def test_bandwidth_test_without_net_info(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(GigETransport.time, "perf_counter", lambda: clock[0])
+    camera = ScriptedCamera(clock, [(1, 0, 2000000), (2, 0, 2000000)], 0.25, [])
+    camera.get_net_trans_info = lambda: None
+    report = bandwidth_test(camera, fSeconds=0.5)
+    assert report["frames"] == 2 and report["mb_per_sec"] == 8.0
+    assert "link_mb_per_sec" not in report
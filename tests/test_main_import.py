@@ -0,0 +1,19 @@
+import subprocess
+import sys
+from pathlib import Path
+
+MAIN_PATH = Path(__file__).resolve().parent.parent / "exp_1" / "main.py"
+
+
+def test_main_imports_from_any_cwd(tmp_path):
+    # 不把 exp_1 放进 sys.path、工作目录也不在 exp_1 时按文件路径加载 main.py
+    code = (
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location('main', {str(MAIN_PATH)!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "print(module.get_color_lut.__module__)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(tmp_path), capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().endswith("color_lut")
@@ -0,0 +1,105 @@
+import pytest
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common.Camera import Camera  # noqa: E402
+from common.PixelConvert import BAYER8  # noqa: E402
+from PixelType_header import PixelType_Gvsp_BayerRG8, PixelType_Gvsp_BGR8_Packed, PixelType_Gvsp_Mono8  # noqa: E402
+
+
+def open_camera(pixel_format, supported, list_fails=False):
+    fake = fake_sdk.install()
+    init = fake.__init__
+
+    def patched(self):
+        init(self)
+        self.supported_formats = list(supported)
+        if list_fails:
+            self.fail["MV_CC_GetEnumValue"] = 0x80000001
+
+    fake.__init__ = patched
+    try:
+        cfg = {"reconnect": {"enabled": False}}
+        if pixel_format is not None:
+            cfg["pixel_format"] = pixel_format
+        return Camera(cfg)
+    finally:
+        fake.__init__ = init
+
+
+def pixel_format_writes(cam):
+    return [c[2] for c in cam.cam.called("MV_CC_SetEnumValue") if c[1] == "PixelFormat"]
+
+
+@pytest.mark.parametrize("pixel_format", ["auto", "bayer"])
+def test_switches_to_bayer8_when_supported(pixel_format):
+    cam = open_camera(pixel_format, [PixelType_Gvsp_BGR8_Packed, PixelType_Gvsp_BayerRG8])
+    try:
+        assert cam.cam.pixel_format == PixelType_Gvsp_BayerRG8
+        # PayloadSize 在切换之后读取，按 1 字节/像素分配缓冲
+        assert cam.nPayloadSize == cam.cam.values["Width"] * cam.cam.values["Height"]
+    finally:
+        cam.CloseCamera()
+
+
+@pytest.mark.parametrize("pixel_format", [None, "keep"])
+def test_keep_leaves_format_untouched(pixel_format):
+    # 默认 keep：HSV 阈值按相机 ISP 的输出标定，不主动改格式
+    cam = open_camera(pixel_format, [PixelType_Gvsp_BGR8_Packed, PixelType_Gvsp_BayerRG8])
+    try:
+        assert cam.cam.pixel_format == PixelType_Gvsp_BGR8_Packed
+        assert not pixel_format_writes(cam)
+    finally:
+        cam.CloseCamera()
+
+
+def test_auto_keeps_mono_camera():
+    cam = open_camera("auto", [PixelType_Gvsp_Mono8])
+    try:
+        assert not pixel_format_writes(cam)
+    finally:
+        cam.CloseCamera()
+
+
+def test_auto_does_not_probe_without_support_list():
+    cam = open_camera("auto", [PixelType_Gvsp_BGR8_Packed], list_fails=True)
+    try:
+        assert not pixel_format_writes(cam)
+    finally:
+        cam.CloseCamera()
+
+
+def test_bayer_probes_without_support_list():
+    cam = open_camera("bayer", [PixelType_Gvsp_BGR8_Packed], list_fails=True)
+    try:
+        tried = pixel_format_writes(cam)
+        assert tried == list(BAYER8)
+    finally:
+        cam.CloseCamera()
+
+
+def test_original_format_restored_on_close():
+    cam = open_camera("auto", [PixelType_Gvsp_BGR8_Packed, PixelType_Gvsp_BayerRG8])
+    fake = cam.cam
+    assert fake.pixel_format == PixelType_Gvsp_BayerRG8
+    cam.CloseCamera()
+    assert fake.pixel_format == PixelType_Gvsp_BGR8_Packed
+    assert pixel_format_writes(cam)[-1] == PixelType_Gvsp_BGR8_Packed
+    # 恢复在停止取流之后、关闭设备之前
+    names = [c[0] for c in fake.calls]
+    restore = max(i for i, c in enumerate(fake.calls) if c[:2] == ("MV_CC_SetEnumValue", "PixelFormat"))
+    assert "MV_CC_StopGrabbing" in names[:restore] and names.index("MV_CC_CloseDevice", restore) > restore
+
+
+def test_close_without_switch_does_not_write_format():
+    cam = open_camera("auto", [PixelType_Gvsp_Mono8])
+    cam.CloseCamera()
+    assert not pixel_format_writes(cam)
+
+
+def test_shipped_config_keeps_format():
+    import main
+    from synthetic import CONFIG_PATH
+    assert main.ConfigManager(CONFIG_PATH).config['camera']['pixel_format'] == "keep"
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import main
+from synthetic import SCENES, YELLOW_BGR, load_cfg, make_frame
+
+
+@pytest.mark.parametrize("level", [1, 2])
+@pytest.mark.parametrize("segmentation", ["hsv", "lut"])
+@pytest.mark.parametrize("scene", range(len(SCENES)))
+def test_pyramid_matches_full_resolution(tmp_path, scene, segmentation, level):
+    image = make_frame(SCENES[scene], seed=scene)
+    for name in ("yellow", "red"):
+        cfg = load_cfg(tmp_path, segmentation=segmentation, current_task=name)
+        full = main.run_detection_once(image, cfg)
+        cfg['system']['pyramid_level'] = level
+        coarse = main.run_detection_once(image, cfg)
+        assert (full[0] == "NOT_FOUND") == (coarse[0] == "NOT_FOUND")
+        assert full[1:] == coarse[1:]
+
+
+def test_pyramid_contour_is_full_resolution(tmp_path):
+    image = make_frame(SCENES[1], seed=1)
+    cfg = load_cfg(tmp_path)
+    full = main.search_target(image, cfg, "yellow")
+    cfg['system']['pyramid_level'] = 2
+    coarse = main.search_target(image, cfg, "yellow")
+    assert np.array_equal(full, coarse)
+
+
+def test_pyramid_ignores_small_blobs(tmp_path):
+    # 面积低于阈值的小色块在粗图上就被排除，不产生候选 ROI
+    image = make_frame([((100, 100), (20, 20), 0, YELLOW_BGR), ((400, 300), (30, 30), 0, YELLOW_BGR)])
+    cfg = load_cfg(tmp_path, pyramid_level=2)
+    assert main.search_target(image, cfg, "yellow") is None
+
+
+def test_pyramid_rois_merge_overlaps():
+    coarse = np.zeros((60, 80), dtype=np.uint8)
+    coarse[10:20, 10:20] = 255
+    coarse[10:20, 22:32] = 255      # 放大外扩后与第一个重叠
+    coarse[45:55, 60:70] = 255
+    rois = main.pyramid_rois(coarse, 2, 100, (240, 320))
+    assert len(rois) == 2
+    f, margin = 4, 2 * 4 + main.MORPH_KERNEL.shape[0]
+    assert sorted(rois) == [(10 * f - margin, 10 * f - margin, 32 * f + margin, 20 * f + margin),
+                            (60 * f - margin, 45 * f - margin, 70 * f + margin, 55 * f + margin)]
+    for x1, y1, x2, y2 in rois:
+        assert 0 <= x1 < x2 <= 320 and 0 <= y1 < y2 <= 240
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import main
+from synthetic import RED_BGR, YELLOW_BGR, load_cfg, make_frame
+from tracker import TargetTracker, create_tracker
+
+
+def moving_scenes():
+    """黄色目标匀速移动，中途跳到远处、消失一帧再出现"""
+    scenes = []
+    for k in range(6):
+        scenes.append([((150 + 12 * k, 200 + 5 * k), (120, 60), 10 + k, YELLOW_BGR),
+                       ((500, 380), (80, 80), 0, RED_BGR)])
+    scenes.append([((520, 100), (120, 60), 0, YELLOW_BGR)])     # 跳出预测窗口
+    scenes.append([])                                           # 消失
+    scenes.append([((300, 300), (100, 70), 0, YELLOW_BGR)])
+    scenes.append([((306, 303), (100, 70), 0, YELLOW_BGR)])
+    return scenes
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_tracking_matches_full_search(tmp_path, level):
+    cfg = load_cfg(tmp_path, pyramid_level=level)
+    tracker = TargetTracker(margin=0.5, min_margin=32)
+    for k, scene in enumerate(moving_scenes()):
+        image = make_frame(scene, seed=k)
+        expected = main.run_detection_once(image, cfg)
+        tracked = main.run_detection_once(image, cfg, tracker=tracker)
+        assert (expected[0] == "NOT_FOUND") == (tracked[0] == "NOT_FOUND")
+        assert expected[1:] == tracked[1:]
+    stats = tracker.get_stats()
+    assert stats["hits"] >= 5
+    assert stats["misses"] + stats["clipped"] >= 1     # 跳变的那一帧退回整幅搜索
+    assert stats["lost"] == 1
+    assert stats["tracking"] == "yellow"
+
+
+def test_tracked_contour_is_identical(tmp_path):
+    cfg = load_cfg(tmp_path)
+    tracker = TargetTracker()
+    for k, scene in enumerate(moving_scenes()[:4]):
+        image = make_frame(scene, seed=k)
+        full = main.search_target(image, cfg, "yellow")
+        tracked = main.locate_target(image, cfg, "yellow", tracker=tracker)
+        assert np.array_equal(full, tracked)
+
+
+def test_search_window_follows_velocity():
+    tracker = TargetTracker(margin=0.0, min_margin=10)
+    shape = (480, 640, 3)
+    for cx in (100, 120):
+        box = np.array([[cx - 20, 90], [cx + 20, 90], [cx + 20, 110], [cx - 20, 110]], dtype=np.int32)
+        tracker.update("yellow", shape, box.reshape(-1, 1, 2))
+    x1, y1, x2, y2 = tracker.search_window("yellow", shape)
+    # 上一次外接矩形 x 100~140 (w=41)，预测再右移 20，两侧外扩 10，右边界为开区间再 +1
+    assert (x1, x2) == (110, 172)
+    assert tracker.search_window("red", shape) is None
+    assert tracker.search_window("yellow", (240, 320, 3)) is None
+
+
+def test_create_tracker(tmp_path):
+    cfg = load_cfg(tmp_path)
+    assert create_tracker(cfg) is None
+    cfg['system']['tracking'] = {"enabled": True, "margin": 0.25, "min_margin": 16}
+    tracker = create_tracker(cfg)
+    assert (tracker.margin, tracker.min_margin) == (0.25, 16)
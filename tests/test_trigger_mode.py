@@ -0,0 +1,24 @@
+import inspect
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common.CameraBase import CameraBase, TRIGGER_LINE  # noqa: E402
+from common.Camera import Camera  # noqa: E402
+from common.SimCamera import SimCamera  # noqa: E402
+
+
+def test_set_trigger_mode_signatures_match():
+    expected = inspect.signature(Camera.set_trigger_mode)
+    assert inspect.signature(CameraBase.set_trigger_mode) == expected
+    assert inspect.signature(SimCamera.set_trigger_mode) == expected
+
+
+def test_sim_camera_accepts_line_trigger_arguments():
+    cam = SimCamera({"sim": {"source": "synthetic", "width": 64, "height": 48}})
+    try:
+        assert cam.set_trigger_mode(TRIGGER_LINE, "Line1", "FallingEdge")
+        assert cam.trigger_mode == TRIGGER_LINE
+    finally:
+        cam.CloseCamera()
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+import fake_sdk
+
+fake_sdk.install()
+
+from common import Camera as camera_module  # noqa: E402
+from common.Camera import Camera  # noqa: E402
+
+
+@pytest.fixture
+def camera():
+    fake_sdk.install()
+    cam = Camera({"reconnect": {"enabled": True}})
+    yield cam
+    cam.CloseCamera()
+
+
+def test_zero_copy_grab(camera):
+    with camera.grab_zero_copy() as frame:
+        assert frame.image.shape == (camera.cam.values["Height"], camera.cam.values["Width"], 3)
+    assert camera.cam.called("MV_CC_FreeImageBuffer")
+
+
+def test_zero_copy_rechecks_is_open_under_lock(camera):
+    # 另一线程持锁期间相机掉线：拿到锁后不能再用已释放的句柄
+    camera._grab_lock.acquire()
+    result = []
+    t = threading.Thread(target=lambda: result.append(camera.grab_zero_copy()))
+    t.start()
+    t.join(0.1)
+    camera.is_open = False
+    camera._grab_lock.release()
+    t.join(1.0)
+    assert result == [None]
+    assert not camera.cam.called("MV_CC_GetImageBuffer")
+
+
+def test_zero_copy_failures_trigger_reconnect_check(camera, monkeypatch):
+    started = []
+    monkeypatch.setattr(camera, "_start_reconnect", lambda reason: started.append(reason))
+    camera.cam.fail["MV_CC_GetImageBuffer"] = fake_sdk.MV_E_NODATA
+    camera.cam.connected = False
+    for _ in range(camera_module.RECONNECT_CHECK_FAILS):
+        assert camera.grab_zero_copy(nTimeout=1) is None
+    assert camera.cam.called("MV_CC_IsDeviceConnected")
+    assert len(started) == 1